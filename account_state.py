@@ -0,0 +1,207 @@
+import threading
+import time
+from market_data_stream import get_latest_price
+
+class AccountState:
+    """Balances, positions, open orders and margin kept current from user-data streams.
+
+    A signed REST snapshot seeds each market on every (re)connect; after that
+    ACCOUNT_UPDATE, ORDER_TRADE_UPDATE, ACCOUNT_CONFIG_UPDATE and
+    outboundAccountPosition events keep it current, so sizing a position is a
+    dict lookup. Readers fall back to REST while a market is not ready.
+    """
+
+    def __init__(self, client, quote='USDT'):
+        self.client = client
+        self.quote = quote
+        self.assets = {}
+        self.positions = {}
+        self.leverage = {}
+        self.orders = {}
+        self.spot = {}
+        self.updated_at = {'SPOT': 0.0, 'FUTURES': 0.0}
+        self.stats = {'events': 0, 'snapshots': 0, 'snapshot_errors': 0}
+        self._ready = {'SPOT': False, 'FUTURES': False}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    # --- Feeding ---
+
+    def attach(self, stream, markets=None):
+        """Follow a UserDataStream; markets defaults to the stream's own (a paper exchange emits both)"""
+        markets = markets or (stream.market,)
+        for market in markets:
+            self._streams[market] = stream
+        stream.add_listener(self.handle_event)
+        reload = lambda: [self.load_snapshot(market) for market in markets]
+        stream.add_connect_listener(reload)
+        if stream.connected:
+            reload()
+        return self
+
+    def load_snapshot(self, market):
+        """Replace a market's state with a signed REST snapshot, return True on success"""
+        try:
+            if market == 'SPOT':
+                account = self.client.get('SPOT', '/api/v3/account', signed=True)
+                with self._lock:
+                    self.spot = {b['asset']: {'free': float(b['free']), 'locked': float(b['locked'])} for b in account['balances']}
+            else:
+                account = self.client.get('FUTURES', '/fapi/v2/account', signed=True)
+                orders = self.client.get('FUTURES', '/fapi/v1/openOrders', signed=True)
+                with self._lock:
+                    self.assets = {
+                        a['asset']: {
+                            'wallet_balance': float(a['walletBalance']),
+                            'cross_wallet_balance': float(a.get('crossWalletBalance', a['walletBalance'])),
+                            'unrealized_pnl': float(a.get('unrealizedProfit', a.get('unrealizedPnl', 0))),
+                        }
+                        for a in account['assets']
+                    }
+                    self.leverage = {p['symbol']: int(float(p.get('leverage', 1))) for p in account['positions']}
+                    self.positions = {
+                        p['symbol']: {
+                            'qty': float(p['positionAmt']), 'entry_price': float(p['entryPrice']),
+                            'unrealized_pnl': float(p.get('unrealizedProfit', 0)),
+                        }
+                        for p in account['positions'] if float(p['positionAmt']) != 0
+                    }
+                    self.orders = {o['orderId']: self._order(o['symbol'], o) for o in orders}
+        except Exception as e:
+            self.stats['snapshot_errors'] += 1
+            print(f"Account snapshot error ({market}): {e}")
+            return False
+        self._ready[market] = True
+        self.updated_at[market] = time.time()
+        self.stats['snapshots'] += 1
+        return True
+
+    @staticmethod
+    def _order(symbol, order):
+        return {
+            'orderId': order['orderId'], 'symbol': symbol, 'side': order['side'], 'type': order['type'],
+            'status': order['status'], 'stopPrice': float(order.get('stopPrice') or 0),
+            'quantity': float(order.get('origQty') or 0), 'closePosition': order.get('closePosition') in (True, 'true'),
+        }
+
+    def handle_event(self, event):
+        """Apply one user-data event"""
+        kind = event.get('e')
+        with self._lock:
+            if kind == 'ACCOUNT_UPDATE':
+                update = event['a']
+                for balance in update.get('B', []):
+                    asset = self.assets.setdefault(balance['a'], {'wallet_balance': 0.0, 'cross_wallet_balance': 0.0, 'unrealized_pnl': 0.0})
+                    asset['wallet_balance'] = float(balance['wb'])
+                    asset['cross_wallet_balance'] = float(balance.get('cw', balance['wb']))
+                for position in update.get('P', []):
+                    qty = float(position['pa'])
+                    if qty == 0:
+                        self.positions.pop(position['s'], None)
+                    else:
+                        self.positions[position['s']] = {
+                            'qty': qty, 'entry_price': float(position['ep']), 'unrealized_pnl': float(position.get('up', 0)),
+                        }
+            elif kind == 'ORDER_TRADE_UPDATE':
+                order = event['o']
+                if order['X'] in ('NEW', 'PARTIALLY_FILLED'):
+                    self.orders[order['i']] = self._order(order['s'], {
+                        'orderId': order['i'], 'side': order['S'], 'type': order['o'], 'status': order['X'],
+                        'stopPrice': order.get('sp'), 'origQty': order.get('q'), 'closePosition': order.get('cp'),
+                    })
+                else:
+                    self.orders.pop(order['i'], None)
+            elif kind == 'ACCOUNT_CONFIG_UPDATE' and 'ac' in event:
+                self.leverage[event['ac']['s']] = int(event['ac']['l'])
+            elif kind == 'outboundAccountPosition':
+                for balance in event['B']:
+                    self.spot[balance['a']] = {'free': float(balance['f']), 'locked': float(balance['l'])}
+            else:
+                return
+            self.stats['events'] += 1
+            self.updated_at['SPOT' if kind == 'outboundAccountPosition' else 'FUTURES'] = time.time()
+
+    # --- Reading ---
+
+    def is_ready(self, market='FUTURES'):
+        """True once a snapshot is loaded and the stream feeding it is connected"""
+        stream = self._streams.get(market)
+        return self._ready[market] and stream is not None and stream.connected
+
+    def _unrealized(self, symbol, position):
+        # A streamed mark keeps unrealized PnL moving between ACCOUNT_UPDATE events
+        price = get_latest_price(symbol)
+        if price is None:
+            return position['unrealized_pnl']
+        return (price - position['entry_price']) * position['qty']
+
+    def margin(self):
+        """Futures wallet, unrealized PnL, position margin and available balance in the quote asset"""
+        with self._lock:
+            asset = self.assets.get(self.quote, {'wallet_balance': 0.0, 'cross_wallet_balance': 0.0})
+            unrealized = sum(self._unrealized(symbol, p) for symbol, p in self.positions.items())
+            position_margin = sum(abs(p['qty']) * p['entry_price'] / self.leverage.get(symbol, 1) for symbol, p in self.positions.items())
+            return {
+                'wallet_balance': asset['wallet_balance'],
+                'unrealized_pnl': unrealized,
+                'margin_balance': asset['wallet_balance'] + unrealized,
+                'position_margin': position_margin,
+                'available_balance': max(0.0, asset['cross_wallet_balance'] + unrealized - position_margin),
+            }
+
+    def available_balance(self):
+        return self.margin()['available_balance']
+
+    def get_positions(self):
+        with self._lock:
+            return {symbol: dict(p, leverage=self.leverage.get(symbol, 1)) for symbol, p in self.positions.items()}
+
+    def get_open_orders(self, symbol=None):
+        with self._lock:
+            return [dict(o) for o in self.orders.values() if symbol is None or o['symbol'] == symbol]
+
+    def futures_account(self):
+        """The cached futures account shaped like /fapi/v2/account"""
+        margin = self.margin()
+        with self._lock:
+            assets = [
+                {
+                    'asset': name, 'walletBalance': str(a['wallet_balance']),
+                    'unrealizedPnl': str(margin['unrealized_pnl'] if name == self.quote else 0.0),
+                    'marginBalance': str(margin['margin_balance'] if name == self.quote else a['wallet_balance']),
+                    'availableBalance': str(margin['available_balance'] if name == self.quote else a['cross_wallet_balance']),
+                }
+                for name, a in self.assets.items()
+            ]
+        positions = [
+            {'symbol': s, 'positionAmt': str(p['qty']), 'entryPrice': str(p['entry_price']), 'leverage': str(p['leverage'])}
+            for s, p in self.get_positions().items()
+        ]
+        return {
+            'assets': assets, 'positions': positions,
+            'totalWalletBalance': margin['wallet_balance'], 'totalUnrealizedPnl': margin['unrealized_pnl'],
+        }
+
+    def spot_account(self):
+        """The cached spot balances shaped like /api/v3/account"""
+        with self._lock:
+            return {'balances': [{'asset': a, 'free': str(b['free']), 'locked': str(b['locked'])} for a, b in self.spot.items()]}
+
+_states = {}
+_states_lock = threading.Lock()
+
+def track_account(client, stream, markets=None):
+    """Keep the AccountState for a client current from a user-data stream, return it"""
+    with _states_lock:
+        state = _states.get(client)
+        if state is None:
+            state = AccountState(client)
+            _states[client] = state
+    return state.attach(stream, markets)
+
+def get_account_state(client, market='FUTURES'):
+    """The client's cached account state if it is ready for market, else None (read REST instead)"""
+    state = _states.get(client)
+    if state is not None and state.is_ready(market):
+        return state
+    return None
@@ -0,0 +1,85 @@
+import asyncio
+import atexit
+import contextvars
+import threading
+import aiohttp
+
+POOL_SIZE = 20
+
+_loop = None
+_loop_lock = threading.Lock()
+_sessions = {}
+
+def get_loop():
+    """Return the process-wide event loop, running on a daemon thread started on first use"""
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True, name='async-runtime').start()
+            _loop = loop
+        return _loop
+
+async def _run_in(context, coro):
+    # The task inherits the caller's context, e.g. its stage budget
+    return await context.run(asyncio.ensure_future, coro)
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the shared loop from synchronous code and return its result.
+
+    This is how the synchronous helpers (fetch_top_coins, get_trade_signal,
+    execute_trade, ...) wrap their async versions. Calling it from a coroutine
+    would deadlock the loop, so that raises RuntimeError; await the async
+    version instead.
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None:
+        coro.close()
+        raise RuntimeError("run_sync() called from a running event loop; await the async version instead")
+    return asyncio.run_coroutine_threadsafe(_run_in(contextvars.copy_context(), coro), loop).result(timeout)
+
+def get_session():
+    """The aiohttp session for the running loop, one keep-alive pool shared by every host"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0, limit_per_host=POOL_SIZE))
+        _sessions[loop] = session
+    return session
+
+class HTTPStatusError(aiohttp.ClientResponseError):
+    """Non-2xx response; .status and .text carry the answer, like requests' HTTPError.response"""
+
+    def __init__(self, response, text):
+        super().__init__(response.request_info, response.history, status=response.status, message=text[:500], headers=response.headers)
+        self.text = text
+
+async def raise_for_status(response):
+    """Raise HTTPStatusError (with the body) for a non-2xx aiohttp response"""
+    if response.status >= 400:
+        raise HTTPStatusError(response, await response.text())
+
+async def request_json(method, url, timeout, **kwargs):
+    """One HTTP request on the shared session, decoded JSON or HTTPStatusError"""
+    async with get_session().request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+        await raise_for_status(response)
+        return await response.json(content_type=None)
+
+def close_sessions():
+    """Close every aiohttp session whose loop is still running (also runs at interpreter exit)"""
+    for loop, session in list(_sessions.items()):
+        _sessions.pop(loop, None)
+        if session.closed or not loop.is_running():
+            continue
+        try:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
+        except Exception:
+            pass
+
+atexit.register(close_sessions)
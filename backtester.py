@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Vectorized backtester over historical OHLCV klines
+Usage: python backtester.py BTCUSDT-1m.csv [klines/ETHUSDT/1m ...]
+"""
+
+import json
+import os
+import sys
+import time
+import numpy as np
+from rule_engine import RuleEngine
+from kline_store import KlineStore, read_csv_klines
+from utils import load_config
+
+SIDE = {'BUY': 1, 'SELL': -1}
+
+def load_ohlcv(path):
+    """Load klines from a kline store directory (root/SYMBOL/interval), an .npz file or a Binance CSV dump"""
+    if os.path.isdir(path):
+        interval_dir = os.path.normpath(path)
+        symbol_dir, interval = os.path.split(interval_dir)
+        root, symbol = os.path.split(symbol_dir)
+        return KlineStore(root or '.').read(symbol, interval)
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {key: data[key] for key in ('open_time', 'open', 'high', 'low', 'close', 'volume')}
+    return read_csv_klines(path)
+
+def rule_engine_strategy(engine=None):
+    """Strategy that replays the local rule engine bar by bar"""
+    engine = engine or RuleEngine()
+    return lambda bars: engine.signal_series(bars['close'], bars['volume'])
+
+def recorded_signals_strategy(records, symbol=None):
+    """Strategy that replays recorded signals, e.g. get_trade_signal outputs or trade_log.jsonl entries.
+
+    Each record needs 'action' and a 'timestamp' (epoch ms or ISO string, UTC); a signal
+    applies to the first bar opening at or after its timestamp.
+    """
+    times, sides = [], []
+    for record in records:
+        if symbol and record.get('symbol') not in (symbol, None):
+            continue
+        side = SIDE.get(record.get('action') or record.get('side'))
+        if not side:
+            continue
+        stamp = record['timestamp']
+        if isinstance(stamp, str):
+            stamp = np.datetime64(stamp.rstrip('Z'), 'ms').astype(np.int64)
+        times.append(int(stamp))
+        sides.append(side)
+
+    def strategy(bars):
+        signals = np.zeros(len(bars['close']), dtype=np.int8)
+        if times:
+            idx = np.searchsorted(bars['open_time'], np.asarray(times, dtype=np.int64))
+            valid = idx < len(signals)
+            signals[idx[valid]] = np.asarray(sides, dtype=np.int8)[valid]
+        return signals
+    return strategy
+
+def _first_exit(side, high, low, close, start, stop, stop_price, take_price):
+    """Index, price and reason of the first SL/TP hit in bars [start, stop), scanning in vector chunks"""
+    chunk = 4096
+    for begin in range(start, stop, chunk):
+        end = min(begin + chunk, stop)
+        hi, lo = high[begin:end], low[begin:end]
+        if side > 0:
+            sl_hit = lo <= stop_price if stop_price else np.zeros(end - begin, bool)
+            tp_hit = hi >= take_price if take_price else np.zeros(end - begin, bool)
+        else:
+            sl_hit = hi >= stop_price if stop_price else np.zeros(end - begin, bool)
+            tp_hit = lo <= take_price if take_price else np.zeros(end - begin, bool)
+        hit = sl_hit | tp_hit
+        if hit.any():
+            i = int(np.argmax(hit))
+            # When both levels sit inside one bar, assume the stop filled first
+            if sl_hit[i]:
+                return begin + i, stop_price, 'STOP_LOSS'
+            return begin + i, take_price, 'TAKE_PROFIT'
+    return stop - 1, close[stop - 1], 'TIMEOUT' if stop < len(close) else 'END_OF_DATA'
+
+def simulate(bars, signals, stop_loss_percent=0, take_profit_percent=0, leverage=1,
+             fee_percent=0.04, position_percent=100, max_hold_bars=0):
+    """Simulate one-position-at-a-time trading of signals over bars.
+
+    A signal on bar i enters at the open of bar i+1. Exits come from
+    FUTURES_STOP_LOSS_PERCENT / FUTURES_TAKE_PROFIT_PERCENT style levels, max_hold_bars,
+    or the end of data. Fees are charged on notional at entry and exit.
+    Returns a dict of per-trade arrays plus summary statistics.
+    """
+    open_, high, low, close = bars['open'], bars['high'], bars['low'], bars['close']
+    n = len(close)
+    entries = np.flatnonzero(np.asarray(signals)[:-1]) + 1 if n > 1 else np.array([], dtype=np.int64)
+    trades = {'entry_idx': [], 'exit_idx': [], 'side': [], 'entry_price': [], 'exit_price': [], 'reason': []}
+    k = 0
+    while k < len(entries):
+        entry = int(entries[k])
+        side = int(signals[entry - 1])
+        entry_price = open_[entry]
+        stop_price = entry_price * (1 - side * stop_loss_percent / 100) if stop_loss_percent > 0 else 0
+        take_price = entry_price * (1 + side * take_profit_percent / 100) if take_profit_percent > 0 else 0
+        stop = min(n, entry + max_hold_bars) if max_hold_bars > 0 else n
+        exit_idx, exit_price, reason = _first_exit(side, high, low, close, entry, stop, stop_price, take_price)
+        trades['entry_idx'].append(entry)
+        trades['exit_idx'].append(exit_idx)
+        trades['side'].append(side)
+        trades['entry_price'].append(entry_price)
+        trades['exit_price'].append(exit_price)
+        trades['reason'].append(reason)
+        # Next trade can only open after this one is closed
+        k = int(np.searchsorted(entries, exit_idx + 1))
+
+    result = {key: np.asarray(value) for key, value in trades.items()}
+    side = result['side'].astype(np.float64)
+    if len(side):
+        gross = side * (result['exit_price'] / result['entry_price'] - 1) * leverage
+        returns = np.maximum(gross - 2 * fee_percent / 100 * leverage, -1.0)
+    else:
+        returns = np.zeros(0)
+    equity = np.cumprod(1 + returns * position_percent / 100)
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))
+    drawdown = 1 - np.concatenate(([1.0], equity)) / peak
+    result['returns'] = returns
+    result['equity'] = equity
+    result['summary'] = {
+        'bars': int(n),
+        'trades': int(len(returns)),
+        'win_rate': float((returns > 0).mean()) if len(returns) else 0.0,
+        'total_return_percent': float((equity[-1] - 1) * 100) if len(equity) else 0.0,
+        'max_drawdown_percent': float(drawdown.max() * 100),
+        'avg_trade_percent': float(returns.mean() * 100) if len(returns) else 0.0,
+        'exit_reasons': {str(reason): int((result['reason'] == reason).sum()) for reason in np.unique(result['reason'])},
+    }
+    return result
+
+def backtest(paths, strategy=None, config=None, fee_percent=0.04, max_hold_bars=0):
+    """Backtest a strategy over several kline files using the bot's futures risk settings"""
+    config = config or {}
+    strategy = strategy or rule_engine_strategy()
+    results = {}
+    for path in paths:
+        bars = load_ohlcv(path)
+        results[os.path.normpath(path)] = simulate(
+            bars, strategy(bars),
+            stop_loss_percent=config.get('FUTURES_STOP_LOSS_PERCENT', 0),
+            take_profit_percent=config.get('FUTURES_TAKE_PROFIT_PERCENT', 0),
+            leverage=config.get('FUTURES_LEVERAGE', 1),
+            fee_percent=fee_percent,
+            position_percent=config.get('FUTURES_USE_BALANCE_PERCENT', 0) or 100,
+            max_hold_bars=max_hold_bars,
+        )
+    return results
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python backtester.py <klines.csv|klines.npz|klines/SYMBOL/interval> [...]")
+        sys.exit(1)
+    config = load_config()
+    print("📊 Backtesting rule engine strategy")
+    start = time.perf_counter()
+    results = backtest(sys.argv[1:], config=config)
+    elapsed = time.perf_counter() - start
+    for name, result in results.items():
+        print(f"\n📈 {name}")
+        print(json.dumps(result['summary'], indent=2))
+    total_bars = sum(r['summary']['bars'] for r in results.values())
+    print(f"\n⏱️  {total_bars} bars in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
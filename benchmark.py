@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the trading hot path against local stand-ins (no network needed)
+Runs fetch -> signal -> order -> SL/TP -> log -> alert against mock_binance.py and
+stub CoinGecko/Gemini/Telegram endpoints, and writes latency percentiles as JSON.
+Usage:
+  python benchmark.py [--iterations 200] [--exchange-latency-ms 20] [--llm-latency-ms 300] [--output bench.json]
+  python benchmark.py --compare baseline.json bench.json [--max-regression-ms 50]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+STAGES = ['market_data', 'strategy', 'signal_to_order', 'order', 'protective_orders', 'execution', 'logging', 'alert', 'iteration']
+
+STUB_COINS = [
+    ('BTC', 'bitcoin', 60000.0), ('ETH', 'ethereum', 3000.0), ('BNB', 'binancecoin', 550.0),
+    ('SOL', 'solana', 150.0), ('XRP', 'ripple', 0.6),
+]
+
+class StubServices:
+    """CoinGecko, Gemini and Telegram stand-ins on one local HTTP server.
+
+    The model answers after llm_latency_ms with a FUTURES signal for the first coin,
+    alternating BUY and SELL so the benchmark account does not pile up one position.
+    """
+
+    def __init__(self, llm_latency_ms=0, http_latency_ms=0):
+        self.llm_latency_ms = llm_latency_ms
+        self.http_latency_ms = http_latency_ms
+        self.calls = {'coingecko': 0, 'gemini': 0, 'telegram': 0}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _decision(self, symbol):
+        with self._lock:
+            self.calls['gemini'] += 1
+            side = 'BUY' if self.calls['gemini'] % 2 else 'SELL'
+        return {'action': side, 'market': 'FUTURES', 'symbol': symbol, 'confidence': 80, 'reason': 'Benchmark stand-in'}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _send(self, payload, content_type='application/json'):
+                data = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.startswith('/coingecko/coins/markets'):
+                    stub.calls['coingecko'] += 1
+                    time.sleep(stub.http_latency_ms / 1000)
+                    self._send([
+                        {'symbol': s.lower(), 'id': coin_id, 'current_price': price, 'market_cap': price * 1e7, 'total_volume': price * 1e5}
+                        for s, coin_id, price in STUB_COINS
+                    ])
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                self.rfile.read(length)
+                if self.path.startswith('/gemini'):
+                    time.sleep(stub.llm_latency_ms / 1000)
+                    if ':streamGenerateContent' in self.path:
+                        decisions = [stub._decision(f"{s}USDT") for s, _, _ in STUB_COINS]
+                        events = ''.join(
+                            'data: ' + json.dumps({'candidates': [{'content': {'parts': [{'text': chunk}]}}]}) + '\n\n'
+                            for chunk in ('[', ','.join(json.dumps(d) for d in decisions), ']')
+                        )
+                        self._send(events, 'text/event-stream')
+                    else:
+                        text = json.dumps(stub._decision(f"{STUB_COINS[0][0]}USDT"))
+                        self._send({'candidates': [{'content': {'parts': [{'text': text}]}}]})
+                elif self.path.startswith('/telegram'):
+                    stub.calls['telegram'] += 1
+                    time.sleep(stub.http_latency_ms / 1000)
+                    self._send({'ok': True})
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='benchmark-stubs').start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def percentiles(samples):
+    """p50/p90/p99/max/mean of millisecond samples"""
+    values = np.asarray(samples, dtype=np.float64)
+    if not len(values):
+        return {'count': 0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        'count': int(len(values)), 'p50_ms': round(float(p50), 2), 'p90_ms': round(float(p90), 2),
+        'p99_ms': round(float(p99), 2), 'max_ms': round(float(values.max()), 2), 'mean_ms': round(float(values.mean()), 2),
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmark(iterations=100, exchange_latency_ms=0, llm_latency_ms=0, http_latency_ms=0, batch=False, concurrent=True, warmup=5, verbose=False):
+    """Run the hot path iterations times against the stand-ins, return the result document"""
+    # Imported here so the base-URL overrides are in place before any client exists
+    from mock_binance import MockBinanceServer, MOCK_API_KEY, MOCK_API_SECRET
+    from rate_limiter import configure_rate_limits
+    # Measure the hot path, not Binance's per-minute budgets (the limiter still runs on every call)
+    exchange = MockBinanceServer(latency_ms=exchange_latency_ms, tick_interval=0, weight_limit=10 ** 9, order_limit=10 ** 9).start()
+    configure_rate_limits(weight_limit=10 ** 9, order_limits=[(10 ** 9, 60)])
+    stubs = StubServices(llm_latency_ms, http_latency_ms).start()
+    os.environ['BINANCE_SPOT_BASE_URL'] = os.environ['BINANCE_FUTURES_BASE_URL'] = exchange.base_url
+    import binance_api
+    import coingecko_api
+    import exchange_info
+    import gemini_strategy
+    import notifier
+    from logger import log_trade
+    from binance_client import get_client
+    from risk_state import get_risk_state
+    from user_data_stream import start_user_data_stream, stop_user_data_stream
+    from account_state import track_account
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    coingecko_api.COINGECKO_URL = f"{stubs.url}/coingecko"
+    gemini_strategy.GEMINI_URL = f"{stubs.url}/gemini/models/stand-in"
+    notifier.TELEGRAM_API_URL = f"{stubs.url}/telegram"
+    binance_api.DAILY_STATS_FILE = os.path.join(workdir, 'futures_daily_stats.json')
+    exchange_info._cache = exchange_info.ExchangeInfoCache(os.path.join(workdir, 'exchange_info_cache.json'))
+    log_file = os.path.join(workdir, 'trade_log.jsonl')
+    # Realized PnL and the balance used for sizing follow the user-data stream, as in production
+    client = get_client(MOCK_API_KEY, MOCK_API_SECRET)
+    track_account(client, start_user_data_stream(client, get_risk_state(binance_api.DAILY_STATS_FILE), exchange.user_stream_url))
+    config = {
+        'BINANCE_API_KEY': MOCK_API_KEY, 'BINANCE_API_SECRET': MOCK_API_SECRET,
+        'GEMINI_API_KEY': 'stand-in', 'TELEGRAM_BOT_TOKEN': 'stand-in', 'TELEGRAM_CHAT_ID': '1',
+        'FUTURES_LEVERAGE': 10, 'FUTURES_USE_BALANCE_PERCENT': 1,
+        'FUTURES_STOP_LOSS_PERCENT': 1, 'FUTURES_TAKE_PROFIT_PERCENT': 2,
+        'FUTURES_CONCURRENT_ORDERS': 1 if concurrent else 0,
+    }
+
+    samples = {stage: [] for stage in STAGES}
+    statuses = {}
+    started = None
+    # The bot's progress prints would dominate the timings of a fast loop
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+    try:
+        for i in range(warmup + iterations):
+            if i == warmup:
+                samples = {stage: [] for stage in STAGES}
+                statuses = {}
+                started = time.perf_counter()
+            stage_ms = {}
+            with quiet:
+                t0 = time.perf_counter()
+                market_data = coingecko_api.fetch_top_coins(len(STUB_COINS))
+                t1 = time.perf_counter()
+                if batch:
+                    signal = gemini_strategy.get_batch_trade_signals(market_data, config['GEMINI_API_KEY'])[0]
+                else:
+                    signal = gemini_strategy.get_trade_signal(market_data, config['GEMINI_API_KEY'])
+                t2 = time.perf_counter()
+                result = binance_api.execute_trade(signal, config)
+                t3 = time.perf_counter()
+                log_trade(result, log_file)
+                t4 = time.perf_counter()
+                notifier.send_telegram_alert(result, config['TELEGRAM_BOT_TOKEN'], config['TELEGRAM_CHAT_ID'])
+                t5 = time.perf_counter()
+            stage_ms.update(market_data=t1 - t0, strategy=t2 - t1, execution=t3 - t2, logging=t4 - t3, alert=t5 - t4, iteration=t5 - t0)
+            for stage, seconds in stage_ms.items():
+                samples[stage].append(seconds * 1000)
+            for stage in ('signal_to_order', 'order', 'protective_orders'):
+                if stage in result.get('timings', {}):
+                    samples[stage].append(result['timings'][stage])
+            statuses[result['status']] = statuses.get(result['status'], 0) + 1
+        elapsed = time.perf_counter() - started if started else 0.0
+    finally:
+        stop_user_data_stream()
+        notifier.close_alert_dispatchers()
+        stubs.stop()
+        exchange.stop()
+        del os.environ['BINANCE_SPOT_BASE_URL'], os.environ['BINANCE_FUTURES_BASE_URL']
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'exchange_latency_ms': exchange_latency_ms,
+            'llm_latency_ms': llm_latency_ms,
+            'http_latency_ms': http_latency_ms,
+            'batch': batch,
+            'concurrent_orders': concurrent,
+        },
+        'iterations_per_second': round(iterations / elapsed, 2) if elapsed else 0.0,
+        'statuses': statuses,
+        'exchange_requests': exchange.requests,
+        'stages': {stage: percentiles(values) for stage, values in samples.items() if values},
+    }
+
+def compare(baseline, current, max_regression_ms=50, metric='p90_ms'):
+    """Per-stage deltas between two result documents; returns (rows, regressions)"""
+    rows = []
+    regressions = []
+    for stage in STAGES:
+        before = baseline['stages'].get(stage, {}).get(metric)
+        after = current['stages'].get(stage, {}).get(metric)
+        if before is None or after is None:
+            continue
+        delta = after - before
+        rows.append((stage, before, after, delta))
+        if delta > max_regression_ms:
+            regressions.append(stage)
+    return rows, regressions
+
+def print_results(results):
+    meta = results['meta']
+    print(f"📊 Benchmark @ {meta['commit']}: {meta['iterations']} iterations, "
+          f"exchange {meta['exchange_latency_ms']}ms, model {meta['llm_latency_ms']}ms")
+    print(f"{'stage':<18}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for stage in STAGES:
+        stats = results['stages'].get(stage)
+        if stats:
+            print(f"{stage:<18}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    print(f"⚡ {results['iterations_per_second']} iterations/s, statuses {results['statuses']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading hot path benchmark')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--exchange-latency-ms', type=float, default=0)
+    parser.add_argument('--llm-latency-ms', type=float, default=0)
+    parser.add_argument('--http-latency-ms', type=float, default=0)
+    parser.add_argument('--batch', action='store_true', help='use the batched streaming model call')
+    parser.add_argument('--sequential', action='store_true', help='disable FUTURES_CONCURRENT_ORDERS')
+    parser.add_argument('--verbose', action='store_true', help="keep the bot's own output")
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', nargs='+', metavar='JSON', help='baseline.json [current.json]')
+    parser.add_argument('--max-regression-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[1]) as f:
+            results = json.load(f)
+    else:
+        results = run_benchmark(args.iterations, args.exchange_latency_ms, args.llm_latency_ms,
+                                args.http_latency_ms, args.batch, not args.sequential, verbose=args.verbose)
+        print_results(results)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(baseline, results, args.max_regression_ms)
+        print(f"\n🔍 p90 vs {args.compare[0]} ({baseline['meta'].get('commit')})")
+        for stage, before, after, delta in rows:
+            flag = '❌' if stage in regressions else '✅'
+            print(f"{flag} {stage:<18}{before:>10.2f} -> {after:>10.2f} ({delta:+.2f} ms)")
+        if regressions:
+            print(f"❌ Regressed by more than {args.max_regression_ms} ms: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,105 +1,138 @@
-import requests
+import asyncio
 import time
-import hmac
-import hashlib
-from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import os
-import json
+from binance_client import get_client, client_call, _get_binance_signature
+from exchange_info import get_exchange_info
+from execution_algos import execute_parent_order, fill_of, fill_report, use_execution_algo
+from market_data_stream import get_latest_price
+from paper_exchange import get_paper_exchange
+from risk_state import DAILY_STATS_FILE, get_risk_state
+from account_state import get_account_state
+from user_data_stream import fetch_realized_pnl, get_user_data_stream, _day_start_ms
+from async_runtime import HTTPStatusError, run_sync
+from resilience import HTTP_ERRORS, no_budget
 
-def _get_binance_signature(query_string, secret):
-    return hmac.new(secret.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+def _http_error_message(e):
+    if isinstance(e, HTTPStatusError):
+        return f"HTTP Error: {e.status} - {e.text}"
+    return f"HTTP Error: {e.response.status_code} - {e.response.text}"
 
-def _get_futures_usdt_balance(api_key, api_secret):
-    url = "https://fapi.binance.com/fapi/v2/account"
-    params = {'timestamp': int(time.time() * 1000)}
-    query_string = urlencode(params)
-    signature = _get_binance_signature(query_string, api_secret)
-    params['signature'] = signature
-    headers = {'X-MBX-APIKEY': api_key}
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        for asset in data['assets']:
-            if asset['asset'] == 'USDT':
-                return float(asset['availableBalance'])
-        return 0.0
-    except Exception as e:
-        print(f"Futures balance error: {e}")
-        return 0.0
+async def _get_futures_usdt_balance_async(client):
+    """Available USDT for sizing; raises when it cannot be read rather than reporting 0"""
+    # Kept current by the user-data stream, so sizing needs no round trip
+    account = get_account_state(client)
+    if account is not None:
+        return account.available_balance()
+    data = await client_call(client, 'get', 'FUTURES', '/fapi/v2/account', signed=True)
+    for asset in data['assets']:
+        if asset['asset'] == 'USDT':
+            return float(asset['availableBalance'])
+    return 0.0
 
-def _set_futures_leverage(symbol, leverage, api_key, api_secret):
-    url = "https://fapi.binance.com/fapi/v1/leverage"
+def _get_futures_usdt_balance(client):
+    return run_sync(_get_futures_usdt_balance_async(client))
+
+async def _set_futures_leverage(symbol, leverage, client):
     params = {
         'symbol': symbol,
-        'leverage': leverage,
-        'timestamp': int(time.time() * 1000)
+        'leverage': leverage
     }
-    query_string = urlencode(params)
-    signature = _get_binance_signature(query_string, api_secret)
-    params['signature'] = signature
-    headers = {'X-MBX-APIKEY': api_key}
     try:
-        response = requests.post(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+        await client_call(client, 'post', 'FUTURES', '/fapi/v1/leverage', params, signed=True)
         return True
     except Exception as e:
         print(f"Set leverage error: {e}")
         return False
 
-DAILY_STATS_FILE = 'futures_daily_stats.json'
+async def _get_futures_price(symbol, client):
+    # Prefer the streamed price; only go over HTTP when no fresh one is available
+    price = get_latest_price(symbol)
+    if price is not None:
+        return price
+    data = await client_call(client, 'get', 'FUTURES', '/fapi/v1/ticker/price', {'symbol': symbol})
+    return float(data['price'])
 
-def _load_daily_stats():
-    today = datetime.utcnow().strftime('%Y-%m-%d')
-    if os.path.exists(DAILY_STATS_FILE):
-        try:
-            with open(DAILY_STATS_FILE, 'r') as f:
-                stats = json.load(f)
-            if stats.get('date') == today:
-                return stats
-        except Exception:
-            pass
-    # New day or file missing/corrupt
-    return {'date': today, 'trades': 0, 'realized_pnl': 0.0}
+def _reconcile_realized_pnl(client, risk):
+    """Replace today's realized PnL with the paginated income history (only used without a user-data stream)"""
+    try:
+        risk.set_realized_pnl(sum(fetch_realized_pnl(client, _day_start_ms()).values()))
+    except Exception as e:
+        print(f"Realized PnL fetch error: {e}")
 
-def _save_daily_stats(stats):
-    with open(DAILY_STATS_FILE, 'w') as f:
-        json.dump(stats, f)
+async def _risk_call(method, *args):
+    """Risk state updates are in memory; only a shared, flock'd state file is worth a thread"""
+    if method.__self__.shared:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
 
-def _update_daily_stats(pnl):
-    stats = _load_daily_stats()
-    stats['trades'] += 1
-    stats['realized_pnl'] += pnl
-    _save_daily_stats(stats)
-    return stats
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='binance-order')
 
-def _get_today_realized_pnl(api_key, api_secret):
-    """Fetch today's realized PnL from Binance futures income history."""
+async def _timed(timings, stage, func, *args):
+    """Await func(*args) and record its wall time in milliseconds under timings[stage]"""
+    start = time.perf_counter()
     try:
-        today = datetime.utcnow().strftime('%Y-%m-%d')
-        start_time = int(datetime.strptime(today, '%Y-%m-%d').timestamp() * 1000)
-        url = "https://fapi.binance.com/fapi/v1/income"
-        params = {
-            'incomeType': 'REALIZED_PNL',
-            'startTime': start_time,
-            'timestamp': int(time.time() * 1000)
-        }
-        query_string = urlencode(params)
-        signature = _get_binance_signature(query_string, api_secret)
-        params['signature'] = signature
-        headers = {'X-MBX-APIKEY': api_key}
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        total_pnl = sum(float(item['income']) for item in data if item['asset'] == 'USDT')
-        return total_pnl
+        return await func(*args)
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 2)
+
+async def _place_protective_order(client, symbol, side, order_type, stop_price):
+    """Place a closePosition STOP_MARKET or TAKE_PROFIT_MARKET order, return True on success"""
+    label = 'Stop-loss' if order_type == 'STOP_MARKET' else 'Take-profit'
+    params = {
+        'symbol': symbol,
+        'side': 'SELL' if side == 'BUY' else 'BUY',
+        'type': order_type,
+        'stopPrice': stop_price,
+        'closePosition': 'true'
+    }
+    try:
+        await client_call(client, 'post', 'FUTURES', '/fapi/v1/order', params, signed=True)
+        print(f"{label} order placed at {stop_price}")
+        return True
     except Exception as e:
-        print(f"Realized PnL fetch error: {e}")
-        return 0.0
+        print(f"{label} order error: {e}")
+        return False
+
+async def _protect_position(client, symbol, side, entry_price, config, exchange_info, timings, concurrent_orders):
+    """Place the configured closePosition stop-loss and take-profit around entry_price"""
+    stop_loss_percent = config.get('FUTURES_STOP_LOSS_PERCENT', 0)
+    take_profit_percent = config.get('FUTURES_TAKE_PROFIT_PERCENT', 0)
+    protective_orders = []
+    if stop_loss_percent > 0:
+        if side == 'BUY':
+            stop_price = exchange_info.quantize_price('FUTURES', symbol, entry_price * (1 - stop_loss_percent / 100))
+        else:
+            stop_price = exchange_info.quantize_price('FUTURES', symbol, entry_price * (1 + stop_loss_percent / 100))
+        protective_orders.append(('stop_loss', 'STOP_MARKET', stop_price))
+    if take_profit_percent > 0:
+        if side == 'BUY':
+            tp_price = exchange_info.quantize_price('FUTURES', symbol, entry_price * (1 + take_profit_percent / 100))
+        else:
+            tp_price = exchange_info.quantize_price('FUTURES', symbol, entry_price * (1 - take_profit_percent / 100))
+        protective_orders.append(('take_profit', 'TAKE_PROFIT_MARKET', tp_price))
+    protective_start = time.perf_counter()
+    # The position is open, so its stop-loss and take-profit are not cut short by the stage budget
+    with no_budget():
+        if concurrent_orders and len(protective_orders) > 1:
+            # Submit stop-loss and take-profit together so neither waits on the other
+            await asyncio.gather(*[
+                _timed(timings, stage, _place_protective_order, client, symbol, side, order_type, stop_price)
+                for stage, order_type, stop_price in protective_orders
+            ])
+        else:
+            for stage, order_type, stop_price in protective_orders:
+                await _timed(timings, stage, _place_protective_order, client, symbol, side, order_type, stop_price)
+    if protective_orders:
+        timings['protective_orders'] = round((time.perf_counter() - protective_start) * 1000, 2)
 
 def execute_trade(signal, config):
     """Execute trade based on signal, return trade result"""
+    return run_sync(execute_trade_async(signal, config))
+
+async def execute_trade_async(signal, config):
+    """Async execute_trade() for the asyncio pipeline: HTTP goes over aiohttp, file I/O off the loop"""
+    started = time.perf_counter()
     # Validate signal
     if not signal or 'action' not in signal:
         return {
@@ -139,8 +172,10 @@ def execute_trade(signal, config):
             'timestamp': datetime.now().isoformat()
         }
     
-    # Check if API keys are available
-    if not config.get('BINANCE_API_KEY') or not config.get('BINANCE_API_SECRET'):
+    paper_trading = config.get('PAPER_TRADING', 0) == 1
+    
+    # Check if API keys are available (paper trading never reaches Binance's private endpoints)
+    if not paper_trading and (not config.get('BINANCE_API_KEY') or not config.get('BINANCE_API_SECRET')):
         return {
             'symbol': signal.get('symbol', 'UNKNOWN'),
             'side': signal['action'],
@@ -152,120 +187,174 @@ def execute_trade(signal, config):
             'timestamp': datetime.now().isoformat()
         }
     
-    api_key = config['BINANCE_API_KEY']
-    api_secret = config['BINANCE_API_SECRET']
-    base_url = 'https://api.binance.com' if signal.get('market', 'SPOT') == 'SPOT' else 'https://fapi.binance.com'
-    endpoint = '/api/v3/order' if signal.get('market', 'SPOT') == 'SPOT' else '/fapi/v1/order'
+    # Paper trading runs the same order flow against the local simulated exchange
+    client = get_paper_exchange(config) if paper_trading else get_client(config['BINANCE_API_KEY'], config['BINANCE_API_SECRET'])
+    reason_prefix = '[PAPER] ' if paper_trading else ''
+    order_market = 'SPOT' if signal.get('market', 'SPOT') == 'SPOT' else 'FUTURES'
+    endpoint = '/api/v3/order' if order_market == 'SPOT' else '/fapi/v1/order'
     symbol = signal.get('symbol', 'BTCUSDT')
     side = signal['action']
     quantity = config.get('TRADE_QUANTITY', 0.001)
     
-    paper_trading = config.get('PAPER_TRADING', 0) == 1
+    concurrent_orders = config.get('FUTURES_CONCURRENT_ORDERS', 0) == 1
+    timings = {}
+    price = None
+    risk = None
     
     # --- Advanced futures risk management ---
     if signal.get('market') == 'FUTURES':
-        # Enforce max trades per day and max daily loss
-        stats = _load_daily_stats()
+        # Enforce max trades per day and max daily loss; the slot is reserved
+        # atomically so concurrent executions cannot overshoot the limit
         max_trades = config.get('FUTURES_MAX_TRADES_PER_DAY', 0)
         max_loss = config.get('FUTURES_MAX_DAILY_LOSS', 0)
-        if (max_trades > 0 and stats['trades'] >= max_trades):
+        # Each account keeps its own limits (FUTURES_STATS_FILE), unset = the single-account file
+        risk = get_risk_state(config.get('FUTURES_STATS_FILE') or DAILY_STATS_FILE, config.get('RISK_STATE_SHARED') == 1)
+        limit_reason = await _risk_call(risk.try_reserve, max_trades, max_loss)
+        if limit_reason:
             return {
                 'symbol': signal.get('symbol', 'UNKNOWN'),
                 'side': signal['action'],
                 'market': signal.get('market', 'FUTURES'),
                 'confidence': signal.get('confidence', 0),
-                'reason': f"Max trades per day ({max_trades}) reached.",
+                'reason': limit_reason,
                 'status': 'SKIPPED',
                 'response': None,
                 'timestamp': datetime.now().isoformat()
             }
-        if (max_loss > 0 and stats['realized_pnl'] <= -abs(max_loss)):
-            return {
-                'symbol': signal.get('symbol', 'UNKNOWN'),
-                'side': signal['action'],
-                'market': signal.get('market', 'FUTURES'),
-                'confidence': signal.get('confidence', 0),
-                'reason': f"Max daily loss (${max_loss}) reached.",
-                'status': 'SKIPPED',
-                'response': None,
-                'timestamp': datetime.now().isoformat()
-            }
-        # 1. Set leverage
         leverage = config.get('FUTURES_LEVERAGE', 1)
-        _set_futures_leverage(symbol, leverage, api_key, api_secret)
-        # 2. Calculate position size as 3% of available USDT balance
         use_balance_percent = config.get('FUTURES_USE_BALANCE_PERCENT', 0)
-        if use_balance_percent > 0:
-            usdt_balance = _get_futures_usdt_balance(api_key, api_secret)
-            if usdt_balance > 0:
-                # Get price for symbol (e.g., BTCUSDT)
-                price_url = f"https://fapi.binance.com/fapi/v1/ticker/price?symbol={symbol}"
+        usdt_balance = 0.0
+        balance_error = None
+        pre_trade_start = time.perf_counter()
+        if concurrent_orders:
+            # Leverage, balance and price are independent, so fetch them side by side
+            leverage_task = asyncio.ensure_future(_timed(timings, 'set_leverage', _set_futures_leverage, symbol, leverage, client))
+            if use_balance_percent > 0:
+                balance_result, price_result = await asyncio.gather(
+                    _timed(timings, 'balance', _get_futures_usdt_balance_async, client),
+                    _timed(timings, 'price', _get_futures_price, symbol, client),
+                    return_exceptions=True,
+                )
+                if isinstance(balance_result, Exception):
+                    balance_error = balance_result
+                else:
+                    usdt_balance = balance_result
+                if isinstance(price_result, Exception):
+                    print(f"Price fetch error: {price_result}")
+                else:
+                    price = price_result
+            await leverage_task
+        else:
+            # 1. Set leverage
+            await _timed(timings, 'set_leverage', _set_futures_leverage, symbol, leverage, client)
+            # 2. Fetch balance, and the price only if there is something to size
+            if use_balance_percent > 0:
                 try:
-                    price_resp = requests.get(price_url, timeout=10)
-                    price_resp.raise_for_status()
-                    price = float(price_resp.json()['price'])
-                    notional = usdt_balance * use_balance_percent / 100
-                    quantity = round(notional / price, 6)  # 6 decimals for futures
+                    usdt_balance = await _timed(timings, 'balance', _get_futures_usdt_balance_async, client)
                 except Exception as e:
-                    print(f"Price fetch error: {e}")
-        if paper_trading:
-            print('[PAPER] Simulating futures trade:', signal['action'], symbol, 'qty:', quantity)
-            # Simulate stop-loss/take-profit
-            print(f"[PAPER] Would set stop-loss at {config.get('FUTURES_STOP_LOSS_PERCENT', 0)}% and take-profit at {config.get('FUTURES_TAKE_PROFIT_PERCENT', 0)}%.")
-            # Update stats as if trade was filled
-            realized_pnl = _get_today_realized_pnl(api_key, api_secret)
-            stats = _load_daily_stats()
-            stats['trades'] += 1
-            stats['realized_pnl'] = realized_pnl
-            _save_daily_stats(stats)
+                    balance_error = e
+                if usdt_balance > 0:
+                    try:
+                        price = await _timed(timings, 'price', _get_futures_price, symbol, client)
+                    except Exception as e:
+                        print(f"Price fetch error: {e}")
+        timings['pre_trade'] = round((time.perf_counter() - pre_trade_start) * 1000, 2)
+        if balance_error is not None:
+            # Sizing off an unknown balance would fall back to a fixed quantity; skip the trade instead
+            print(f"Futures balance error: {balance_error}")
+            await _risk_call(risk.release)
             return {
                 'symbol': symbol,
                 'side': side,
-                'market': 'FUTURES',
+                'market': signal.get('market', 'FUTURES'),
                 'confidence': signal.get('confidence', 0),
-                'reason': '[PAPER] Trade executed (simulated)',
-                'status': 'FILLED',
-                'response': {'paper': True, 'action': side, 'quantity': quantity},
+                'reason': f"{reason_prefix}Balance unavailable, trade not sized: {balance_error}",
+                'status': 'FAILED',
+                'response': None,
+                'timings': timings,
                 'timestamp': datetime.now().isoformat()
             }
+        # Size the position as FUTURES_USE_BALANCE_PERCENT of available USDT balance
+        if usdt_balance > 0 and price:
+            notional = usdt_balance * use_balance_percent / 100
+            quantity = notional / price
     
-    if paper_trading:
-        print('[PAPER] Simulating spot trade:', signal['action'], symbol, 'qty:', quantity)
+    # Quantize to the symbol's step size and reject locally instead of paying a round trip
+    exchange_info = get_exchange_info(config)
+    # A stale filter cache refreshes over blocking HTTP, so warm it off the loop
+    await asyncio.to_thread(exchange_info.get_symbol, order_market, symbol)
+    quantity = exchange_info.quantize_quantity(order_market, symbol, quantity)
+    rejection = exchange_info.validate_order(order_market, symbol, quantity, price)
+    if rejection:
+        if risk:
+            await _risk_call(risk.release)
         return {
             'symbol': symbol,
             'side': side,
-            'market': 'SPOT',
+            'market': signal.get('market', 'SPOT'),
             'confidence': signal.get('confidence', 0),
-            'reason': '[PAPER] Trade executed (simulated)',
-            'status': 'FILLED',
-            'response': {'paper': True, 'action': side, 'quantity': quantity},
+            'reason': f"{reason_prefix}Order rejected locally: {rejection}",
+            'status': 'FAILED',
+            'response': None,
+            'timings': timings,
             'timestamp': datetime.now().isoformat()
         }
     
+    if paper_trading:
+        print('[PAPER] Simulating', order_market.lower(), 'trade:', side, symbol, 'qty:', quantity)
+    
     params = {
         'symbol': symbol,
         'side': side,
         'type': 'MARKET',
-        'quantity': quantity,
-        'timestamp': int(time.time() * 1000)
+        'quantity': quantity
     }
-    
-    query_string = urlencode(params)
-    signature = _get_binance_signature(query_string, api_secret)
-    params['signature'] = signature
-    headers = {'X-MBX-APIKEY': api_key}
-    
+    if order_market == 'FUTURES':
+        # Without RESULT a futures order is acknowledged before its fill is known
+        params['newOrderRespType'] = 'RESULT'
+
+    trade_response = None
+    execution = None
+    protected = []
+    decision_price = signal.get('price')
     try:
-        response = requests.post(base_url + endpoint, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        trade_response = response.json()
+        if use_execution_algo(config, quantity, price or decision_price):
+            async def protect(entry_price):
+                # closePosition stops cover the position however far the algo grows it, so
+                # they go on after the first child fill, priced off that fill, not the final average
+                protected.append(entry_price)
+                await _protect_position(client, symbol, side, entry_price, config, exchange_info, timings, concurrent_orders)
+            # A sliced order runs to its own EXECUTION_DURATION; once children fill it must not be cut off
+            with no_budget():
+                execution = await _timed(
+                    timings, 'order', execute_parent_order,
+                    client, order_market, symbol, side, quantity, config, decision_price, exchange_info,
+                    protect if order_market == 'FUTURES' else None,
+                )
+            if not execution['filled_qty']:
+                raise RuntimeError(f"{execution['algo']} filled nothing" + (f" ({execution['stopped']})" if execution['stopped'] else ''))
+            # Stand-in for a single order's response, so protective orders and logging work unchanged
+            trade_response = {
+                'orderId': execution['last_order_id'],
+                'avgPrice': str(execution['avg_price']),
+                'executedQty': str(execution['filled_qty']),
+                'status': 'FILLED' if execution['filled_qty'] >= quantity else 'PARTIALLY_FILLED',
+            }
+        else:
+            trade_response = await _timed(timings, 'order', client_call, client, 'post', order_market, endpoint, params, True)
+            filled_qty, filled_quote = fill_of(trade_response)
+            if decision_price and filled_qty:
+                execution = fill_report('market', side, quantity, filled_qty, filled_quote, decision_price, last_order_id=trade_response.get('orderId'))
+        timings['signal_to_order'] = round((time.perf_counter() - started) * 1000, 2)
 
-        # --- Place stop-loss and take-profit for futures ---
-        if signal.get('market') == 'FUTURES' and trade_response.get('orderId'):
+        # --- Place stop-loss and take-profit for futures (a sliced order already did at its first fill) ---
+        if signal.get('market') == 'FUTURES' and trade_response.get('orderId') and not protected:
             # Get entry price
             entry_price = None
             # Try to get fill price from response
-            if 'avgFillPrice' in trade_response:
+            if float(trade_response.get('avgPrice', 0) or 0) > 0:
+                entry_price = float(trade_response['avgPrice'])
+            elif 'avgFillPrice' in trade_response:
                 entry_price = float(trade_response['avgFillPrice'])
             elif 'fills' in trade_response and len(trade_response['fills']) > 0:
                 entry_price = float(trade_response['fills'][0].get('price', 0))
@@ -274,103 +363,63 @@ def execute_trade(signal, config):
             # If not found, fetch latest price
             if not entry_price or entry_price == 0:
                 try:
-                    price_url = f"https://fapi.binance.com/fapi/v1/ticker/price?symbol={symbol}"
-                    price_resp = requests.get(price_url, timeout=10)
-                    price_resp.raise_for_status()
-                    entry_price = float(price_resp.json()['price'])
+                    with no_budget():
+                        entry_price = await _timed(timings, 'entry_price', _get_futures_price, symbol, client)
                 except Exception as e:
                     print(f"Entry price fetch error: {e}")
                     entry_price = None
             if entry_price:
-                stop_loss_percent = config.get('FUTURES_STOP_LOSS_PERCENT', 0)
-                take_profit_percent = config.get('FUTURES_TAKE_PROFIT_PERCENT', 0)
-                if stop_loss_percent > 0:
-                    if side == 'BUY':
-                        stop_price = round(entry_price * (1 - stop_loss_percent / 100), 2)
-                    else:
-                        stop_price = round(entry_price * (1 + stop_loss_percent / 100), 2)
-                    # Place stop-market order
-                    sl_params = {
-                        'symbol': symbol,
-                        'side': 'SELL' if side == 'BUY' else 'BUY',
-                        'type': 'STOP_MARKET',
-                        'stopPrice': stop_price,
-                        'closePosition': 'true',
-                        'timestamp': int(time.time() * 1000)
-                    }
-                    sl_query = urlencode(sl_params)
-                    sl_signature = _get_binance_signature(sl_query, api_secret)
-                    sl_params['signature'] = sl_signature
-                    try:
-                        sl_resp = requests.post('https://fapi.binance.com/fapi/v1/order', headers=headers, params=sl_params, timeout=10)
-                        sl_resp.raise_for_status()
-                        print(f"Stop-loss order placed at {stop_price}")
-                    except Exception as e:
-                        print(f"Stop-loss order error: {e}")
-                if take_profit_percent > 0:
-                    if side == 'BUY':
-                        tp_price = round(entry_price * (1 + take_profit_percent / 100), 2)
-                    else:
-                        tp_price = round(entry_price * (1 - take_profit_percent / 100), 2)
-                    # Place take-profit-market order
-                    tp_params = {
-                        'symbol': symbol,
-                        'side': 'SELL' if side == 'BUY' else 'BUY',
-                        'type': 'TAKE_PROFIT_MARKET',
-                        'stopPrice': tp_price,
-                        'closePosition': 'true',
-                        'timestamp': int(time.time() * 1000)
-                    }
-                    tp_query = urlencode(tp_params)
-                    tp_signature = _get_binance_signature(tp_query, api_secret)
-                    tp_params['signature'] = tp_signature
-                    try:
-                        tp_resp = requests.post('https://fapi.binance.com/fapi/v1/order', headers=headers, params=tp_params, timeout=10)
-                        tp_resp.raise_for_status()
-                        print(f"Take-profit order placed at {tp_price}")
-                    except Exception as e:
-                        print(f"Take-profit order error: {e}")
+                await _protect_position(client, symbol, side, entry_price, config, exchange_info, timings, concurrent_orders)
 
-        # After a successful trade, update stats with actual realized PnL
-        if signal.get('market') == 'FUTURES':
-            realized_pnl = _get_today_realized_pnl(api_key, api_secret)
-            stats = _load_daily_stats()
-            stats['trades'] += 1
-            stats['realized_pnl'] = realized_pnl
-            _save_daily_stats(stats)
+        # Realized PnL arrives on the user-data stream; without one, reconcile off the order path
+        if risk and get_user_data_stream('FUTURES', client) is None:
+            _executor.submit(_reconcile_realized_pnl, client, risk)
 
-        return {
+        reason = reason_prefix + signal.get('reason', 'Trade executed successfully')
+        if execution and execution['filled_qty'] < quantity:
+            reason += f" (partial fill {execution['filled_qty']:g}/{quantity:g}{': ' + execution['stopped'] if execution['stopped'] else ''})"
+        result = {
             'symbol': symbol,
             'side': side,
             'market': signal.get('market', 'SPOT'),
             'confidence': signal.get('confidence', 0),
-            'reason': signal.get('reason', 'Trade executed successfully'),
+            'reason': reason,
             'status': 'FILLED',
             'response': trade_response,
+            'timings': timings,
             'timestamp': datetime.now().isoformat()
         }
-    except requests.exceptions.HTTPError as e:
-        error_msg = f"HTTP Error: {e.response.status_code} - {e.response.text}"
+        if execution:
+            result['execution'] = execution
+        return result
+    except HTTP_ERRORS as e:
+        error_msg = _http_error_message(e)
         print(f"Binance API error: {error_msg}")
+        if risk and trade_response is None:
+            await _risk_call(risk.release)
         return {
             'symbol': symbol,
             'side': side,
             'market': signal.get('market', 'SPOT'),
             'confidence': signal.get('confidence', 0),
-            'reason': f"Trade failed: {error_msg}",
+            'reason': f"{reason_prefix}Trade failed: {error_msg}",
             'status': 'FAILED',
             'response': None,
+            'timings': timings,
             'timestamp': datetime.now().isoformat()
         }
     except Exception as e:
         print(f"Binance API error: {e}")
+        if risk and trade_response is None:
+            await _risk_call(risk.release)
         return {
             'symbol': symbol,
             'side': side,
             'market': signal.get('market', 'SPOT'),
             'confidence': signal.get('confidence', 0),
-            'reason': f"Trade failed: {e}",
+            'reason': f"{reason_prefix}Trade failed: {e}",
             'status': 'FAILED',
             'response': None,
+            'timings': timings,
             'timestamp': datetime.now().isoformat()
         } 
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import time
+import hmac
+import hashlib
+import threading
+from urllib.parse import urlencode
+import aiohttp
+import requests
+import yarl
+from requests.adapters import HTTPAdapter
+from async_runtime import get_session, raise_for_status
+from rate_limiter import get_rate_limiter, request_cost
+from resilience import get_service
+
+SPOT_BASE_URL = 'https://api.binance.com'
+FUTURES_BASE_URL = 'https://fapi.binance.com'
+
+POOL_SIZE = 20
+DEFAULT_TIMEOUT = 10
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_clients = {}
+_clients_lock = threading.Lock()
+
+def _get_binance_signature(query_string, secret):
+    """Generate Binance API signature"""
+    return hmac.new(secret.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def _get_session(base_url):
+    """Return the keep-alive session for a base host, creating it on first use"""
+    session = _sessions.get(base_url)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[base_url] = session
+        return session
+
+class BinanceClient:
+    """Signed Binance REST client sharing one pooled session per base host.
+
+    Every request goes through the market's process-wide rate limiter first
+    (orders against this API key's own order counts) and the market's
+    resilience guard (retries, hedging, circuit breaker) around it.
+    get_async()/post_async() do the same over aiohttp for the async pipeline.
+    """
+
+    def __init__(self, api_key=None, api_secret=None, timeout=DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.timeout = timeout
+        # BINANCE_*_BASE_URL point the bot at a local stand-in such as mock_binance.py
+        self.base_urls = {
+            'SPOT': os.getenv('BINANCE_SPOT_BASE_URL') or SPOT_BASE_URL,
+            'FUTURES': os.getenv('BINANCE_FUTURES_BASE_URL') or FUTURES_BASE_URL,
+        }
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+
+    def _record_latency(self, key, elapsed, failed):
+        with self._latency_lock:
+            stats = self._latency.setdefault(key, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['last'] = elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            if failed:
+                stats['errors'] += 1
+
+    def request(self, method, market, path, params=None, signed=False, priority=None):
+        """Send a request to the SPOT or FUTURES host and return the decoded JSON.
+
+        priority ('order', 'normal' or 'low') defaults by endpoint: orders first,
+        balance and history reads last. GETs are retried on timeouts, 429 and 5xx
+        (and hedged when configured); orders are only retried when the connection
+        could not be opened. Raises requests.exceptions.HTTPError on non-2xx
+        responses, like raise_for_status(), rate_limiter.RateLimitExceeded when the
+        call is shed to stay under Binance's limits and resilience.CircuitOpenError
+        while the market's host keeps failing.
+        """
+        return get_service(f"binance-{market.lower()}").call(
+            self._send, method, market, path, params, signed, priority,
+            idempotent=method == 'GET', hedge=method == 'GET', timeout=self.timeout,
+        )
+
+    def _send(self, method, market, path, params, signed, priority, timeout):
+        weight, default_priority, order = request_cost(method, path)
+        limiter = get_rate_limiter(market)
+        limiter.acquire(weight, priority or default_priority, order, self.api_key)
+        base_url, params, headers = self._prepare(market, path, params, signed)
+        session = _get_session(base_url)
+        key = f"{method} {path}"
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = session.request(method, base_url + path, headers=headers, params=params, timeout=timeout)
+            limiter.update(response.headers, response.status_code, self.api_key)
+            response.raise_for_status()
+            failed = False
+            return response.json()
+        finally:
+            self._record_latency(key, time.perf_counter() - start, failed)
+
+    def _prepare(self, market, path, params, signed):
+        params = dict(params or {})
+        headers = {}
+        if signed:
+            params['timestamp'] = int(time.time() * 1000)
+            params['signature'] = _get_binance_signature(urlencode(params), self.api_secret)
+        if self.api_key:
+            headers['X-MBX-APIKEY'] = self.api_key
+        return self.base_urls[market], params, headers
+
+    async def request_async(self, method, market, path, params=None, signed=False, priority=None):
+        """request() on the shared event loop's aiohttp session; same limiter, guard and counters"""
+        return await get_service(f"binance-{market.lower()}").call_async(
+            self._send_async, method, market, path, params, signed, priority,
+            idempotent=method == 'GET', hedge=method == 'GET', timeout=self.timeout,
+        )
+
+    async def _send_async(self, method, market, path, params, signed, priority, timeout):
+        weight, default_priority, order = request_cost(method, path)
+        limiter = get_rate_limiter(market)
+        await limiter.acquire_async(weight, priority or default_priority, order, self.api_key)
+        base_url, params, headers = self._prepare(market, path, params, signed)
+        # The query is encoded once, exactly as it was signed
+        url = yarl.URL(f"{base_url}{path}?{urlencode(params)}" if params else base_url + path, encoded=True)
+        key = f"{method} {path}"
+        start = time.perf_counter()
+        failed = True
+        try:
+            async with get_session().request(method, url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                limiter.update(response.headers, response.status, self.api_key)
+                await raise_for_status(response)
+                data = await response.json(content_type=None)
+            failed = False
+            return data
+        finally:
+            self._record_latency(key, time.perf_counter() - start, failed)
+
+    async def get_async(self, market, path, params=None, signed=False, priority=None):
+        return await self.request_async('GET', market, path, params, signed, priority)
+
+    async def post_async(self, market, path, params=None, signed=False, priority=None):
+        return await self.request_async('POST', market, path, params, signed, priority)
+
+    async def delete_async(self, market, path, params=None, signed=False, priority=None):
+        return await self.request_async('DELETE', market, path, params, signed, priority)
+
+    def get(self, market, path, params=None, signed=False, priority=None):
+        return self.request('GET', market, path, params, signed, priority)
+
+    def post(self, market, path, params=None, signed=False, priority=None):
+        return self.request('POST', market, path, params, signed, priority)
+
+    def delete(self, market, path, params=None, signed=False, priority=None):
+        return self.request('DELETE', market, path, params, signed, priority)
+
+    def latency_stats(self):
+        """Per-endpoint latency counters in seconds, keyed by 'METHOD /path'"""
+        with self._latency_lock:
+            return {
+                key: dict(stats, avg=stats['total'] / stats['count'] if stats['count'] else 0.0)
+                for key, stats in self._latency.items()
+            }
+
+async def client_call(client, method, *args, **kwargs):
+    """await client.get_async()/post_async()/delete_async() on a BinanceClient; the in-memory paper exchange is called directly"""
+    func = getattr(client, f"{method}_async", None)
+    if func is None:
+        return getattr(client, method)(*args, **kwargs)
+    return await func(*args, **kwargs)
+
+def get_client(api_key=None, api_secret=None):
+    """Return the shared client for a key pair, so every caller reuses the same counters and pools"""
+    key = (api_key, api_secret)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = BinanceClient(api_key, api_secret)
+            _clients[key] = client
+        return client
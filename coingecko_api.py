@@ -1,18 +1,19 @@
-import requests
+import resilience
+from async_runtime import request_json, run_sync
 
-def fetch_top_coins(limit=5):
-    url = "https://api.coingecko.com/api/v3/coins/markets"
+COINGECKO_URL = "https://api.coingecko.com/api/v3"
+
+async def fetch_top_coins_async(limit=5):
+    url = f"{COINGECKO_URL}/coins/markets"
     params = {
         'vs_currency': 'usd',
         'order': 'market_cap_desc',
         'per_page': limit,
         'page': 1,
-        'sparkline': False
+        'sparkline': 'false'
     }
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = await resilience.call_async('coingecko', request_json, 'GET', url, params=params, hedge=True)
         return [
             {
                 'symbol': coin['symbol'].upper(),
@@ -22,6 +23,12 @@ def fetch_top_coins(limit=5):
                 'volume': coin['total_volume']
             } for coin in data
         ]
+    except (resilience.CircuitOpenError, resilience.DeadlineExceeded):
+        # Not "no data": the caller skips the tick and reports the guard, not an empty market
+        raise
     except Exception as e:
         print(f"CoinGecko API error: {e}")
-        return [] 
\ No newline at end of file
+        return []
+
+def fetch_top_coins(limit=5):
+    return run_sync(fetch_top_coins_async(limit))
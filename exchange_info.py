@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from binance_client import get_client
+
+EXCHANGE_INFO_FILE = 'exchange_info_cache.json'
+EXCHANGE_INFO_TTL = 3600  # 1 hour
+
+_ENDPOINTS = {
+    'SPOT': '/api/v3/exchangeInfo',
+    'FUTURES': '/fapi/v1/exchangeInfo',
+}
+
+def _index_symbols(data):
+    """Reduce an exchangeInfo payload to {symbol: filters} with only what order checks need"""
+    symbols = {}
+    for item in data.get('symbols', []):
+        filters = {f['filterType']: f for f in item.get('filters', [])}
+        lot = filters.get('LOT_SIZE', {})
+        market_lot = filters.get('MARKET_LOT_SIZE', {})
+        price = filters.get('PRICE_FILTER', {})
+        notional = filters.get('MIN_NOTIONAL') or filters.get('NOTIONAL') or {}
+        step_size = lot.get('stepSize', '0')
+        # Market orders are bound by MARKET_LOT_SIZE when it is set
+        if Decimal(market_lot.get('stepSize', '0')) > Decimal(step_size):
+            step_size = market_lot['stepSize']
+        symbols[item['symbol']] = {
+            'status': item.get('status'),
+            'step_size': step_size,
+            'min_qty': lot.get('minQty', '0'),
+            'tick_size': price.get('tickSize', '0'),
+            'min_notional': notional.get('minNotional') or notional.get('notional') or '0',
+        }
+    return symbols
+
+class ExchangeInfoCache:
+    """Symbol filters for SPOT and FUTURES, kept on disk for warm starts and refreshed on a TTL.
+
+    An offline cache only serves the snapshot on disk and never downloads, so
+    paper trading does not wait on Binance in the order path.
+    """
+
+    def __init__(self, cache_file=EXCHANGE_INFO_FILE, ttl=EXCHANGE_INFO_TTL, client=None, offline=False):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.client = client
+        self.offline = offline
+        self.symbols = {'SPOT': {}, 'FUTURES': {}}
+        self.loaded_at = {'SPOT': 0.0, 'FUTURES': 0.0}
+        self._retry_at = {'SPOT': 0.0, 'FUTURES': 0.0}
+        self._lock = threading.Lock()
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                snapshot = json.load(f)
+            for market in self.symbols:
+                if market in snapshot.get('symbols', {}):
+                    self.symbols[market] = snapshot['symbols'][market]
+                    self.loaded_at[market] = snapshot.get('loaded_at', {}).get(market, 0.0)
+        except Exception as e:
+            print(f"Exchange info snapshot error: {e}")
+
+    def _save_snapshot(self):
+        tmp_file = self.cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'symbols': self.symbols, 'loaded_at': self.loaded_at}, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Exchange info save error: {e}")
+
+    def refresh(self, market):
+        """Download exchangeInfo for one market and persist the snapshot, return True on success"""
+        client = self.client or get_client()
+        try:
+            data = client.get(market, _ENDPOINTS[market])
+        except Exception as e:
+            print(f"Exchange info fetch error ({market}): {e}")
+            # Keep serving the stale snapshot and back off instead of retrying on every order
+            self._retry_at[market] = time.time() + 60
+            return False
+        with self._lock:
+            self.symbols[market] = _index_symbols(data)
+            self.loaded_at[market] = time.time()
+            self._save_snapshot()
+        return True
+
+    def get_symbol(self, market, symbol):
+        """Return the filters for a symbol, refreshing the market first if the cache is stale"""
+        now = time.time()
+        if not self.offline and now - self.loaded_at[market] > self.ttl and now >= self._retry_at[market]:
+            self.refresh(market)
+        return self.symbols[market].get(symbol)
+
+    def quantize_quantity(self, market, symbol, quantity):
+        """Round a quantity down to the symbol's step size"""
+        info = self.get_symbol(market, symbol)
+        if not info or Decimal(info['step_size']) <= 0:
+            return round(quantity, 6)
+        step = Decimal(info['step_size'])
+        steps = (Decimal(str(quantity)) / step).to_integral_value(rounding=ROUND_DOWN)
+        return float(steps * step)
+
+    def quantize_price(self, market, symbol, price):
+        """Round a price to the nearest tick size"""
+        info = self.get_symbol(market, symbol)
+        if not info or Decimal(info['tick_size']) <= 0:
+            return round(price, 2)
+        tick = Decimal(info['tick_size'])
+        ticks = (Decimal(str(price)) / tick).to_integral_value(rounding=ROUND_HALF_UP)
+        return float(ticks * tick)
+
+    def validate_order(self, market, symbol, quantity, price=None):
+        """Return a rejection reason if the order would fail the symbol filters, else None"""
+        info = self.get_symbol(market, symbol)
+        if not info:
+            return None
+        if info.get('status') not in (None, 'TRADING'):
+            return f"{symbol} is not trading (status {info['status']})"
+        if quantity <= 0 or Decimal(str(quantity)) < Decimal(info['min_qty']):
+            return f"Quantity {quantity} below minimum {info['min_qty']} for {symbol}"
+        if price and Decimal(str(quantity)) * Decimal(str(price)) < Decimal(info['min_notional']):
+            return f"Notional below minimum {info['min_notional']} for {symbol}"
+        return None
+
+_cache = None
+_paper_cache = None
+_cache_lock = threading.Lock()
+
+def get_exchange_info(config=None):
+    """Return the process-wide exchange-info cache; with PAPER_TRADING=1 an offline one over the same snapshot"""
+    global _cache, _paper_cache
+    if config and config.get('PAPER_TRADING') == 1:
+        if _paper_cache is None:
+            with _cache_lock:
+                if _paper_cache is None:
+                    _paper_cache = ExchangeInfoCache(offline=True)
+        return _paper_cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExchangeInfoCache()
+    return _cache
@@ -0,0 +1,285 @@
+import asyncio
+import time
+from binance_client import client_call
+from exchange_info import get_exchange_info
+from market_data_stream import get_active_stream
+
+# 'market' sends the parent as one order; the others slice it into child orders
+ALGOS = ('market', 'twap', 'iceberg', 'limit_chase')
+
+ORDER_PATHS = {'SPOT': '/api/v3/order', 'FUTURES': '/fapi/v1/order'}
+BOOK_TICKER_PATHS = {'SPOT': '/api/v3/ticker/bookTicker', 'FUTURES': '/fapi/v1/ticker/bookTicker'}
+FINAL_STATUSES = {'FILLED', 'CANCELED', 'EXPIRED', 'REJECTED'}
+
+BOOK_MAX_AGE = 2  # seconds a streamed top of book is trusted before asking REST
+
+async def get_book(client, market, symbol, max_age=BOOK_MAX_AGE):
+    """Best bid/ask as {'bid', 'bid_qty', 'ask', 'ask_qty'}: the streamed book when fresh and of this market, else one bookTicker call"""
+    stream = get_active_stream()
+    # Spot and futures books differ; the stream only carries one market's
+    book = stream.get_book(symbol) if stream is not None and stream.market == market else None
+    if book is not None and time.time() - book['received_at'] <= max_age:
+        return book
+    data = await client_call(client, 'get', market, BOOK_TICKER_PATHS[market], {'symbol': symbol})
+    return {'bid': float(data['bidPrice']), 'bid_qty': float(data['bidQty']), 'ask': float(data['askPrice']), 'ask_qty': float(data['askQty'])}
+
+def fill_of(response):
+    """(executed quantity, quote amount) of a spot or futures order response or query"""
+    quantity = float(response.get('executedQty') or 0)
+    quote = float(response.get('cumQuote') or response.get('cummulativeQuoteQty') or 0)
+    if not quote and quantity:
+        quote = quantity * float(response.get('avgPrice') or 0)
+    return quantity, quote
+
+def shortfall(side, decision_price, avg_price, quantity):
+    """Implementation shortfall of a fill against the decision price as (bps, quote amount); positive is a cost"""
+    if not decision_price or not avg_price or not quantity:
+        return None, None
+    direction = 1 if side == 'BUY' else -1
+    return round(direction * (avg_price - decision_price) / decision_price * 10000, 2), round(direction * (avg_price - decision_price) * quantity, 6)
+
+def fill_report(algo, side, requested_qty, filled_qty, filled_quote, decision_price, arrival_price=None, children=1, duration_ms=None, stopped=None, last_order_id=None):
+    """Average price and implementation shortfall of a parent order, stored with the trade result"""
+    avg_price = filled_quote / filled_qty if filled_qty else None
+    bps, cost = shortfall(side, decision_price or arrival_price, avg_price, filled_qty)
+    return {
+        'algo': algo,
+        'requested_qty': requested_qty,
+        'filled_qty': filled_qty,
+        'avg_price': avg_price,
+        'decision_price': decision_price,
+        'arrival_price': arrival_price,
+        'shortfall_bps': bps,
+        'shortfall_quote': cost,
+        'children': children,
+        'duration_ms': duration_ms,
+        'stopped': stopped,
+        'last_order_id': last_order_id,
+    }
+
+class ExecutionAlgo:
+    """Works one parent order as child orders on a timer and tracks their fills.
+
+    'twap' sends `slices` MARKET children spread over `duration`, each capped at
+    what the touch shows (the rest rolls into later slices, the last one takes
+    everything left). 'iceberg' rests LIMIT clips of visible_percent of the
+    parent at the touch and 'limit_chase' rests the whole remainder there; both
+    re-price when the touch moves and send what is left at market once
+    `duration` runs out. Every algo stops early, leaving the rest unfilled,
+    when the touch moves more than max_slippage_bps against the decision price.
+
+    on_fill(avg_price), if given, is awaited once right after the first child
+    fills, so the caller can protect the open part of the position (e.g. with
+    closePosition stops, which cover whatever size it grows to) instead of
+    leaving it unprotected for the rest of `duration`.
+    """
+
+    def __init__(self, client, market, symbol, side, quantity, algo='twap', decision_price=None, exchange_info=None,
+                 duration=30, slices=5, poll_interval=1.0, visible_percent=20, max_slippage_bps=0, on_fill=None):
+        if algo not in ALGOS or algo == 'market':
+            raise ValueError(f"Unknown execution algo {algo!r}, expected twap, iceberg or limit_chase")
+        self.client = client
+        self.market = market
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.algo = algo
+        self.decision_price = decision_price
+        self.exchange_info = exchange_info or get_exchange_info()
+        self.duration = duration
+        self.slices = max(1, slices)
+        self.poll_interval = poll_interval
+        self.visible_percent = visible_percent
+        self.max_slippage_bps = max_slippage_bps
+        self.on_fill = on_fill
+        self.filled_qty = 0.0
+        self.filled_quote = 0.0
+        self.children = []
+        self.arrival_price = None
+        self.stopped = None
+        self._started = None
+        self._first_fill_seen = False
+
+    def _quantize(self, quantity):
+        return self.exchange_info.quantize_quantity(self.market, self.symbol, quantity)
+
+    def remaining(self):
+        return self._quantize(self.quantity - self.filled_qty)
+
+    def _sendable(self, quantity, price):
+        return quantity > 0 and self.exchange_info.validate_order(self.market, self.symbol, quantity, price) is None
+
+    def _touch(self, book):
+        """Price paid by crossing the spread right now"""
+        return book['ask'] if self.side == 'BUY' else book['bid']
+
+    def _too_far(self, book):
+        if self.max_slippage_bps <= 0:
+            return False
+        reference = self.decision_price or self.arrival_price
+        adverse = (1 if self.side == 'BUY' else -1) * (self._touch(book) - reference) / reference * 10000
+        if adverse > self.max_slippage_bps:
+            self.stopped = f"price moved {adverse:.0f} bps against the decision price"
+            return True
+        return False
+
+    def _record(self, response, previous=(0.0, 0.0)):
+        """Add a child's fills since the previous (quantity, quote) snapshot, return the new snapshot"""
+        quantity, quote = fill_of(response)
+        self.filled_qty += quantity - previous[0]
+        self.filled_quote += quote - previous[1]
+        return quantity, quote
+
+    async def _after_fill(self):
+        """Call on_fill once, as soon as anything has filled"""
+        if self.on_fill is not None and self.filled_qty > 0 and not self._first_fill_seen:
+            self._first_fill_seen = True
+            await self.on_fill(self.filled_quote / self.filled_qty)
+
+    async def _send(self, method, params):
+        return await client_call(self.client, method, self.market, ORDER_PATHS[self.market], dict(params, symbol=self.symbol), signed=True)
+
+    async def _market(self, quantity):
+        params = {'side': self.side, 'type': 'MARKET', 'quantity': quantity}
+        if self.market == 'FUTURES':
+            # Futures orders only report their fill with RESULT
+            params['newOrderRespType'] = 'RESULT'
+        response = await self._send('post', params)
+        self.children.append(response.get('orderId'))
+        self._record(response)
+        await self._after_fill()
+
+    async def _limit(self, quantity, price):
+        """Rest a GTC child at price; returns its tracking dict, or None if it filled straight away"""
+        params = {'side': self.side, 'type': 'LIMIT', 'timeInForce': 'GTC', 'quantity': quantity, 'price': price}
+        if self.market == 'FUTURES':
+            params['newOrderRespType'] = 'RESULT'
+        response = await self._send('post', params)
+        self.children.append(response.get('orderId'))
+        order = {'orderId': response['orderId'], 'price': price, 'done': self._record(response)}
+        await self._after_fill()
+        return None if response.get('status') in FINAL_STATUSES else order
+
+    async def _cancel(self, order):
+        """Pull a resting child and record its fills; raises unless it is known to be no longer working"""
+        try:
+            response = await self._send('delete', {'orderId': order['orderId']})
+        except Exception:
+            # Most likely filled in the meantime; its final state is one query away
+            response = await self._send('get', {'orderId': order['orderId']})
+        order['done'] = self._record(response, order['done'])
+        await self._after_fill()
+        if response.get('status') not in FINAL_STATUSES:
+            raise RuntimeError(f"order {order['orderId']} is still {response.get('status')}")
+
+    async def _twap(self):
+        interval = self.duration / self.slices
+        for index in range(self.slices):
+            remaining = self.remaining()
+            if remaining <= 0:
+                return
+            book = await get_book(self.client, self.market, self.symbol)
+            if self._too_far(book):
+                return
+            last = index == self.slices - 1
+            price = self._touch(book)
+            target = remaining if last else self._quantize(remaining / (self.slices - index))
+            if not self._sendable(target, price):
+                # Slices below the symbol's minimum are merged into one
+                target = remaining
+            # Take no more than the touch shows; the rest rolls into later slices
+            quantity = target if last else self._quantize(min(target, book['ask_qty'] if self.side == 'BUY' else book['bid_qty']))
+            if self._sendable(quantity, price):
+                await self._market(quantity)
+            if not last:
+                await asyncio.sleep(interval)
+
+    async def _passive(self, clip):
+        deadline = time.monotonic() + self.duration
+        order = None
+        book = None
+        try:
+            while True:
+                if order is not None:
+                    response = await self._send('get', {'orderId': order['orderId']})
+                    order['done'] = self._record(response, order['done'])
+                    await self._after_fill()
+                    if response.get('status') in FINAL_STATUSES:
+                        order = None
+                if (order is None and self.remaining() <= 0) or time.monotonic() >= deadline:
+                    break
+                book = await get_book(self.client, self.market, self.symbol)
+                if self._too_far(book):
+                    break
+                # Join the best price on our own side of the book
+                price = self.exchange_info.quantize_price(self.market, self.symbol, book['bid'] if self.side == 'BUY' else book['ask'])
+                if order is not None and order['price'] != price:
+                    # The touch moved: pull the child and re-post it there
+                    await self._cancel(order)
+                    order = None
+                if order is None:
+                    remaining = self.remaining()
+                    quantity = min(self._quantize(clip), remaining)
+                    if not self._sendable(quantity, price):
+                        quantity = remaining
+                    if not self._sendable(quantity, price):
+                        break
+                    order = await self._limit(quantity, price)
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if order is not None:
+                try:
+                    await self._cancel(order)
+                except Exception as e:
+                    # The child may still be live: sending the rest at market too could overfill the parent
+                    print(f"Execution {self.algo}: could not cancel order {order['orderId']} for {self.symbol}: {e}")
+                    self.stopped = f"could not confirm cancel of order {order['orderId']}: {e}"
+        remaining = self.remaining()
+        if remaining > 0 and self.stopped is None:
+            price = self._touch(book) if book else None
+            if self._sendable(remaining, price):
+                await self._market(remaining)
+
+    async def run(self):
+        """Work the parent order and return report(); raises only when nothing could be filled"""
+        self._started = time.perf_counter()
+        try:
+            book = await get_book(self.client, self.market, self.symbol)
+            self.arrival_price = (book['bid'] + book['ask']) / 2
+            if not self._too_far(book):
+                if self.algo == 'twap':
+                    await self._twap()
+                else:
+                    clip = self.quantity if self.algo == 'limit_chase' else self.quantity * self.visible_percent / 100
+                    await self._passive(clip)
+        except Exception as e:
+            if not self.filled_qty:
+                raise
+            # Part of the position is open: report it rather than fail the whole trade
+            print(f"Execution {self.algo} for {self.symbol} stopped early: {e}")
+            self.stopped = f"error: {e}"
+        return self.report()
+
+    def report(self):
+        return fill_report(
+            self.algo, self.side, self.quantity, self.filled_qty, self.filled_quote, self.decision_price, self.arrival_price,
+            len(self.children), round((time.perf_counter() - self._started) * 1000, 2) if self._started else None,
+            self.stopped, self.children[-1] if self.children else None,
+        )
+
+def use_execution_algo(config, quantity, price):
+    """True when EXECUTION_ALGO asks for slicing and the order's notional reaches EXECUTION_MIN_NOTIONAL"""
+    return config.get('EXECUTION_ALGO', 'market') != 'market' and bool(price) and quantity * price >= config.get('EXECUTION_MIN_NOTIONAL', 0)
+
+async def execute_parent_order(client, market, symbol, side, quantity, config, decision_price=None, exchange_info=None, on_fill=None):
+    """Run the configured EXECUTION_ALGO for one parent order and return its fill report"""
+    algo = ExecutionAlgo(
+        client, market, symbol, side, quantity, config.get('EXECUTION_ALGO', 'twap'), decision_price, exchange_info,
+        duration=config.get('EXECUTION_DURATION', 30),
+        slices=config.get('EXECUTION_SLICES', 5),
+        poll_interval=config.get('EXECUTION_POLL_SECONDS', 1),
+        visible_percent=config.get('ICEBERG_VISIBLE_PERCENT', 20),
+        max_slippage_bps=config.get('EXECUTION_MAX_SLIPPAGE_BPS', 0),
+        on_fill=on_fill,
+    )
+    return await algo.run()
@@ -1,29 +1,73 @@
-import requests
 import json
 import time
+import aiohttp
+import resilience
+from async_runtime import HTTPStatusError, get_session, raise_for_status, request_json, run_sync
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash"
+
+def _validate_signal(result):
+    """Check required fields and clamp action/market/confidence to allowed values"""
+    # Validate required fields
+    required_fields = ['action', 'market', 'symbol', 'confidence', 'reason']
+    for field in required_fields:
+        if field not in result:
+            raise ValueError(f"Missing required field: {field}")
+    
+    # Validate action
+    if result['action'] not in ['BUY', 'SELL', 'HOLD']:
+        result['action'] = 'HOLD'
+        result['reason'] = f"Invalid action corrected to HOLD. Original: {result.get('reason', 'Unknown')}"
+    
+    # Validate market
+    if result['market'] not in ['SPOT', 'FUTURES']:
+        result['market'] = 'SPOT'
+    
+    # Validate confidence
+    try:
+        result['confidence'] = max(0, min(100, int(result['confidence'])))
+    except (ValueError, TypeError):
+        result['confidence'] = 0
+    
+    return result
+
+async def _open_stream(url, payload, timeout):
+    response = await get_session().post(url, headers={"Content-Type": "application/json"}, json=payload, timeout=aiohttp.ClientTimeout(total=timeout))
+    try:
+        await raise_for_status(response)
+    except Exception:
+        response.release()
+        raise
+    return response
+
+def _error_signal(market_data, reason):
+    """HOLD for a call that produced no model decision; 'error' and 'symbols' let the rule engine step in for the coins asked about"""
+    symbols = [f"{coin['symbol'].upper()}USDT" for coin in market_data or []]
+    signal = {"action": "HOLD", "market": "SPOT", "symbol": symbols[0] if symbols else "BTCUSDT", "confidence": 0, "reason": reason, "error": True}
+    if len(symbols) > 1:
+        signal["symbols"] = symbols
+    return signal
 
 def get_trade_signal(market_data, gemini_api_key):
     """Get trade signal from Gemini 2.0 Flash AI based on market data"""
+    return run_sync(get_trade_signal_async(market_data, gemini_api_key))
+
+async def get_trade_signal_async(market_data, gemini_api_key):
+    """Async get_trade_signal() for the asyncio pipeline"""
     if not gemini_api_key:
-        return {
-            "action": "HOLD", 
-            "market": "SPOT", 
-            "symbol": "BTCUSDT", 
-            "confidence": 0, 
-            "reason": "Gemini API key not configured"
-        }
+        return _error_signal(market_data, "Gemini API key not configured")
     
     try:
         # Use Gemini 2.0 Flash API endpoint
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={gemini_api_key}"
+        url = f"{GEMINI_URL}:generateContent?key={gemini_api_key}"
         headers = {"Content-Type": "application/json"}
         
         # Create prompt
         prompt = f"""
         You are a crypto trading AI assistant. Analyze the following crypto market data and provide a trading recommendation.
         
-        Market Data:
-        {json.dumps(market_data, indent=2)}
+        Market Data (CSV):
+        {encode_market_data(market_data)}
         
         Respond with ONLY a valid JSON object containing these exact fields:
         - action: "BUY", "SELL", or "HOLD"
@@ -54,10 +98,8 @@ def get_trade_signal(market_data, gemini_api_key):
             }
         }
         
-        # Make API request
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        result = response.json()
+        # Make API request (retried on timeouts, 429 and 5xx within the stage budget)
+        result = await resilience.call_async('gemini', request_json, 'POST', url, headers=headers, json=payload)
         
         # Extract the model's text response
         if 'candidates' in result and len(result['candidates']) > 0:
@@ -74,57 +116,156 @@ def get_trade_signal(market_data, gemini_api_key):
             if response_text.endswith('```'):
                 response_text = response_text[:-3]
             
-            result = json.loads(response_text.strip())
-            
-            # Validate required fields
-            required_fields = ['action', 'market', 'symbol', 'confidence', 'reason']
-            for field in required_fields:
-                if field not in result:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Validate action
-            if result['action'] not in ['BUY', 'SELL', 'HOLD']:
-                result['action'] = 'HOLD'
-                result['reason'] = f"Invalid action corrected to HOLD. Original: {result.get('reason', 'Unknown')}"
-            
-            # Validate market
-            if result['market'] not in ['SPOT', 'FUTURES']:
-                result['market'] = 'SPOT'
-            
-            # Validate confidence
-            try:
-                result['confidence'] = max(0, min(100, int(result['confidence'])))
-            except (ValueError, TypeError):
-                result['confidence'] = 0
-            
-            return result
+            return _validate_signal(json.loads(response_text.strip()))
             
         except json.JSONDecodeError as e:
             print(f"Failed to parse Gemini response as JSON: {e}")
             print(f"Response text: {text}")
-            return {
-                "action": "HOLD",
-                "market": "SPOT", 
-                "symbol": "BTCUSDT",
-                "confidence": 0,
-                "reason": f"Failed to parse AI response: {e}"
-            }
+            return _error_signal(market_data, f"Failed to parse AI response: {e}")
             
-    except requests.exceptions.HTTPError as e:
-        print(f"Gemini API HTTP error: {e.response.status_code} - {e.response.text}")
-        return {
-            "action": "HOLD",
-            "market": "SPOT", 
-            "symbol": "BTCUSDT",
-            "confidence": 0,
-            "reason": f"API HTTP error: {e.response.status_code}"
+    except HTTPStatusError as e:
+        print(f"Gemini API HTTP error: {e.status} - {e.text}")
+        return _error_signal(market_data, f"API HTTP error: {e.status}")
+    except Exception as e:
+        print(f"Gemini API error: {e}")
+        return _error_signal(market_data, f"AI service error: {e}")
+
+def _compact_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value).replace(',', ' ')
+    return f"{value:.6g}"
+
+def encode_market_data(market_data):
+    """Encode the snapshot as a CSV table: one header row, one row per coin, compact numbers"""
+    if not market_data:
+        return ''
+    columns = []
+    for coin in market_data:
+        for key in coin:
+            if key not in columns:
+                columns.append(key)
+    rows = [','.join(columns)]
+    for coin in market_data:
+        rows.append(','.join(_compact_number(coin[key]) if coin.get(key) is not None else '' for key in columns))
+    return '\n'.join(rows)
+
+class JsonArrayStreamParser:
+    """Incremental parser for a JSON array of objects arriving in arbitrary text chunks.
+
+    feed() returns the objects completed by that chunk; text outside the array
+    (e.g. markdown fences) is ignored, but a malformed object raises ValueError.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+
+    def feed(self, chunk):
+        objects = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                continue
+            if self._depth > 0:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._buffer = ['{']
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        objects.append(json.loads(''.join(self._buffer)))
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Malformed object in model response: {e}")
+                    self._buffer = []
+            elif char == ']' and self._depth == 0:
+                self.done = True
+            elif self._depth == 0 and char not in ' \t\r\n,':
+                raise ValueError(f"Unexpected character {char!r} in model response array")
+        return objects
+
+def _hold_signal(symbol, reason):
+    """Batch stand-in for a coin the model gave no decision on"""
+    return {"action": "HOLD", "market": "SPOT", "symbol": symbol, "confidence": 0, "reason": reason, "error": True}
+
+def get_batch_trade_signals(market_data, gemini_api_key):
+    """Get one trade signal per coin from a single streamed Gemini call.
+
+    Returns a list with one signal per coin in market_data; coins the model
+    skipped or answered invalidly come back as HOLD.
+    """
+    return run_sync(get_batch_trade_signals_async(market_data, gemini_api_key))
+
+async def get_batch_trade_signals_async(market_data, gemini_api_key):
+    """Async get_batch_trade_signals() for the asyncio pipeline"""
+    symbols = [f"{coin['symbol'].upper()}USDT" for coin in market_data]
+    if not gemini_api_key:
+        return [_hold_signal(symbol, "Gemini API key not configured") for symbol in symbols]
+    
+    prompt = f"""You are a crypto trading AI assistant. Analyze this crypto market data (CSV) and decide for EVERY coin.
+
+{encode_market_data(market_data)}
+
+Respond with ONLY a JSON array, one object per coin, each with exactly these fields:
+action ("BUY", "SELL" or "HOLD"), market ("SPOT" or "FUTURES"), symbol (trading pair, coin symbol + "USDT", e.g. "BTCUSDT"), confidence (0-100), reason (at most 12 words).
+Be proactive: recommend BUY or SELL on any reasonable opportunity and prefer FUTURES for strong trends or shorting. Use HOLD only if there is truly no opportunity."""
+    
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.4,
+            "topK": 40,
+            "topP": 0.95,
+            "maxOutputTokens": 256 + 64 * len(market_data),
+            "responseMimeType": "application/json"
         }
+    }
+    
+    signals = {}
+    try:
+        url = f"{GEMINI_URL}:streamGenerateContent?alt=sse&key={gemini_api_key}"
+        parser = JsonArrayStreamParser()
+        # Only opening the stream is retried; decisions already parsed are never asked for twice
+        async with await resilience.call_async('gemini', _open_stream, url, payload, timeout=30) as response:
+            async for raw in response.content:
+                line = raw.decode().strip()
+                if not line or not line.startswith('data:'):
+                    continue
+                event = json.loads(line[5:])
+                for candidate in event.get('candidates', []):
+                    for part in candidate.get('content', {}).get('parts', []):
+                        for obj in parser.feed(part.get('text', '')):
+                            try:
+                                signal = _validate_signal(obj)
+                            except ValueError as e:
+                                print(f"Skipping invalid Gemini decision: {e}")
+                                continue
+                            signals[signal['symbol'].upper()] = signal
+                if parser.done:
+                    break
+    except HTTPStatusError as e:
+        print(f"Gemini API HTTP error: {e.status} - {e.text}")
+        return [_hold_signal(symbol, f"API HTTP error: {e.status}") for symbol in symbols]
     except Exception as e:
+        # Keep whatever decisions arrived before the stream broke
         print(f"Gemini API error: {e}")
-        return {
-            "action": "HOLD",
-            "market": "SPOT", 
-            "symbol": "BTCUSDT",
-            "confidence": 0,
-            "reason": f"AI service error: {e}"
-        } 
\ No newline at end of file
+    
+    return [signals.get(symbol) or _hold_signal(symbol, "No decision returned by model") for symbol in symbols]
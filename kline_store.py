@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local OHLCV store: one append-only binary file per column, memory-mapped for reads
+Usage:
+  python kline_store.py download BTCUSDT 1m 2024-01-01 [2024-02-01]
+  python kline_store.py import BTCUSDT 1m BTCUSDT-1m-2024-01.csv
+"""
+
+import os
+import sys
+import threading
+import time
+import numpy as np
+from binance_client import get_client
+from market_data_stream import INTERVAL_MS
+
+KLINE_STORE_DIR = 'klines'
+
+COLUMNS = {
+    'open_time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+
+_KLINE_PATHS = {'SPOT': '/api/v3/klines', 'FUTURES': '/fapi/v1/klines'}
+_KLINE_LIMITS = {'SPOT': 1000, 'FUTURES': 1500}
+
+def read_csv_klines(path):
+    """Parse a Binance kline CSV dump (open_time,open,high,low,close,volume,...) into column arrays"""
+    with open(path, 'r') as f:
+        first = f.readline()
+    skip = 0 if first[:1].isdigit() else 1
+    data = np.loadtxt(path, delimiter=',', usecols=range(6), skiprows=skip, dtype=np.float64, ndmin=2)
+    return {
+        'open_time': data[:, 0].astype(np.int64),
+        'open': data[:, 1], 'high': data[:, 2], 'low': data[:, 3],
+        'close': data[:, 4], 'volume': data[:, 5],
+    }
+
+class KlineStore:
+    """Columnar kline files under root/SYMBOL/interval/, sorted by open_time"""
+
+    def __init__(self, root=KLINE_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f"{column}.bin")
+
+    def _length(self, symbol, interval):
+        """Rows present in every column; a torn append leaves some columns longer"""
+        lengths = []
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, interval, column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // np.dtype(dtype).itemsize)
+        return min(lengths)
+
+    def _repair(self, symbol, interval):
+        rows = self._length(symbol, interval)
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, interval, column)
+            if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                with open(path, 'r+b') as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+        return rows
+
+    def read(self, symbol, interval):
+        """Zero-copy, read-only memory maps of every column"""
+        rows = self._length(symbol, interval)
+        columns = {}
+        for column, dtype in COLUMNS.items():
+            if rows == 0:
+                columns[column] = np.zeros(0, dtype=dtype)
+            else:
+                columns[column] = np.memmap(self._path(symbol, interval, column), dtype=dtype, mode='r', shape=(rows,))
+        return columns
+
+    def slice(self, symbol, interval, start_ms=None, end_ms=None):
+        """Bars with start_ms <= open_time < end_ms, found by binary search on the time column"""
+        columns = self.read(symbol, interval)
+        times = columns['open_time']
+        lo = 0 if start_ms is None else int(np.searchsorted(times, start_ms, side='left'))
+        hi = len(times) if end_ms is None else int(np.searchsorted(times, end_ms, side='left'))
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def tail(self, symbol, interval, n):
+        """The newest n bars"""
+        columns = self.read(symbol, interval)
+        return {column: values[-n:] for column, values in columns.items()}
+
+    def last_open_time(self, symbol, interval):
+        times = self.read(symbol, interval)['open_time']
+        return int(times[-1]) if len(times) else None
+
+    def append(self, symbol, interval, bars):
+        """Append bars (dict of column arrays, oldest first); bars not newer than the last stored one are dropped.
+
+        Returns the number of bars written.
+        """
+        with self._lock:
+            os.makedirs(self._dir(symbol, interval), exist_ok=True)
+            rows = self._repair(symbol, interval)
+            times = np.asarray(bars['open_time'], dtype=np.int64)
+            if rows:
+                last = self.read(symbol, interval)['open_time'][-1]
+                keep = times > last
+            else:
+                keep = np.ones(len(times), dtype=bool)
+            if not keep.any():
+                return 0
+            for column, dtype in COLUMNS.items():
+                values = np.asarray(bars[column], dtype=dtype)[keep]
+                with open(self._path(symbol, interval, column), 'ab') as f:
+                    f.write(values.astype(dtype).tobytes())
+            return int(keep.sum())
+
+    def import_csv(self, symbol, interval, path):
+        """Import a Binance CSV dump, returns bars written"""
+        bars = read_csv_klines(path)
+        order = np.argsort(bars['open_time'], kind='stable')
+        return self.append(symbol, interval, {column: values[order] for column, values in bars.items()})
+
+    def download(self, symbol, interval, start_ms, end_ms=None, market='FUTURES'):
+        """Bulk-download klines from Binance into the store, resuming after the last stored bar"""
+        end_ms = end_ms or int(time.time() * 1000)
+        last = self.last_open_time(symbol, interval)
+        cursor = max(start_ms, last + 1) if last is not None else start_ms
+        client = get_client()
+        written = 0
+        while cursor < end_ms:
+            rows = client.get(market, _KLINE_PATHS[market], {
+                'symbol': symbol.upper(), 'interval': interval,
+                'startTime': cursor, 'endTime': end_ms, 'limit': _KLINE_LIMITS[market],
+            })
+            if not rows:
+                break
+            now_ms = int(time.time() * 1000)
+            # The newest kline may still be open; only store closed ones
+            rows = [row for row in rows if row[6] < now_ms]
+            if not rows:
+                break
+            data = np.asarray([row[:6] for row in rows], dtype=np.float64)
+            written += self.append(symbol, interval, {
+                'open_time': data[:, 0].astype(np.int64),
+                'open': data[:, 1], 'high': data[:, 2], 'low': data[:, 3],
+                'close': data[:, 4], 'volume': data[:, 5],
+            })
+            cursor = int(data[-1, 0]) + 1
+        return written
+
+    def attach_stream(self, stream):
+        """Append every closed kline from a MarketDataStream as it arrives"""
+        interval = stream.kline_interval
+
+        def on_kline(symbol, bar):
+            self.append(symbol, interval, {column: [bar[column]] for column in COLUMNS})
+        stream.add_kline_listener(on_kline)
+
+    def is_fresh(self, symbol, interval, now_ms=None):
+        """True when the newest stored bar is the last fully closed one"""
+        last = self.last_open_time(symbol, interval)
+        step = INTERVAL_MS.get(interval)
+        if last is None or step is None:
+            return False
+        now_ms = now_ms or int(time.time() * 1000)
+        return last + 2 * step > now_ms
+
+_store = None
+
+def get_kline_store(root=KLINE_STORE_DIR):
+    """Return the process-wide store"""
+    global _store
+    if _store is None or _store.root != root:
+        _store = KlineStore(root)
+    return _store
+
+def main():
+    if len(sys.argv) < 5 or sys.argv[1] not in ('download', 'import'):
+        print(__doc__)
+        sys.exit(1)
+    command, symbol, interval = sys.argv[1], sys.argv[2].upper(), sys.argv[3]
+    store = get_kline_store()
+    start = time.perf_counter()
+    if command == 'import':
+        written = store.import_csv(symbol, interval, sys.argv[4])
+    else:
+        start_ms = int(np.datetime64(sys.argv[4], 'ms').astype(np.int64))
+        end_ms = int(np.datetime64(sys.argv[5], 'ms').astype(np.int64)) if len(sys.argv) > 5 else None
+        written = store.download(symbol, interval, start_ms, end_ms)
+    total = len(store.read(symbol, interval)['open_time'])
+    print(f"✅ {written} new bars for {symbol} {interval} ({total} stored) in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
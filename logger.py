@@ -1,11 +1,195 @@
+import atexit
+import gzip
 import json
+import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
 
-def log_trade(trade_result, log_file='trade_log.jsonl'):
+TRADE_LOG_FILE = 'trade_log.jsonl'
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+class TradeJournal:
+    """Append-only JSONL journal written by a background thread.
+
+    log() only enqueues, so the trading thread does not wait on the disk. The writer
+    drains the queue in batches, one write() per batch, fsyncs according to the
+    policy ('always' = every batch, 'interval' = at most every fsync_interval
+    seconds, 'never'), and rotates the file by size or age into gzip archives.
+    Each written batch is also handed to every sink(batch), e.g. TradeStore.insert_many.
+    """
+
+    def __init__(self, path=TRADE_LOG_FILE, max_queue=10000, batch_size=256, flush_interval=0.2,
+                 fsync='interval', fsync_interval=1.0, max_bytes=0, rotate_interval=0, compress=True, overflow_timeout=1.0, sinks=()):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.overflow_timeout = overflow_timeout
+        self.sinks = list(sinks)
+        self.stats = {'written': 0, 'batches': 0, 'overflows': 0, 'dropped': 0, 'rotations': 0, 'errors': 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._opened_at = 0.0
+        self._last_fsync = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='trade-journal')
+        self._thread.start()
+
+    def log(self, entry):
+        """Queue one record. Only waits (up to overflow_timeout) when the queue is full.
+
+        Returns False if the record was dropped.
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            pass
+        # A full queue means the disk is stalled; losing trade records is worse than a short wait
+        self.stats['overflows'] += 1
+        try:
+            self._queue.put(entry, timeout=self.overflow_timeout)
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            if self.stats['dropped'] == 1:
+                print(f"Trade journal queue full, dropping records (first: {entry.get('symbol')})")
+            return False
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a')
+        self._opened_at = time.time()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        archive = f"{os.path.splitext(self.path)[0]}.{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}.jsonl"
+        os.replace(self.path, archive)
+        if self.compress:
+            with open(archive, 'rb') as src, gzip.open(archive + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(archive)
+        self.stats['rotations'] += 1
+
+    def _needs_rotation(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval
+
+    def _write(self, batch):
+        if self._file is None:
+            self._open()
+        self._file.write(''.join(json.dumps(entry, default=str) + '\n' for entry in batch))
+        self._file.flush()
+        now = time.time()
+        if self.fsync == 'always' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+        self.stats['written'] += len(batch)
+        self.stats['batches'] += 1
+        if self._needs_rotation():
+            self._rotate()
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Trade journal sink error: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    break
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Logging error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def flush(self, timeout=5):
+        """Wait until every queued record has been written, return True if drained in time"""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if time.time() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout=5):
+        """Drain the queue, fsync and close the file; later log() calls are refused"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._thread.join(timeout)
+
+_journals = {}
+_journals_lock = threading.Lock()
+_journal_options = {}
+
+def configure_journal(**options):
+    """Set TradeJournal options (fsync, max_bytes, rotate_interval, ...) for journals opened from now on"""
+    if _journals:
+        print(f"⚠️  Journal options changed after {', '.join(_journals)} opened; they keep the old options")
+    _journal_options.update(options)
+
+def get_journal(path=TRADE_LOG_FILE):
+    """Return the process-wide journal for a file, starting its writer on first use"""
+    journal = _journals.get(path)
+    if journal is not None:
+        return journal
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = TradeJournal(path, **_journal_options)
+            _journals[path] = journal
+        return journal
+
+def close_journals(timeout=5):
+    """Flush and close every journal (also runs at interpreter exit)"""
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close(timeout)
+
+atexit.register(close_journals)
+
+def log_trade(trade_result, log_file=TRADE_LOG_FILE):
     entry = trade_result.copy()
     entry['timestamp'] = datetime.utcnow().isoformat()
-    try:
-        with open(log_file, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
-    except Exception as e:
-        print(f"Logging error: {e}") 
\ No newline at end of file
+    get_journal(log_file).log(entry)
@@ -1,18 +1,38 @@
-import time
+import asyncio
 import sys
 from datetime import datetime
-from coingecko_api import fetch_top_coins
-from gemini_strategy import get_trade_signal
-from binance_api import execute_trade
-from notifier import send_telegram_alert
-from logger import log_trade
+from coingecko_api import fetch_top_coins, fetch_top_coins_async
+from gemini_strategy import get_trade_signal, get_batch_trade_signals, get_trade_signal_async, get_batch_trade_signals_async
+from binance_api import execute_trade, execute_trade_async
+from execution_algos import ALGOS
+from notifier import send_telegram_alert, configure_alerts
+from logger import log_trade, configure_journal
+from trade_store import get_trade_store
 from utils import load_config
+from market_data_stream import FUTURES_STREAM_URL, start_market_data_stream, get_active_stream, apply_latest_prices
+from kline_store import get_kline_store
+from paper_exchange import get_paper_exchange
+from binance_client import get_client
+from rate_limiter import configure_rate_limits, rate_limit_usage
+from resilience import CircuitOpenError, DeadlineExceeded, configure_services, service_status, stage_budget
+from risk_state import DAILY_STATS_FILE, get_risk_state
+from user_data_stream import start_user_data_stream, closed_trade_record
+from account_state import track_account
+from scheduler import Scheduler, StageMetrics, PriceMoveTrigger
+from pipeline import evaluate_symbols, rank_signals, select_trades, attach_signal_prices, execute_signals, evaluate_symbols_async, execute_signals_async
+from async_runtime import run_sync
+from rule_engine import screen_market, apply_rule_fallback, rules_only_strategy
+from signal_cache import configure_signal_cache, get_cached_trade_signal, get_signal_cache
+from supervisor import AccountSupervisor, load_accounts
 
-SLEEP_INTERVAL = 600  # 10 minutes
+SLEEP_INTERVAL = 600  # 10 minutes, default SCHEDULE_INTERVAL
 
 def validate_config(config):
     """Validate that all required configuration is present"""
     required_keys = ['GEMINI_API_KEY', 'BINANCE_API_KEY', 'BINANCE_API_SECRET', 'TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID']
+    if config.get('PAPER_TRADING') == 1:
+        # Orders go to the local simulated exchange, no Binance account needed
+        required_keys = [key for key in required_keys if not key.startswith('BINANCE_')]
     missing_keys = [key for key in required_keys if not config.get(key)]
     
     if missing_keys:
@@ -20,6 +40,10 @@ def validate_config(config):
         print("Please check config_template.txt for setup instructions")
         return False
     
+    if config.get('EXECUTION_ALGO', 'market') not in ALGOS:
+        print(f"❌ Unknown EXECUTION_ALGO {config['EXECUTION_ALGO']!r}, expected one of: {', '.join(ALGOS)}")
+        return False
+    
     print("✅ Configuration validated successfully")
     return True
 
@@ -29,59 +53,371 @@ def main():
     
     # Load and validate configuration
     config = load_config()
-    if not validate_config(config):
+    accounts = None
+    if config.get('ACCOUNTS_FILE'):
+        try:
+            accounts = load_accounts(config['ACCOUNTS_FILE'], config)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not load accounts from {config['ACCOUNTS_FILE']}: {e}")
+            sys.exit(1)
+        print(f"👥 Running {len(accounts)} accounts: {', '.join(account['ACCOUNT_NAME'] for account in accounts)}")
+    if not all(validate_config(account) for account in accounts or [config]):
         print("❌ Configuration validation failed. Exiting.")
         sys.exit(1)
     
+    configure_rate_limits(safety=config.get('RATE_LIMIT_SAFETY', 0.9), max_wait=config.get('RATE_LIMIT_MAX_WAIT', 5))
+    configure_services(
+        attempts=config.get('RETRY_ATTEMPTS', 3),
+        hedge_after=config.get('HEDGE_AFTER_MS', 0) / 1000,
+        failure_threshold=config.get('CIRCUIT_FAILURE_THRESHOLD', 5),
+        reset_timeout=config.get('CIRCUIT_RESET_SECONDS', 30),
+    )
+    
+    # Before any stream starts: its listeners journal closed trades from the first fill
+    configure_journal(
+        fsync=config.get('TRADE_LOG_FSYNC', 'interval'),
+        max_bytes=int(config.get('TRADE_LOG_MAX_MB', 0) * 1024 * 1024),
+        rotate_interval=config.get('TRADE_LOG_ROTATE_HOURS', 0) * 3600,
+        # Mirror every logged trade into the indexed SQLite history
+        sinks=[get_trade_store(config['TRADE_DB']).insert_many] if config.get('TRADE_DB') else [],
+    )
+    
+    configure_alerts(
+        digest_threshold=config.get('TELEGRAM_DIGEST_THRESHOLD', 3),
+        coalesce_window=config.get('TELEGRAM_COALESCE_SECONDS', 1),
+        min_interval=config.get('TELEGRAM_MIN_INTERVAL', 1),
+        max_age=config.get('TELEGRAM_MAX_ALERT_AGE', 300),
+    )
+    
+    stream = None
+    if config.get('MARKET_DATA_STREAM') == 1:
+        print(f"📡 Streaming market data for {', '.join(config['MARKET_DATA_SYMBOLS'])}")
+        stream = start_market_data_stream(
+            config['MARKET_DATA_SYMBOLS'],
+            url=config.get('MARKET_DATA_STREAM_URL') or FUTURES_STREAM_URL,
+            kline_interval=config.get('RULE_KLINE_INTERVAL', '1m'),
+        )
+        if config.get('KLINE_STORE_DIR'):
+            print(f"💾 Recording closed klines to {config['KLINE_STORE_DIR']}/")
+            get_kline_store(config['KLINE_STORE_DIR']).attach_stream(stream)
+    
+    # The market stream, exchange-info cache and HTTP pools are shared; streams and risk state are per account
+    for account in accounts or [config]:
+        start_account(account, stream)
+    
+    if config.get('SIGNAL_CACHE_TTL', 0) > 0:
+        configure_signal_cache(config['SIGNAL_CACHE_TTL'], config.get('SIGNAL_CACHE_SIZE', 256), config.get('SIGNAL_CACHE_DIGITS', 3))
+    
+    metrics = StageMetrics()
     iteration = 0
-    while True:
+    supervisor = AccountSupervisor(accounts, run_iteration) if accounts else None
+
+    def job(trigger):
+        nonlocal iteration
         iteration += 1
-        print(f"\n🔄 Trading iteration #{iteration} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        if supervisor:
+            run_supervised_iteration(supervisor, config, metrics, iteration, trigger)
+        else:
+            run_iteration(config, metrics, iteration, trigger)
+        print(f"⏳ Next scheduled tick at {datetime.fromtimestamp(scheduler.next_tick()).strftime('%H:%M:%S')}")
+
+    scheduler = Scheduler(job, config.get('SCHEDULE_INTERVAL', SLEEP_INTERVAL), event_cooldown=config.get('EVENT_COOLDOWN', 30), metrics=metrics)
+    stream = get_active_stream()
+    if stream is not None and config.get('PRICE_MOVE_TRIGGER_PERCENT', 0) > 0:
+        print(f"⚡ Reacting to moves of {config['PRICE_MOVE_TRIGGER_PERCENT']}% between ticks")
+        stream.add_listener(PriceMoveTrigger(scheduler, config['PRICE_MOVE_TRIGGER_PERCENT']))
+
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Bot stopped by user")
+        print(f"📊 Scheduler: {scheduler.counters}")
+
+def account_label(config):
+    """' [name]' for messages from a supervised account, '' for the single-account bot"""
+    return f" [{config['ACCOUNT_NAME']}]" if config.get('ACCOUNT_NAME') else ''
+
+def start_account(config, stream=None):
+    """Feed one account's paper exchange from the shared market stream and follow its user-data streams"""
+    if stream is not None and config.get('PAPER_TRADING') == 1:
+        get_paper_exchange(config).attach_stream(stream)
+    
+    if config.get('USER_DATA_STREAM') == 1:
+        print(f"👤 Following fills, balances and positions on the user-data stream{account_label(config)}")
+        url = config.get('USER_DATA_STREAM_URL') or None
+        risk = get_risk_state(config.get('FUTURES_STATS_FILE') or DAILY_STATS_FILE, config.get('RISK_STATE_SHARED') == 1)
+        if config.get('PAPER_TRADING') == 1:
+            # The simulated exchange emits spot and futures events on one feed
+            client = get_paper_exchange(config)
+            futures_stream = start_user_data_stream(client, risk)
+            track_account(client, futures_stream, ('SPOT', 'FUTURES'))
+        else:
+            client = get_client(config['BINANCE_API_KEY'], config['BINANCE_API_SECRET'])
+            futures_stream = start_user_data_stream(client, risk, url)
+            track_account(client, futures_stream)
+            track_account(client, start_user_data_stream(client, url=url, market='SPOT'))
+        futures_stream.add_listener(lambda event: log_closed_trade(event, config))
+    elif config.get('PAPER_TRADING') == 1:
+        # No stream to follow, but paper fills that realize PnL are still journaled
+        get_paper_exchange(config).add_event_listener(lambda event: log_closed_trade(event, config))
+
+def log_closed_trade(event, config):
+    """Journal a fill that realized PnL (SL/TP or a reducing order) so trade history reports carry it"""
+    record = closed_trade_record(event)
+    if record is None:
+        return
+    if config.get('ACCOUNT_NAME'):
+        record['account'] = config['ACCOUNT_NAME']
+    log_trade(record)
+
+def report_trade(trade_result, config, metrics):
+    """Log a trade result and queue its Telegram alert"""
+    if config.get('ACCOUNT_NAME'):
+        trade_result['account'] = config['ACCOUNT_NAME']
+    print(f"📋 Trade status{account_label(config)}: {trade_result['symbol']} {trade_result['status']}")
+    
+    # 4. Log trade
+    with metrics.time('logging'):
+        log_trade(trade_result)
+    print("📝 Trade logged")
+    
+    # 5. Send Telegram alert
+    if config.get('TELEGRAM_BOT_TOKEN') and config.get('TELEGRAM_CHAT_ID'):
+        with metrics.time('alert'):
+            queued = send_telegram_alert(trade_result, config['TELEGRAM_BOT_TOKEN'], config['TELEGRAM_CHAT_ID'])
+        print("📱 Telegram alert queued" if queued else "⚠️  Telegram alert not queued")
+    else:
+        print("⚠️  Telegram not configured, skipping alert")
+
+def run_supervised_iteration(supervisor, config, metrics, iteration, trigger='tick'):
+    """Fetch market data once and run every account's iteration on it side by side"""
+    print(f"\n🔄 Trading iteration #{iteration} ({trigger}) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    try:
+        print("📊 Fetching market data...")
+        with metrics.time('market_data'), stage_budget(config.get('MARKET_DATA_BUDGET', 0)):
+            market_data = fetch_top_coins(supervisor.market_data_limit())
+        if not market_data:
+            print("⚠️  No market data received, skipping iteration")
+            return
         
-        try:
+        apply_latest_prices(market_data)
+        print(f"✅ Fetched data for {len(market_data)} coins, shared by {len(supervisor.accounts)} accounts")
+        
+        with metrics.time('accounts'):
+            elapsed = supervisor.run_tick(market_data, iteration, trigger)
+        print(f"👥 Accounts done: {', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in elapsed.items())}")
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        print(f"🔌 Skipping iteration #{iteration}: {e}")
+    except Exception as e:
+        print(f"❌ Error in iteration #{iteration}: {e}")
+        print("🔄 Continuing to next iteration...")
+    finally:
+        print_service_health(config)
+
+def print_service_health(config):
+    """Process-wide rate-limit, circuit and cache status after an iteration"""
+    for market, usage in rate_limit_usage().items():
+        print(f"🚦 {market} weight {usage['weight_used']:.0f}/{usage['weight_capacity']:.0f}, shed {usage['shed']}, waits {usage['waits']}, 429s {usage['throttled']}")
+    unhealthy = [f"{name} {status['state']}" for name, status in service_status().items() if status['state'] != 'closed']
+    if unhealthy:
+        print(f"🔌 Failing fast: {', '.join(unhealthy)}")
+    if config.get('SIGNAL_CACHE_TTL', 0) > 0:
+        cache = get_signal_cache()
+        print(f"🗃️  Signal cache: {cache.stats} (hit rate {cache.hit_rate():.0%})")
+
+def print_stage_latency(metrics, label=''):
+    timings = ', '.join(f"{stage} {stats['last_ms']:.0f}ms" for stage, stats in metrics.summary().items())
+    if timings:
+        print(f"⏱️  Stage latency{label}: {timings}")
+
+def run_iteration(config, metrics, iteration, trigger='tick', market_data=None):
+    """Run one fetch → signal → trade → log → alert pass, timing each stage.
+    
+    A supervised account is handed the tick's shared market_data instead of fetching its own.
+    With ASYNC_PIPELINE=1 the whole pass runs as one coroutine on the shared event loop.
+    """
+    if config.get('ASYNC_PIPELINE') == 1:
+        return run_sync(run_iteration_async(config, metrics, iteration, trigger, market_data))
+    
+    label = account_label(config)
+    print(f"\n🔄 Trading iteration #{iteration}{label} ({trigger}) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    supervised = market_data is not None
+    
+    strategy = get_cached_trade_signal if config.get('SIGNAL_CACHE_TTL', 0) > 0 else get_trade_signal
+    
+    try:
+        if config.get('PAPER_TRADING') == 1:
+            # Symbols no stream feeds are re-priced here, so paper SL/TP still trigger between trades
+            get_paper_exchange(config).refresh_prices()
+
+        if not supervised:
             # 1. Fetch market data
             print("📊 Fetching market data...")
-            market_data = fetch_top_coins()
+            with metrics.time('market_data'), stage_budget(config.get('MARKET_DATA_BUDGET', 0)):
+                market_data = fetch_top_coins(config.get('MARKET_DATA_LIMIT', 5))
             if not market_data:
                 print("⚠️  No market data received, skipping iteration")
-                time.sleep(SLEEP_INTERVAL)
-                continue
+                return
             
+            apply_latest_prices(market_data)
             print(f"✅ Fetched data for {len(market_data)} coins")
+        
+        # 1b. Local rule engine decides which coins are worth a model call
+        rule_signals = {}
+        if config.get('RULE_ENGINE', 0) > 0:
+            with metrics.time('rule_engine'):
+                total = len(market_data)
+                market_data, rule_signals = screen_market(market_data, config)
+            print(f"🔎 Rule engine kept {len(market_data)} of {total} coins{label}")
+            if not market_data:
+                print("😴 Nothing interesting, skipping model call")
+                return
+        rules_only = config.get('RULE_ENGINE', 0) == 2
+        if rules_only:
+            strategy = rules_only_strategy(rule_signals)
+        
+        if config.get('MULTI_SYMBOL_PIPELINE') == 1:
+            # 2. Evaluate every symbol (one batched call, or in parallel) and rank the signals
+            with metrics.time('strategy'), stage_budget(config.get('STRATEGY_BUDGET', 0)):
+                if config.get('BATCH_SIGNALS') == 1 and not rules_only:
+                    print(f"🧠 Evaluating {len(market_data)} symbols in one batched call...")
+                    signals = rank_signals([apply_rule_fallback(s, rule_signals) for s in get_batch_trade_signals(market_data, config['GEMINI_API_KEY'])])
+                else:
+                    print(f"🧠 Evaluating {len(market_data)} symbols in parallel...")
+                    signals = evaluate_symbols(market_data, lambda coins: apply_rule_fallback(strategy(coins, config['GEMINI_API_KEY']), rule_signals), config.get('PIPELINE_CONCURRENCY', 8))
+                selected = select_trades(signals, config.get('MAX_TRADES_PER_TICK', 1), config.get('MIN_SIGNAL_CONFIDENCE', 0))
+                selected = attach_signal_prices(selected, market_data)
+            for signal in selected:
+                print(f"📈 Signal: {signal['action']} {signal['symbol']} on {signal['market']} (confidence: {signal['confidence']}%)")
+            if not selected:
+                print("😴 No actionable signals this tick")
             
+            # 3. Execute the selected trades concurrently
+            print(f"💱 Executing {len(selected)} trade(s)...")
+            with metrics.time('execution'), stage_budget(config.get('EXECUTION_BUDGET', 0)):
+                trade_results = execute_signals(selected, config, config.get('PIPELINE_CONCURRENCY', 8))
+        else:
             # 2. Get trade signal from Gemini
             print("🧠 Getting AI trade signal...")
-            signal = get_trade_signal(market_data, config['GEMINI_API_KEY'])
+            with metrics.time('strategy'), stage_budget(config.get('STRATEGY_BUDGET', 0)):
+                signal = apply_rule_fallback(strategy(market_data, config['GEMINI_API_KEY']), rule_signals)
+                signal = attach_signal_prices([signal], market_data)[0] if signal else signal
             print(f"📈 Signal: {signal['action']} {signal['symbol']} on {signal['market']} (confidence: {signal['confidence']}%)")
             
             # 3. Execute trade on Binance
             print("💱 Executing trade...")
-            trade_result = execute_trade(signal, config)
-            print(f"📋 Trade status: {trade_result['status']}")
-            
-            # 4. Log trade
-            log_trade(trade_result)
-            print("📝 Trade logged")
+            with metrics.time('execution'), stage_budget(config.get('EXECUTION_BUDGET', 0)):
+                trade_results = [execute_trade(signal, config)]
+        
+        for trade_result in trade_results:
+            report_trade(trade_result, config, metrics)
+        
+        print(f"✅ Iteration #{iteration}{label} completed successfully")
+        
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        print(f"🔌 Skipping iteration #{iteration}{label}: {e}")
+    except Exception as e:
+        print(f"❌ Error in iteration #{iteration}{label}: {e}")
+        print("🔄 Continuing to next iteration...")
+    finally:
+        print_stage_latency(metrics, label)
+        if not supervised:
+            print_service_health(config)
+
+async def run_iteration_async(config, metrics, iteration, trigger='tick', market_data=None):
+    """run_iteration() as one coroutine: market data, strategy calls and orders are awaited on the
+    shared loop, while blocking work (paper re-pricing, rule screening, logging, alerts) runs on
+    worker threads so it never stalls requests in flight"""
+    label = account_label(config)
+    print(f"\n🔄 Trading iteration #{iteration}{label} ({trigger}) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    supervised = market_data is not None
+    
+    strategy = get_cached_trade_signal if config.get('SIGNAL_CACHE_TTL', 0) > 0 else get_trade_signal
+    
+    async def evaluate(coins):
+        if strategy is get_trade_signal:
+            signal = await get_trade_signal_async(coins, config['GEMINI_API_KEY'])
+        else:
+            signal = await asyncio.to_thread(strategy, coins, config['GEMINI_API_KEY'])
+        return apply_rule_fallback(signal, rule_signals)
+    
+    try:
+        if config.get('PAPER_TRADING') == 1:
+            # Symbols no stream feeds are re-priced here, so paper SL/TP still trigger between trades
+            await asyncio.to_thread(get_paper_exchange(config).refresh_prices)
+
+        if not supervised:
+            # 1. Fetch market data
+            print("📊 Fetching market data...")
+            with metrics.time('market_data'), stage_budget(config.get('MARKET_DATA_BUDGET', 0)):
+                market_data = await fetch_top_coins_async(config.get('MARKET_DATA_LIMIT', 5))
+            if not market_data:
+                print("⚠️  No market data received, skipping iteration")
+                return
             
-            # 5. Send Telegram alert
-            if config.get('TELEGRAM_BOT_TOKEN') and config.get('TELEGRAM_CHAT_ID'):
-                print("📱 Sending Telegram alert...")
-                send_telegram_alert(trade_result, config['TELEGRAM_BOT_TOKEN'], config['TELEGRAM_CHAT_ID'])
-                print("✅ Alert sent")
-            else:
-                print("⚠️  Telegram not configured, skipping alert")
+            apply_latest_prices(market_data)
+            print(f"✅ Fetched data for {len(market_data)} coins")
+        
+        # 1b. Local rule engine decides which coins are worth a model call
+        rule_signals = {}
+        if config.get('RULE_ENGINE', 0) > 0:
+            with metrics.time('rule_engine'):
+                total = len(market_data)
+                market_data, rule_signals = await asyncio.to_thread(screen_market, market_data, config)
+            print(f"🔎 Rule engine kept {len(market_data)} of {total} coins{label}")
+            if not market_data:
+                print("😴 Nothing interesting, skipping model call")
+                return
+        rules_only = config.get('RULE_ENGINE', 0) == 2
+        if rules_only:
+            strategy = rules_only_strategy(rule_signals)
+        
+        if config.get('MULTI_SYMBOL_PIPELINE') == 1:
+            # 2. Evaluate every symbol (one batched call, or concurrently) and rank the signals
+            with metrics.time('strategy'), stage_budget(config.get('STRATEGY_BUDGET', 0)):
+                if config.get('BATCH_SIGNALS') == 1 and not rules_only:
+                    print(f"🧠 Evaluating {len(market_data)} symbols in one batched call...")
+                    signals = rank_signals([apply_rule_fallback(s, rule_signals) for s in await get_batch_trade_signals_async(market_data, config['GEMINI_API_KEY'])])
+                else:
+                    print(f"🧠 Evaluating {len(market_data)} symbols concurrently on the event loop...")
+                    signals = await evaluate_symbols_async(market_data, evaluate, config.get('PIPELINE_CONCURRENCY', 8))
+                selected = select_trades(signals, config.get('MAX_TRADES_PER_TICK', 1), config.get('MIN_SIGNAL_CONFIDENCE', 0))
+                selected = attach_signal_prices(selected, market_data)
+            for signal in selected:
+                print(f"📈 Signal: {signal['action']} {signal['symbol']} on {signal['market']} (confidence: {signal['confidence']}%)")
+            if not selected:
+                print("😴 No actionable signals this tick")
             
-            print(f"✅ Iteration #{iteration} completed successfully")
+            # 3. Execute the selected trades concurrently; each result is logged and alerted
+            # as soon as it lands, while other orders are in flight
+            print(f"💱 Executing {len(selected)} trade(s)...")
+            with metrics.time('execution'), stage_budget(config.get('EXECUTION_BUDGET', 0)):
+                await execute_signals_async(selected, config, config.get('PIPELINE_CONCURRENCY', 8), lambda result: report_trade(result, config, metrics))
+        else:
+            # 2. Get trade signal from Gemini
+            print("🧠 Getting AI trade signal...")
+            with metrics.time('strategy'), stage_budget(config.get('STRATEGY_BUDGET', 0)):
+                signal = await evaluate(market_data)
+                signal = attach_signal_prices([signal], market_data)[0] if signal else signal
+            print(f"📈 Signal: {signal['action']} {signal['symbol']} on {signal['market']} (confidence: {signal['confidence']}%)")
             
-        except KeyboardInterrupt:
-            print("\n🛑 Bot stopped by user")
-            break
-        except Exception as e:
-            print(f"❌ Error in iteration #{iteration}: {e}")
-            print("🔄 Continuing to next iteration...")
+            # 3. Execute trade on Binance
+            print("💱 Executing trade...")
+            with metrics.time('execution'), stage_budget(config.get('EXECUTION_BUDGET', 0)):
+                trade_result = await execute_trade_async(signal, config)
+            await asyncio.to_thread(report_trade, trade_result, config, metrics)
+        
+        print(f"✅ Iteration #{iteration}{label} completed successfully")
         
-        print(f"⏳ Waiting {SLEEP_INTERVAL} seconds until next iteration...")
-        time.sleep(SLEEP_INTERVAL)
+    except (CircuitOpenError, DeadlineExceeded) as e:
+        print(f"🔌 Skipping iteration #{iteration}{label}: {e}")
+    except Exception as e:
+        print(f"❌ Error in iteration #{iteration}{label}: {e}")
+        print("🔄 Continuing to next iteration...")
+    finally:
+        print_stage_latency(metrics, label)
+        if not supervised:
+            print_service_health(config)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
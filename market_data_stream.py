@@ -0,0 +1,216 @@
+import asyncio
+import json
+import threading
+import time
+import websockets
+
+FUTURES_STREAM_URL = 'wss://fstream.binance.com/stream'
+SPOT_STREAM_URL = 'wss://stream.binance.com:9443/stream'
+
+INTERVAL_MS = {
+    '1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000,
+    '1h': 3600000, '2h': 7200000, '4h': 14400000, '1d': 86400000,
+}
+
+class MarketDataStream:
+    """Latest-price table fed by Binance miniTicker, bookTicker and kline streams.
+
+    The asyncio loop runs on a background thread; readers only do dict lookups.
+    market is the market whose prices the stream carries (default: SPOT for the
+    spot stream URL, FUTURES for anything else).
+    """
+
+    def __init__(self, symbols, url=FUTURES_STREAM_URL, kline_interval='1m', max_reconnect_delay=30, market=None):
+        self.symbols = [s.upper() for s in symbols]
+        self.url = url
+        self.market = market or ('SPOT' if url == SPOT_STREAM_URL else 'FUTURES')
+        self.kline_interval = kline_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.prices = {}
+        self.books = {}
+        self.klines = {}
+        self.gaps = []
+        self.connected = False
+        self.reconnects = 0
+        self.messages = 0
+        self.last_message_at = 0.0
+        self._listeners = []
+        self._kline_listeners = []
+        self._book_listeners = []
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._stopping = False
+        self._ws = None
+
+    def stream_url(self):
+        streams = []
+        for symbol in self.symbols:
+            name = symbol.lower()
+            streams += [f"{name}@miniTicker", f"{name}@bookTicker", f"{name}@kline_{self.kline_interval}"]
+        return f"{self.url}?streams={'/'.join(streams)}"
+
+    def add_listener(self, callback):
+        """Register callback(symbol, price) to run on every price update (on the stream thread)"""
+        self._listeners.append(callback)
+
+    def add_kline_listener(self, callback):
+        """Register callback(symbol, bar) to run on every closed kline (on the stream thread)"""
+        self._kline_listeners.append(callback)
+
+    def add_book_listener(self, callback):
+        """Register callback(symbol, book) to run on every top-of-book update (on the stream thread)"""
+        self._book_listeners.append(callback)
+
+    def _set_price(self, symbol, price, event_time):
+        self.prices[symbol] = {'price': price, 'event_time': event_time, 'received_at': time.time()}
+        for callback in self._listeners:
+            try:
+                callback(symbol, price)
+            except Exception as e:
+                print(f"Market data listener error: {e}")
+
+    def _record_gap(self, symbol, start_ms, end_ms, reason):
+        self.gaps.append({'symbol': symbol, 'start': start_ms, 'end': end_ms, 'reason': reason})
+        print(f"Market data gap for {symbol}: {start_ms} -> {end_ms} ({reason})")
+
+    def handle_message(self, message):
+        """Apply one combined-stream message to the in-memory tables"""
+        data = message.get('data', message)
+        event = data.get('e')
+        symbol = data.get('s')
+        if symbol is None:
+            return
+        self.messages += 1
+        self.last_message_at = time.time()
+        if event == '24hrMiniTicker':
+            self._set_price(symbol, float(data['c']), data.get('E'))
+        elif event == 'bookTicker' or (event is None and 'b' in data and 'a' in data):
+            # Spot bookTicker payloads carry no event type, futures ones do
+            book = self.books.get(symbol)
+            update_id = data.get('u', 0)
+            if book and update_id < book['update_id']:
+                return
+            self.books[symbol] = {
+                'bid': float(data['b']), 'bid_qty': float(data['B']),
+                'ask': float(data['a']), 'ask_qty': float(data['A']),
+                'update_id': update_id, 'received_at': time.time(),
+            }
+            for callback in self._book_listeners:
+                try:
+                    callback(symbol, self.books[symbol])
+                except Exception as e:
+                    print(f"Book listener error: {e}")
+        elif event == 'kline':
+            k = data['k']
+            self._set_price(symbol, float(k['c']), data.get('E'))
+            if not k['x']:
+                return
+            bar = {
+                'open_time': k['t'], 'close_time': k['T'],
+                'open': float(k['o']), 'high': float(k['h']), 'low': float(k['l']),
+                'close': float(k['c']), 'volume': float(k['v']),
+            }
+            previous = self.klines.get(symbol)
+            step = INTERVAL_MS.get(self.kline_interval)
+            if previous and step and bar['open_time'] - previous['open_time'] > step:
+                self._record_gap(symbol, previous['open_time'] + step, bar['open_time'], 'missing klines')
+            self.klines[symbol] = bar
+            for callback in self._kline_listeners:
+                try:
+                    callback(symbol, bar)
+                except Exception as e:
+                    print(f"Kline listener error: {e}")
+
+    async def _run(self):
+        delay = 1
+        disconnected_at = None
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.stream_url(), ping_interval=20, ping_timeout=20) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    delay = 1
+                    if disconnected_at is not None:
+                        # Ticks published while we were away are lost; flag the window for backfill
+                        for symbol in self.symbols:
+                            self._record_gap(symbol, disconnected_at, int(time.time() * 1000), 'reconnect')
+                        disconnected_at = None
+                    async for raw in ws:
+                        self.handle_message(json.loads(raw))
+            except Exception as e:
+                if not self._stopping:
+                    print(f"Market data stream error: {e}")
+            finally:
+                self._ws = None
+            if self.connected:
+                self.connected = False
+                disconnected_at = int(time.time() * 1000)
+            if self._stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _thread_main(self):
+        self._task = self._loop.create_task(self._run())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def start(self):
+        """Run the stream on a daemon thread and return self"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._thread_main, daemon=True, name='market-data')
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        if self._task is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_price(self, symbol, max_age=None):
+        """Latest trade price for a symbol, or None if unknown or older than max_age seconds"""
+        entry = self.prices.get(symbol)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry['received_at'] > max_age:
+            return None
+        return entry['price']
+
+    def get_book(self, symbol):
+        """Best bid/ask for a symbol, or None"""
+        return self.books.get(symbol)
+
+_active_stream = None
+
+def start_market_data_stream(symbols, url=FUTURES_STREAM_URL, kline_interval='1m', market=None):
+    """Start the process-wide stream that get_latest_price() reads from"""
+    global _active_stream
+    if _active_stream is not None:
+        _active_stream.stop()
+    _active_stream = MarketDataStream(symbols, url, kline_interval, market=market).start()
+    return _active_stream
+
+def get_active_stream():
+    return _active_stream
+
+def get_latest_price(symbol, max_age=5):
+    """Streamed price for a symbol, or None when no stream is running or the price is stale"""
+    if _active_stream is None:
+        return None
+    return _active_stream.get_price(symbol, max_age)
+
+def apply_latest_prices(market_data, quote='USDT'):
+    """Overwrite CoinGecko snapshot prices with fresher streamed ones where available"""
+    for coin in market_data:
+        price = get_latest_price(f"{coin['symbol']}{quote}")
+        if price is not None:
+            coin['price'] = price
+    return market_data
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Local Binance stand-in for end-to-end latency and load tests
+Serves the spot/futures REST endpoints the bot uses (signed, rate limited, with
+injectable latency and errors), a combined WebSocket stream of book/ticker updates
+and a futures user-data stream of fills.
+Usage: python mock_binance.py [--port 8765] [--latency-ms 20] [--error-rate 0.01]
+Then point the bot at it:
+  BINANCE_SPOT_BASE_URL=http://127.0.0.1:8765
+  BINANCE_FUTURES_BASE_URL=http://127.0.0.1:8765
+  MARKET_DATA_STREAM_URL=ws://127.0.0.1:8766/stream
+  USER_DATA_STREAM_URL=ws://127.0.0.1:8766/ws
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import websockets
+from binance_client import _get_binance_signature
+from paper_exchange import PaperExchange, PaperExchangeError
+from rate_limiter import ENDPOINT_WEIGHTS, ORDER_PATHS
+
+MOCK_API_KEY = 'mock-api-key'
+MOCK_API_SECRET = 'mock-api-secret'
+
+DEFAULT_PRICES = {'BTCUSDT': 60000.0, 'ETHUSDT': 3000.0, 'BNBUSDT': 550.0, 'SOLUSDT': 150.0, 'XRPUSDT': 0.6}
+
+SIGNED_PATHS = {
+    '/api/v3/order', '/api/v3/account', '/fapi/v1/order', '/fapi/v1/leverage',
+    '/fapi/v2/account', '/fapi/v1/income', '/fapi/v1/openOrders',
+}
+
+LISTEN_KEY_PATHS = {'/fapi/v1/listenKey': 'FUTURES', '/api/v3/userDataStream': 'SPOT'}
+
+SPOT_EVENTS = {'outboundAccountPosition', 'executionReport', 'balanceUpdate'}
+
+class MockBinanceServer:
+    """Threaded HTTP + WebSocket server backed by a PaperExchange.
+
+    latency_ms/jitter_ms delay every REST response, error_rate answers that share
+    of requests with a 503, and weight_limit/order_limit enforce per-minute limits
+    with X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-1M headers and 429s.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, ws_port=0, api_key=MOCK_API_KEY, api_secret=MOCK_API_SECRET,
+                 latency_ms=0, jitter_ms=0, error_rate=0.0, weight_limit=2400, order_limit=1200,
+                 recv_window=5000, prices=None, tick_interval=0.1, balance=100000.0, seed=None):
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.weight_limit = weight_limit
+        self.order_limit = order_limit
+        self.recv_window = recv_window
+        self.tick_interval = tick_interval
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.exchange = PaperExchange(balance=balance)
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rejected = {'signature': 0, 'rate_limit': 0, 'injected': 0}
+        self._window = {'minute': 0, 'weight': 0, 'orders': 0}
+        self._lock = threading.Lock()
+        self._http = None
+        self._ws_loop = None
+        self._ws_clients = set()
+        self._user_clients = set()
+        self.listen_keys = {}
+        self._ws_ready = threading.Event()
+        self._stopping = threading.Event()
+        for symbol, price in self.prices.items():
+            self._publish(symbol, price)
+        self.exchange.add_event_listener(self._push_user_event)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.ws_port}/stream"
+
+    @property
+    def user_stream_url(self):
+        return f"ws://{self.host}:{self.ws_port}/ws"
+
+    # --- Market simulation ---
+
+    def _publish(self, symbol, price):
+        spread = price * 0.0001
+        self.exchange.on_tick(symbol, price - spread / 2, price + spread / 2, 5.0, 5.0)
+
+    def set_price(self, symbol, price):
+        """Move a symbol's price; fills, triggers and stream messages follow it"""
+        self.prices[symbol] = price
+        self._publish(symbol, price)
+
+    def _tick_loop(self):
+        update_id = 0
+        while not self._stopping.wait(self.tick_interval):
+            messages = []
+            for symbol in list(self.prices):
+                with self._lock:
+                    price = self.prices[symbol] * (1 + self.random.gauss(0, 0.0005))
+                self.set_price(symbol, price)
+                book = self.exchange.books[symbol]
+                update_id += 1
+                now = int(time.time() * 1000)
+                name = symbol.lower()
+                messages.append({'stream': f"{name}@bookTicker", 'data': {
+                    'e': 'bookTicker', 'u': update_id, 'E': now, 's': symbol,
+                    'b': f"{book['bids'][0][0]:.8f}", 'B': '5', 'a': f"{book['asks'][0][0]:.8f}", 'A': '5',
+                }})
+                messages.append({'stream': f"{name}@miniTicker", 'data': {'e': '24hrMiniTicker', 'E': now, 's': symbol, 'c': f"{price:.8f}"}})
+            if self._ws_loop is not None and self._ws_clients:
+                asyncio.run_coroutine_threadsafe(self._broadcast(messages), self._ws_loop)
+
+    # --- WebSocket ---
+
+    async def _broadcast(self, messages):
+        for connection, streams in list(self._ws_clients):
+            for message in messages:
+                if message['stream'] in streams:
+                    try:
+                        await connection.send(json.dumps(message))
+                    except Exception:
+                        self._ws_clients.discard((connection, streams))
+                        break
+
+    def _push_user_event(self, event):
+        if self._ws_loop is not None and self._user_clients:
+            asyncio.run_coroutine_threadsafe(self._send_user(event), self._ws_loop)
+
+    async def _send_user(self, event):
+        market = 'SPOT' if event.get('e') in SPOT_EVENTS else 'FUTURES'
+        for connection, listen_key in list(self._user_clients):
+            if self.listen_keys.get(listen_key) != market:
+                continue
+            try:
+                await connection.send(json.dumps(event))
+            except Exception:
+                self._user_clients.discard((connection, listen_key))
+
+    async def _expire(self, listen_keys):
+        for connection, listen_key in list(self._user_clients):
+            if listen_key in listen_keys:
+                await connection.send(json.dumps({'e': 'listenKeyExpired', 'E': int(time.time() * 1000), 'listenKey': listen_key}))
+                await connection.close()
+
+    def expire_listen_keys(self):
+        """Invalidate every listenKey and tell connected user-data clients, like a missed keepalive"""
+        with self._lock:
+            expired, self.listen_keys = self.listen_keys, {}
+        if self._ws_loop is not None:
+            asyncio.run_coroutine_threadsafe(self._expire(expired), self._ws_loop).result(5)
+
+    async def _ws_handler(self, connection):
+        path = urlsplit(connection.request.path).path
+        if path.startswith('/ws/'):
+            listen_key = path[len('/ws/'):]
+            if listen_key not in self.listen_keys:
+                await connection.close(4000, 'Invalid listenKey')
+                return
+            client = (connection, listen_key)
+            self._user_clients.add(client)
+            try:
+                await connection.wait_closed()
+            finally:
+                self._user_clients.discard(client)
+            return
+        query = dict(parse_qsl(urlsplit(connection.request.path).query))
+        client = (connection, frozenset(query.get('streams', '').split('/')))
+        self._ws_clients.add(client)
+        try:
+            await connection.wait_closed()
+        finally:
+            self._ws_clients.discard(client)
+
+    async def _ws_serve(self):
+        async with websockets.serve(self._ws_handler, self.host, self.ws_port) as server:
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self._ws_ready.set()
+            while not self._stopping.is_set():
+                await asyncio.sleep(0.1)
+
+    def _ws_main(self):
+        self._ws_loop = asyncio.new_event_loop()
+        self._ws_loop.run_until_complete(self._ws_serve())
+        self._ws_loop.close()
+
+    # --- REST ---
+
+    def _exchange_info(self):
+        symbols = []
+        for symbol in self.prices:
+            symbols.append({'symbol': symbol, 'status': 'TRADING', 'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': '0.01' if self.prices[symbol] > 10 else '0.0001'},
+                {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001'},
+                {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+            ]})
+        return {'timezone': 'UTC', 'serverTime': int(time.time() * 1000), 'symbols': symbols}
+
+    def _charge(self, path):
+        """Count weight and orders for the current minute, return (headers, over_limit)"""
+        with self._lock:
+            minute = int(time.time() // 60)
+            if self._window['minute'] != minute:
+                self._window = {'minute': minute, 'weight': 0, 'orders': 0}
+            self._window['weight'] += ENDPOINT_WEIGHTS.get(path, 1)
+            if path in ORDER_PATHS:
+                self._window['orders'] += 1
+            headers = {'X-MBX-USED-WEIGHT-1M': str(self._window['weight'])}
+            if path in ORDER_PATHS:
+                headers['X-MBX-ORDER-COUNT-1M'] = str(self._window['orders'])
+            over = self._window['weight'] > self.weight_limit or self._window['orders'] > self.order_limit
+            return headers, over
+
+    def _listen_key(self, market, method, params):
+        """POST creates (or returns the live) key for a market, PUT keeps it alive, DELETE closes it"""
+        with self._lock:
+            if method == 'POST':
+                live = [key for key, key_market in self.listen_keys.items() if key_market == market]
+                if not live:
+                    live = [f"mock-{market.lower()}-{self.random.getrandbits(64):016x}"]
+                    self.listen_keys[live[0]] = market
+                return 200, {'listenKey': live[0]}
+            listen_key = params.get('listenKey')
+            if self.listen_keys.get(listen_key) != market:
+                return 400, {'code': -1125, 'msg': "This listenKey does not exist."}
+            if method == 'DELETE':
+                del self.listen_keys[listen_key]
+            return 200, {}
+
+    def _check_signature(self, headers, query, body):
+        """Return a Binance error tuple for a bad key, signature or timestamp, else None"""
+        if headers.get('X-MBX-APIKEY') != self.api_key:
+            return 401, -2015, "Invalid API-key, IP, or permissions for action."
+        # Binance signs the query string followed by the body, minus the signature itself
+        payload = '&'.join(part for part in (query, body) if part)
+        parts = payload.split('&')
+        signature = next((p.split('=', 1)[1] for p in parts if p.startswith('signature=')), None)
+        unsigned = '&'.join(p for p in parts if not p.startswith('signature='))
+        if not signature or _get_binance_signature(unsigned, self.api_secret) != signature:
+            return 400, -1022, "Signature for this request is not valid."
+        params = dict(parse_qsl(unsigned))
+        recv_window = int(params.get('recvWindow', self.recv_window))
+        if abs(int(time.time() * 1000) - int(params.get('timestamp', 0))) > recv_window:
+            return 400, -1021, "Timestamp for this request is outside of the recvWindow."
+        return None
+
+    def _reject(self, reason):
+        with self._lock:
+            self.rejected[reason] += 1
+
+    def handle(self, method, raw_path, headers, body=''):
+        """Answer one REST call, return (status, headers, payload)"""
+        # Handlers run on ThreadingHTTPServer workers, so counters and the seeded RNG change under the lock
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+            inject_error = bool(self.error_rate) and self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay / 1000)
+        split = urlsplit(raw_path)
+        path = split.path
+        limit_headers, over_limit = self._charge(path)
+        if over_limit:
+            self._reject('rate_limit')
+            return 429, dict(limit_headers, **{'Retry-After': str(60 - int(time.time()) % 60)}), {
+                'code': -1003, 'msg': "Too many requests; current limit is exceeded."}
+        if inject_error:
+            self._reject('injected')
+            return 503, limit_headers, {'code': -1001, 'msg': "Internal error; unable to process your request. Please try again."}
+        if path in SIGNED_PATHS:
+            error = self._check_signature(headers, split.query, body)
+            if error:
+                self._reject('signature')
+                return error[0], limit_headers, {'code': error[1], 'msg': error[2]}
+        params = dict(parse_qsl(split.query))
+        params.update(parse_qsl(body))
+        params.pop('signature', None)
+        params.pop('timestamp', None)
+        params.pop('recvWindow', None)
+        if path in ('/api/v3/exchangeInfo', '/fapi/v1/exchangeInfo'):
+            return 200, limit_headers, self._exchange_info()
+        if path in ('/api/v3/ping', '/fapi/v1/ping'):
+            return 200, limit_headers, {}
+        if path in LISTEN_KEY_PATHS:
+            # Keyed by API key only, no signature
+            if headers.get('X-MBX-APIKEY') != self.api_key:
+                self._reject('signature')
+                return 401, limit_headers, {'code': -2015, 'msg': "Invalid API-key, IP, or permissions for action."}
+            status, payload = self._listen_key(LISTEN_KEY_PATHS[path], method, params)
+            return status, limit_headers, payload
+        market = 'SPOT' if path.startswith('/api/') else 'FUTURES'
+        try:
+            return 200, limit_headers, self.exchange.request(method, market, path, params)
+        except PaperExchangeError as e:
+            status = 404 if e.code == -1000 else 400
+            return status, limit_headers, {'code': e.code, 'msg': e.msg}
+        except (KeyError, ValueError) as e:
+            return 400, limit_headers, {'code': -1102, 'msg': f"Mandatory parameter missing or malformed: {e}"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _respond(self, method):
+                length = int(self.headers.get('Content-Length', 0) or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                status, headers, payload = server.handle(method, self.path, self.headers, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def do_PUT(self):
+                self._respond('PUT')
+
+            def do_DELETE(self):
+                self._respond('DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Serve REST, WebSocket and the price walk on daemon threads, return self"""
+        self._http = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._http.daemon_threads = True
+        self.port = self._http.server_address[1]
+        threading.Thread(target=self._http.serve_forever, daemon=True, name='mock-binance-http').start()
+        threading.Thread(target=self._ws_main, daemon=True, name='mock-binance-ws').start()
+        self._ws_ready.wait(5)
+        if self.tick_interval:
+            threading.Thread(target=self._tick_loop, daemon=True, name='mock-binance-ticks').start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Binance REST/WebSocket stand-in')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ws-port', type=int, default=8766)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--weight-limit', type=int, default=2400)
+    parser.add_argument('--order-limit', type=int, default=1200)
+    args = parser.parse_args()
+    server = MockBinanceServer(
+        port=args.port, ws_port=args.ws_port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, weight_limit=args.weight_limit, order_limit=args.order_limit,
+    ).start()
+    print(f"🧪 Mock Binance REST on {server.base_url}, stream on {server.stream_url}, user data on {server.user_stream_url}")
+    print(f"🔑 API key: {server.api_key}  secret: {server.api_secret}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📈 {server.requests} requests, rejected {server.rejected}")
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
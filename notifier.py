@@ -1,18 +1,241 @@
+import atexit
+import threading
+import time
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
 
-def send_telegram_alert(trade_result, bot_token, chat_id):
-    message = (
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+
+def format_trade_alert(trade_result):
+    account = f"Account: {trade_result['account']}\n" if trade_result.get('account') else ""
+    execution = trade_result.get('execution')
+    fill = ""
+    if execution and execution.get('avg_price'):
+        shortfall = f", shortfall {execution['shortfall_bps']:+.1f} bps" if execution.get('shortfall_bps') is not None else ""
+        fill = f"\nFill: {execution['filled_qty']:g} @ {execution['avg_price']:.6g} via {execution['algo']}{shortfall}"
+    return (
         f"Trade Alert!\n"
+        f"{account}"
         f"Symbol: {trade_result['symbol']}\n"
         f"Side: {trade_result['side']}\n"
         f"Market: {trade_result['market']}\n"
         f"Confidence: {trade_result['confidence']}\n"
         f"Reason: {trade_result['reason']}\n"
         f"Status: {trade_result['status']}"
+        f"{fill}"
     )
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    data = {"chat_id": chat_id, "text": message}
-    try:
-        requests.post(url, data=data, timeout=10)
-    except Exception as e:
-        print(f"Telegram alert error: {e}") 
\ No newline at end of file
+
+def format_trade_line(trade_result):
+    """One-line form of a trade alert, used in digests"""
+    prefix = f"[{trade_result['account']}] " if trade_result.get('account') else ""
+    return f"{prefix}{trade_result['side']} {trade_result['symbol']} {trade_result['market']} ({trade_result['confidence']}%): {trade_result['status']}"
+
+class AlertDispatcher:
+    """Sends Telegram messages for one chat from a background thread.
+
+    send() only enqueues. The worker waits coalesce_window seconds after the
+    first message of a burst; when digest_threshold or more are waiting they go
+    out as one digest. Messages to the chat are spaced min_interval apart, a 429
+    is retried after Telegram's retry_after and network/5xx errors back off
+    exponentially up to max_retries. When the queue is full the oldest alert is
+    dropped, and alerts older than max_age are only counted; both show up as a
+    summary line in the next message.
+    """
+
+    def __init__(self, bot_token, chat_id, max_queue=100, digest_threshold=3, coalesce_window=1.0,
+                 min_interval=1.0, max_age=300, max_retries=3, timeout=10):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.max_queue = max_queue
+        self.digest_threshold = digest_threshold
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.stats = {'queued': 0, 'sent': 0, 'messages': 0, 'digests': 0, 'retries': 0, 'failed': 0, 'dropped': 0, 'stale': 0}
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._skipped = {'dropped': 0, 'stale': 0}
+        self._sending = 0
+        self._last_sent = 0.0
+        self._closed = False
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._thread = threading.Thread(target=self._run, daemon=True, name='telegram-alerts')
+        self._thread.start()
+
+    def send(self, text, summary=None):
+        """Queue a message (summary is its line in a digest), return False if refused"""
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self._skipped['dropped'] += 1
+                self.stats['dropped'] += 1
+            self._queue.append((time.monotonic(), text, summary or text.splitlines()[0]))
+            self.stats['queued'] += 1
+            self._cond.notify()
+        return True
+
+    def alert(self, trade_result):
+        return self.send(format_trade_alert(trade_result), format_trade_line(trade_result))
+
+    def _take_batch(self):
+        """Wait for a burst and return (fresh messages, skipped counts) or None once closed and empty"""
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            # Let the rest of a burst arrive so it can share one message
+            first = self._queue[0][0]
+            while not self._closed and len(self._queue) < self.max_queue:
+                remaining = first + self.coalesce_window - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            now = time.monotonic()
+            batch = []
+            for queued_at, text, summary in self._queue:
+                if self.max_age and now - queued_at > self.max_age:
+                    self._skipped['stale'] += 1
+                    self.stats['stale'] += 1
+                else:
+                    batch.append((text, summary))
+            self._sending = len(self._queue)
+            self._queue.clear()
+            skipped = dict(self._skipped)
+            self._skipped = {'dropped': 0, 'stale': 0}
+            return batch, skipped
+
+    def _compose(self, batch, skipped):
+        notes = []
+        if skipped['dropped']:
+            notes.append(f"{skipped['dropped']} alert(s) dropped while Telegram was backed up")
+        if skipped['stale']:
+            notes.append(f"{skipped['stale']} alert(s) older than {self.max_age:.0f}s skipped")
+        if len(batch) >= self.digest_threshold:
+            text = f"{len(batch)} Trade Alerts\n" + '\n'.join(summary for _, summary in batch)
+        elif batch:
+            text = '\n\n'.join(text for text, _ in batch) if len(batch) > 1 else batch[0][0]
+        else:
+            text = ''
+        text = '\n\n'.join([text] + notes if text else notes)
+        if len(text) > MAX_MESSAGE_LENGTH:
+            text = text[:MAX_MESSAGE_LENGTH - 4] + '\n...'
+        return text
+
+    def _post(self, text):
+        """Send one message with per-chat spacing and retries, return True when delivered"""
+        url = f"{TELEGRAM_API_URL}/bot{self.bot_token}/sendMessage"
+        for attempt in range(self.max_retries + 1):
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            retry_after = min(2 ** attempt, 30)
+            try:
+                response = self._session.post(url, data={'chat_id': self.chat_id, 'text': text}, timeout=self.timeout)
+                self._last_sent = time.monotonic()
+                if response.ok:
+                    return True
+                if response.status_code == 429:
+                    try:
+                        retry_after = response.json()['parameters']['retry_after']
+                    except Exception:
+                        pass
+                elif response.status_code < 500:
+                    print(f"Telegram alert error: {response.status_code} {response.text[:200]}")
+                    return False
+            except Exception as e:
+                self._last_sent = time.monotonic()
+                print(f"Telegram alert error: {e}")
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                time.sleep(retry_after)
+        return False
+
+    def _run(self):
+        while True:
+            taken = self._take_batch()
+            if taken is None:
+                break
+            batch, skipped = taken
+            try:
+                text = self._compose(batch, skipped)
+                if text:
+                    if self._post(text):
+                        self.stats['sent'] += len(batch)
+                        self.stats['messages'] += 1
+                        if len(batch) >= self.digest_threshold:
+                            self.stats['digests'] += 1
+                    else:
+                        self.stats['failed'] += len(batch)
+            finally:
+                with self._cond:
+                    self._sending = 0
+                    self._cond.notify_all()
+
+    def flush(self, timeout=30):
+        """Wait until every queued alert has been sent or given up on, return True if drained in time"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.05))
+        return True
+
+    def close(self, timeout=10):
+        """Send what is queued (no coalescing wait), then stop the worker"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._session.close()
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+_dispatcher_options = {}
+
+def configure_alerts(**options):
+    """Set AlertDispatcher options (digest_threshold, min_interval, max_age, ...) for dispatchers created from now on"""
+    if _dispatchers:
+        print(f"⚠️  Alert options changed after {len(_dispatchers)} dispatcher(s) started; they keep the old options")
+    _dispatcher_options.update(options)
+
+def get_alert_dispatcher(bot_token, chat_id):
+    """Return the process-wide dispatcher for a bot and chat, starting its worker on first use"""
+    key = (bot_token, str(chat_id))
+    dispatcher = _dispatchers.get(key)
+    if dispatcher is not None:
+        return dispatcher
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = AlertDispatcher(bot_token, chat_id, **_dispatcher_options)
+            _dispatchers[key] = dispatcher
+        return dispatcher
+
+def close_alert_dispatchers(timeout=10):
+    """Send queued alerts and stop every dispatcher (also runs at interpreter exit)"""
+    with _dispatchers_lock:
+        dispatchers = list(_dispatchers.values())
+        _dispatchers.clear()
+    for dispatcher in dispatchers:
+        dispatcher.close(timeout)
+
+atexit.register(close_alert_dispatchers)
+
+def send_telegram_alert(trade_result, bot_token, chat_id):
+    """Queue a trade alert; the dispatcher's worker delivers it without blocking the caller"""
+    return get_alert_dispatcher(bot_token, chat_id).alert(trade_result)
@@ -0,0 +1,551 @@
+import threading
+import time
+
+class PaperExchangeError(Exception):
+    """Order or request rejected by the simulated exchange (mirrors a Binance error response)"""
+
+    def __init__(self, code, msg):
+        super().__init__(f"{code}: {msg}")
+        self.code = code
+        self.msg = msg
+
+class PaperExchange:
+    """In-memory stand-in for the Binance spot/futures order endpoints.
+
+    Books are fed by ticks (live stream or replay); symbols without a feed are
+    seeded from price_source and re-seeded once price_max_age old. MARKET orders walk the book,
+    LIMIT orders take what crosses and rest the rest until a later tick trades
+    through their price, STOP_MARKET / TAKE_PROFIT_MARKET closePosition orders
+    trigger on later ticks.
+    Exposes the same get/post/request interface as BinanceClient so execute_trade
+    can run unchanged against it, and emits user-data-stream shaped events
+    (ORDER_TRADE_UPDATE / ACCOUNT_UPDATE) for every futures fill.
+    """
+
+    def __init__(self, balance=10000.0, fee_percent=0.04, price_source=None, quote='USDT', clock=None, price_max_age=5, spot_balance=0.0):
+        self.fee_rate = fee_percent / 100
+        self.price_source = price_source
+        # Books seeded from price_source (no tick feed) are re-seeded once this many seconds old
+        self.price_max_age = price_max_age
+        self._seeded = {}
+        self.quote = quote
+        self.clock = clock
+        # Separate capital per market: `balance` is the futures wallet, `spot_balance` the spot one
+        self.wallet = {quote: float(balance)}
+        self.spot = {quote: float(spot_balance)}
+        # Spot funds held by resting LIMIT orders (quote for BUYs, base for SELLs)
+        self.spot_locked = {}
+        self.books = {}
+        self.leverage = {}
+        self.positions = {}
+        self.orders = {}
+        self.closed_orders = {}
+        self.income = []
+        self.fills = 0
+        self._next_order_id = 1
+        self._next_tran_id = 1
+        self._event_listeners = []
+        self._now_ms = None
+        self._lock = threading.RLock()
+
+    # --- Time and market data ---
+
+    def now_ms(self):
+        if self._now_ms is not None:
+            return self._now_ms
+        return int((self.clock or time.time)() * 1000)
+
+    def on_book(self, symbol, bids, asks, timestamp_ms=None):
+        """Replace the book for a symbol with [(price, qty), ...] levels, best first"""
+        with self._lock:
+            if timestamp_ms is not None:
+                self._now_ms = timestamp_ms
+            # A fed book is live; only books seeded by _seed() go stale
+            self._seeded.pop(symbol, None)
+            self.books[symbol] = {'bids': [tuple(map(float, l)) for l in bids], 'asks': [tuple(map(float, l)) for l in asks]}
+            if symbol in self.orders:
+                self._check_triggers(symbol)
+
+    def on_tick(self, symbol, bid, ask, bid_qty=float('inf'), ask_qty=float('inf'), timestamp_ms=None):
+        """Top-of-book update (e.g. a bookTicker message or a recorded tick)"""
+        self.on_book(symbol, [(bid, bid_qty)], [(ask, ask_qty)], timestamp_ms)
+
+    def on_price(self, symbol, price, timestamp_ms=None):
+        """Last-trade update when no book is available: a zero-spread, unlimited-depth book"""
+        self.on_book(symbol, [(price, float('inf'))], [(price, float('inf'))], timestamp_ms)
+
+    def attach_stream(self, stream):
+        """Feed books from a MarketDataStream"""
+        stream.add_book_listener(lambda symbol, book: self.on_tick(symbol, book['bid'], book['ask'], book['bid_qty'], book['ask_qty']))
+
+    def replay(self, ticks):
+        """Feed recorded (timestamp_ms, symbol, bid, ask[, bid_qty, ask_qty]) ticks in order"""
+        for tick in ticks:
+            timestamp_ms, symbol, bid, ask = tick[:4]
+            self.on_tick(symbol, bid, ask, *tick[4:6], timestamp_ms=timestamp_ms)
+
+    def _seed(self, symbol, market):
+        """Book a symbol from price_source(symbol, market) when no tick feed covers it; also runs limit/SL/TP checks.
+
+        Called without the lock held, since a price source may go over the network.
+        """
+        price = self.price_source(symbol, market)
+        if not price:
+            return
+        with self._lock:
+            if symbol in self.books and symbol not in self._seeded:
+                return  # a live feed took over meanwhile
+            self.on_price(symbol, price)
+            self._seeded[symbol] = self.now_ms()
+
+    def _stale_seed(self, symbol):
+        seeded = self._seeded.get(symbol)
+        return seeded is not None and self.now_ms() - seeded > self.price_max_age * 1000
+
+    def refresh_prices(self):
+        """Re-seed stale seeded books of symbols with positions or open orders, so SL/TP and limits keep firing"""
+        if self.price_source is None:
+            return
+        with self._lock:
+            due = {symbol: 'FUTURES' for symbol in self.positions}
+            for symbol, orders in self.orders.items():
+                for order in orders.values():
+                    due.setdefault(symbol, order.get('market', 'FUTURES'))
+            due = {symbol: market for symbol, market in due.items() if self._stale_seed(symbol)}
+        for symbol, market in due.items():
+            self._seed(symbol, market)
+
+    def _book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None or not book['bids'] or not book['asks']:
+            raise PaperExchangeError(-1121, f"No market data for {symbol}")
+        return book
+
+    def mid_price(self, symbol):
+        book = self._book(symbol)
+        return (book['bids'][0][0] + book['asks'][0][0]) / 2
+
+    # --- Matching ---
+
+    def _walk(self, symbol, side, quantity):
+        """Fill quantity against the book, return (avg_price, fills); depth beyond the book fills at the last level"""
+        levels = self._book(symbol)['asks' if side == 'BUY' else 'bids']
+        remaining = quantity
+        fills = []
+        for price, available in levels:
+            take = min(remaining, available)
+            if take > 0:
+                fills.append((price, take))
+                remaining -= take
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            fills.append((levels[-1][0], remaining))
+        notional = sum(price * qty for price, qty in fills)
+        return notional / quantity, fills
+
+    def _record_income(self, symbol, income_type, amount, trade_id):
+        self.income.append({
+            'symbol': symbol, 'incomeType': income_type, 'income': f"{amount:.8f}",
+            'asset': self.quote, 'time': self.now_ms(), 'tranId': self._next_tran_id, 'tradeId': str(trade_id),
+        })
+        self._next_tran_id += 1
+
+    def add_event_listener(self, callback):
+        """Register callback(event) to receive user-data-stream events (on the filling thread)"""
+        self._event_listeners.append(callback)
+
+    def _emit(self, event):
+        for callback in self._event_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Paper exchange listener error: {e}")
+
+    def _emit_order(self, order, status):
+        now = self.now_ms()
+        self._emit({'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': {
+            's': order['symbol'], 'S': order['side'], 'o': order['type'], 'i': order['orderId'], 'x': status, 'X': status,
+            'q': str(order.get('origQty', 0)), 'p': str(order.get('price', 0)), 'sp': str(order.get('stopPrice', 0)),
+            'cp': order.get('closePosition', False), 'rp': '0', 'T': now,
+        }})
+
+    def _emit_fill(self, symbol, side, order_id, order_type, avg_price, quantity, realized, fee, trade_id, status='FILLED'):
+        now = self.now_ms()
+        self._emit({'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': {
+            's': symbol, 'S': side, 'o': order_type, 'i': order_id, 't': trade_id, 'x': 'TRADE', 'X': status,
+            'q': str(quantity), 'l': str(quantity), 'z': str(quantity), 'L': str(avg_price), 'ap': str(avg_price),
+            'n': f"{fee:.8f}", 'N': self.quote, 'rp': f"{realized:.8f}", 'T': now,
+        }})
+        position = self.positions.get(symbol, {'qty': 0.0, 'entry_price': 0.0})
+        self._emit({'e': 'ACCOUNT_UPDATE', 'E': now, 'T': now, 'a': {
+            'm': 'ORDER',
+            'B': [{'a': self.quote, 'wb': f"{self.wallet[self.quote]:.8f}", 'cw': f"{self.wallet[self.quote]:.8f}"}],
+            'P': [{'s': symbol, 'pa': str(position['qty']), 'ep': str(position['entry_price']), 'ps': 'BOTH'}],
+        }})
+
+    def _available(self):
+        used = sum(abs(p['qty']) * p['entry_price'] / p['leverage'] for p in self.positions.values())
+        return self.wallet[self.quote] + self._unrealized() - used
+
+    def _unrealized(self):
+        total = 0.0
+        for symbol, position in self.positions.items():
+            book = self.books.get(symbol)
+            if book and book['bids'] and book['asks']:
+                mark = (book['bids'][0][0] + book['asks'][0][0]) / 2
+                total += (mark - position['entry_price']) * position['qty']
+        return total
+
+    def _fill_futures(self, symbol, side, quantity, reduce_only=False, order_id=None, order_type='MARKET', price=None, status='FILLED'):
+        position = self.positions.get(symbol, {'qty': 0.0, 'entry_price': 0.0, 'leverage': self.leverage.get(symbol, 1)})
+        signed = quantity if side == 'BUY' else -quantity
+        if reduce_only:
+            if position['qty'] == 0 or (position['qty'] > 0) == (signed > 0):
+                raise PaperExchangeError(-2022, "ReduceOnly Order is rejected.")
+            signed = max(-abs(position['qty']), min(abs(position['qty']), signed))
+            quantity = abs(signed)
+        # A resting LIMIT order fills at its own price
+        avg_price, fills = (price, [(price, quantity)]) if price is not None else self._walk(symbol, side, quantity)
+        fee = avg_price * quantity * self.fee_rate
+        closing = position['qty'] != 0 and (position['qty'] > 0) != (signed > 0)
+        opening_qty = abs(signed) - (min(abs(signed), abs(position['qty'])) if closing else 0)
+        if opening_qty > 0:
+            margin = opening_qty * avg_price / position['leverage']
+            if margin + fee > self._available():
+                raise PaperExchangeError(-2019, "Margin is insufficient.")
+        realized = 0.0
+        if closing:
+            closed = min(abs(signed), abs(position['qty']))
+            direction = 1 if position['qty'] > 0 else -1
+            realized = (avg_price - position['entry_price']) * closed * direction
+            self.wallet[self.quote] += realized
+            self._record_income(symbol, 'REALIZED_PNL', realized, self.fills + 1)
+        new_qty = position['qty'] + signed
+        if abs(new_qty) < 1e-12:
+            self.positions.pop(symbol, None)
+            # Nothing left to protect: drop the closePosition orders for this symbol
+            open_orders = self.orders.get(symbol, {})
+            for open_id, open_order in list(open_orders.items()):
+                if open_order.get('closePosition'):
+                    del open_orders[open_id]
+                    self._emit_order(open_order, 'EXPIRED')
+        else:
+            if not closing or (new_qty > 0) != (position['qty'] > 0):
+                if closing:
+                    position['entry_price'] = avg_price
+                else:
+                    total = abs(position['qty']) + abs(signed)
+                    position['entry_price'] = (position['entry_price'] * abs(position['qty']) + avg_price * abs(signed)) / total
+            position['qty'] = new_qty
+            self.positions[symbol] = position
+        self.wallet[self.quote] -= fee
+        self._record_income(symbol, 'COMMISSION', -fee, self.fills + 1)
+        self.fills += 1
+        self._emit_fill(symbol, side, order_id, order_type, avg_price, quantity, realized, fee, self.fills, status)
+        return avg_price, quantity, fills, realized, fee
+
+    def _fill_spot(self, symbol, side, quantity, price=None):
+        base = self._base_asset(symbol)
+        avg_price, fills = (price, [(price, quantity)]) if price is not None else self._walk(symbol, side, quantity)
+        notional = avg_price * quantity
+        fee = notional * self.fee_rate
+        if side == 'BUY':
+            if notional + fee > self.spot.get(self.quote, 0.0):
+                raise PaperExchangeError(-2010, "Account has insufficient balance for requested action.")
+            self.spot[self.quote] -= notional + fee
+            self.spot[base] = self.spot.get(base, 0.0) + quantity
+        else:
+            if quantity > self.spot.get(base, 0.0) + 1e-12:
+                raise PaperExchangeError(-2010, "Account has insufficient balance for requested action.")
+            self.spot[base] -= quantity
+            self.spot[self.quote] += notional - fee
+        self.fills += 1
+        now = self.now_ms()
+        self._emit({'e': 'outboundAccountPosition', 'E': now, 'u': now, 'B': [
+            {'a': asset, 'f': f"{self.spot.get(asset, 0.0):.8f}", 'l': f"{self.spot_locked.get(asset, 0.0):.8f}"} for asset in (base, self.quote)
+        ]})
+        return avg_price, fills, fee
+
+    def _base_asset(self, symbol):
+        return symbol[:-len(self.quote)] if symbol.endswith(self.quote) else symbol
+
+    def _lock_spot(self, order):
+        """Move what a spot LIMIT order can spend from free to locked, rejecting it if the funds are not there"""
+        if order['side'] == 'BUY':
+            asset, amount = self.quote, order['origQty'] * order['price'] * (1 + self.fee_rate)
+        else:
+            asset, amount = self._base_asset(order['symbol']), order['origQty']
+        if amount > self.spot.get(asset, 0.0) + 1e-12:
+            raise PaperExchangeError(-2010, "Account has insufficient balance for requested action.")
+        self.spot[asset] -= amount
+        self.spot_locked[asset] = self.spot_locked.get(asset, 0.0) + amount
+        order['locked'] = amount
+
+    def _unlock_spot(self, order, amount):
+        asset = self.quote if order['side'] == 'BUY' else self._base_asset(order['symbol'])
+        amount = min(amount, order.get('locked', 0.0))
+        order['locked'] = order.get('locked', 0.0) - amount
+        self.spot_locked[asset] = self.spot_locked.get(asset, 0.0) - amount
+        self.spot[asset] = self.spot.get(asset, 0.0) + amount
+
+    def _match_limit(self, order, resting):
+        """Fill what the book offers at or better than the order's price; a resting order fills at its own price"""
+        remaining = order['origQty'] - order['executedQty']
+        left = remaining
+        fills = []
+        for level_price, available in self._book(order['symbol'])['asks' if order['side'] == 'BUY' else 'bids']:
+            if (level_price > order['price']) if order['side'] == 'BUY' else (level_price < order['price']):
+                break
+            take = min(left, available)
+            fills.append((order['price'] if resting else level_price, take))
+            left -= take
+            if left <= 1e-12:
+                break
+        quantity = remaining - max(left, 0.0)
+        if quantity <= 0:
+            return
+        avg_price = sum(p * q for p, q in fills) / quantity
+        status = 'FILLED' if left <= 1e-12 else 'PARTIALLY_FILLED'
+        if order['market'] == 'SPOT':
+            # The filled share of the lock goes back to free and pays for the fill
+            self._unlock_spot(order, order['locked'] * quantity / remaining)
+            self._fill_spot(order['symbol'], order['side'], quantity, avg_price)
+        else:
+            self._fill_futures(order['symbol'], order['side'], quantity, order['reduceOnly'], order['orderId'], 'LIMIT', avg_price, status)
+        order['executedQty'] += quantity
+        order['cumQuote'] += avg_price * quantity
+        order['status'] = status
+        order['updateTime'] = self.now_ms()
+
+    def _close_order(self, order, status):
+        self.orders.get(order['symbol'], {}).pop(order['orderId'], None)
+        if order.get('locked'):
+            self._unlock_spot(order, order['locked'])
+        order['status'] = status
+        self.closed_orders[order['orderId']] = order
+
+    def _check_triggers(self, symbol):
+        book = self.books[symbol]
+        price = (book['bids'][0][0] + book['asks'][0][0]) / 2
+        for order in list(self.orders.get(symbol, {}).values()):
+            if order['type'] == 'LIMIT':
+                if order['orderId'] not in self.orders.get(symbol, {}):
+                    continue
+                try:
+                    self._match_limit(order, resting=True)
+                except PaperExchangeError as e:
+                    # e.g. margin used up since the order was placed
+                    print(f"Paper LIMIT order {order['orderId']} expired: {e.msg}")
+                    self._close_order(order, 'EXPIRED')
+                    self._emit_order(order, 'EXPIRED')
+                    continue
+                if order['status'] == 'FILLED':
+                    self._close_order(order, 'FILLED')
+                continue
+            if order['type'] == 'STOP_MARKET':
+                hit = price <= order['stopPrice'] if order['side'] == 'SELL' else price >= order['stopPrice']
+            else:
+                hit = price >= order['stopPrice'] if order['side'] == 'SELL' else price <= order['stopPrice']
+            if not hit or symbol not in self.orders or order['orderId'] not in self.orders[symbol]:
+                continue
+            del self.orders[symbol][order['orderId']]
+            position = self.positions.get(symbol)
+            if position:
+                self._fill_futures(symbol, order['side'], abs(position['qty']), True, order['orderId'], order['type'])
+            order['status'] = 'FILLED'
+
+    # --- Binance-shaped endpoints ---
+
+    def place_order(self, market, params):
+        symbol = params['symbol']
+        side = params['side']
+        order_type = params['type']
+        order_id = self._next_order_id
+        self._next_order_id += 1
+        base = {'orderId': order_id, 'symbol': symbol, 'side': side, 'type': order_type, 'updateTime': self.now_ms()}
+        if order_type == 'MARKET':
+            quantity = float(params['quantity'])
+            if quantity <= 0:
+                raise PaperExchangeError(-4003, "Quantity less than or equal to zero.")
+            if market == 'SPOT':
+                avg_price, fills, fee = self._fill_spot(symbol, side, quantity)
+                return dict(base, status='FILLED', executedQty=str(quantity), cummulativeQuoteQty=str(avg_price * quantity),
+                            fills=[{'price': str(p), 'qty': str(q), 'commission': str(fee * q / quantity)} for p, q in fills])
+            avg_price, quantity, fills, realized, fee = self._fill_futures(symbol, side, quantity, params.get('reduceOnly') == 'true', order_id)
+            return dict(base, status='FILLED', executedQty=str(quantity), avgPrice=str(avg_price), cumQuote=str(avg_price * quantity))
+        if order_type == 'LIMIT':
+            quantity = float(params['quantity'])
+            if quantity <= 0:
+                raise PaperExchangeError(-4003, "Quantity less than or equal to zero.")
+            order = dict(base, market=market, status='NEW', price=float(params['price']), origQty=quantity, executedQty=0.0, cumQuote=0.0,
+                         timeInForce=params.get('timeInForce', 'GTC'), reduceOnly=params.get('reduceOnly') == 'true')
+            if market == 'SPOT':
+                self._lock_spot(order)
+            self._match_limit(order, resting=False)
+            if order['status'] == 'FILLED':
+                self._close_order(order, 'FILLED')
+            elif order['timeInForce'] == 'IOC':
+                self._close_order(order, 'EXPIRED')
+                self._emit_order(order, 'EXPIRED')
+            else:
+                self.orders.setdefault(symbol, {})[order_id] = order
+                self._emit_order(order, order['status'])
+            return self._order_view(order)
+        if market == 'FUTURES' and order_type in ('STOP_MARKET', 'TAKE_PROFIT_MARKET'):
+            if params.get('closePosition') != 'true':
+                raise PaperExchangeError(-1106, "Only closePosition conditional orders are simulated.")
+            order = dict(base, status='NEW', stopPrice=float(params['stopPrice']), closePosition=True)
+            self.orders.setdefault(symbol, {})[order_id] = order
+            self._emit_order(order, 'NEW')
+            return self._order_view(order)
+        raise PaperExchangeError(-1116, f"Invalid orderType {order_type} for {market}.")
+
+    def _find_order(self, params):
+        order_id = int(params['orderId'])
+        order = self.orders.get(params['symbol'], {}).get(order_id) or self.closed_orders.get(order_id)
+        if order is None or order['symbol'] != params['symbol']:
+            raise PaperExchangeError(-2013, "Order does not exist.")
+        return order
+
+    def cancel_order(self, params):
+        order = self._find_order(params)
+        if order['orderId'] not in self.orders.get(order['symbol'], {}):
+            raise PaperExchangeError(-2011, "Unknown order sent.")
+        self._close_order(order, 'CANCELED')
+        self._emit_order(order, 'CANCELED')
+        return self._order_view(order)
+
+    @staticmethod
+    def _order_view(order):
+        """An order as Binance returns it: numbers as strings, spot and futures fill fields"""
+        view = {key: str(value) if isinstance(value, float) else value for key, value in order.items() if key not in ('market', 'locked')}
+        if 'executedQty' in order:
+            if order.get('market') == 'SPOT':
+                view['cummulativeQuoteQty'] = view.pop('cumQuote')
+            else:
+                view['avgPrice'] = str(order['cumQuote'] / order['executedQty'] if order['executedQty'] else 0.0)
+        return view
+
+    def account(self, market):
+        if market == 'SPOT':
+            assets = list(self.spot) + [a for a in self.spot_locked if a not in self.spot]
+            return {'balances': [{'asset': a, 'free': f"{self.spot.get(a, 0.0):.8f}", 'locked': f"{self.spot_locked.get(a, 0.0):.8f}"} for a in assets]}
+        unrealized = self._unrealized()
+        wallet = self.wallet[self.quote]
+        asset = {
+            'asset': self.quote, 'walletBalance': f"{wallet:.8f}", 'availableBalance': f"{self._available():.8f}",
+            'marginBalance': f"{wallet + unrealized:.8f}", 'unrealizedProfit': f"{unrealized:.8f}", 'unrealizedPnl': f"{unrealized:.8f}",
+        }
+        return {
+            'assets': [asset],
+            'totalWalletBalance': wallet,
+            'totalUnrealizedProfit': unrealized,
+            'totalUnrealizedPnl': unrealized,
+            'positions': [
+                {'symbol': s, 'positionAmt': str(p['qty']), 'entryPrice': str(p['entry_price']), 'leverage': str(p['leverage'])}
+                for s, p in self.positions.items()
+            ],
+        }
+
+    def request(self, method, market, path, params=None, signed=False):
+        params = dict(params or {})
+        # Seeding happens before the lock is taken, so a slow price source holds up no other caller
+        self.refresh_prices()
+        symbol = params.get('symbol')
+        if symbol and self.price_source is not None and (symbol not in self.books or self._stale_seed(symbol)):
+            self._seed(symbol, market)
+        with self._lock:
+            if path in ('/fapi/v1/order', '/api/v3/order'):
+                if method == 'POST':
+                    return self.place_order(market, params)
+                if method == 'DELETE':
+                    return self.cancel_order(params)
+                return self._order_view(self._find_order(params))
+            if path == '/fapi/v1/leverage' and method == 'POST':
+                self.leverage[params['symbol']] = int(params['leverage'])
+                self._emit({'e': 'ACCOUNT_CONFIG_UPDATE', 'E': self.now_ms(), 'ac': {'s': params['symbol'], 'l': int(params['leverage'])}})
+                return {'symbol': params['symbol'], 'leverage': int(params['leverage'])}
+            if path in ('/fapi/v2/account', '/api/v3/account'):
+                return self.account(market)
+            if path in ('/fapi/v1/ticker/price', '/api/v3/ticker/price'):
+                return {'symbol': params['symbol'], 'price': str(self.mid_price(params['symbol']))}
+            if path in ('/fapi/v1/ticker/bookTicker', '/api/v3/ticker/bookTicker'):
+                book = self._book(params['symbol'])
+                return {
+                    'symbol': params['symbol'], 'bidPrice': str(book['bids'][0][0]), 'bidQty': str(book['bids'][0][1]),
+                    'askPrice': str(book['asks'][0][0]), 'askQty': str(book['asks'][0][1]),
+                }
+            if path == '/fapi/v1/income':
+                start = int(params.get('startTime', 0))
+                end = int(params.get('endTime', 2 ** 63))
+                income_type = params.get('incomeType')
+                # Binance defaults to 100 records per page and caps it at 1000
+                limit = min(int(params.get('limit', 100)), 1000)
+                return [i for i in self.income if start <= i['time'] <= end and (not income_type or i['incomeType'] == income_type)][:limit]
+            if path in ('/fapi/v1/listenKey', '/api/v3/userDataStream'):
+                # Fills are pushed straight to event listeners, so any key will do
+                return {'listenKey': 'paper'} if method == 'POST' else {}
+            if path == '/fapi/v1/openOrders':
+                symbols = [params['symbol']] if 'symbol' in params else list(self.orders)
+                return [self._order_view(o) for s in symbols for o in self.orders.get(s, {}).values()]
+        raise PaperExchangeError(-1000, f"{method} {path} is not simulated")
+
+    def get(self, market, path, params=None, signed=False, priority=None):
+        return self.request('GET', market, path, params, signed)
+
+    def post(self, market, path, params=None, signed=False, priority=None):
+        return self.request('POST', market, path, params, signed)
+
+    def delete(self, market, path, params=None, signed=False, priority=None):
+        return self.request('DELETE', market, path, params, signed)
+
+    def latency_stats(self):
+        return {}
+
+_paper_exchanges = {}
+_paper_lock = threading.Lock()
+
+TICKER_PATHS = {'SPOT': '/api/v3/ticker/price', 'FUTURES': '/fapi/v1/ticker/price'}
+
+def _stream_price_source(symbol, market):
+    """Seed books from the market data stream, if it carries this market (no network I/O)"""
+    from market_data_stream import get_active_stream
+    stream = get_active_stream()
+    if stream is None or stream.market != market:
+        return None
+    return stream.get_price(symbol)
+
+def _rest_price_source(symbol, market):
+    """The streamed price, else the market's public REST ticker (PAPER_REST_PRICES=1)"""
+    from binance_client import get_client
+    price = _stream_price_source(symbol, market)
+    if price is not None:
+        return price
+    try:
+        return float(get_client().get(market, TICKER_PATHS[market], {'symbol': symbol})['price'])
+    except Exception as e:
+        print(f"Paper exchange price error: {e}")
+        return None
+
+def get_paper_exchange(config=None):
+    """Return the simulated exchange used when PAPER_TRADING=1, one per ACCOUNT_NAME"""
+    config = config or {}
+    name = config.get('ACCOUNT_NAME', '')
+    exchange = _paper_exchanges.get(name)
+    if exchange is None:
+        with _paper_lock:
+            exchange = _paper_exchanges.get(name)
+            if exchange is None:
+                # PAPER_BALANCE is split between the markets, never counted twice
+                balance = config.get('PAPER_BALANCE', 10000.0)
+                spot_balance = balance * config.get('PAPER_SPOT_PERCENT', 50) / 100
+                exchange = PaperExchange(
+                    balance=balance - spot_balance,
+                    fee_percent=config.get('PAPER_FEE_PERCENT', 0.04),
+                    # Offline unless asked: only the stream seeds symbols no tick feed covers
+                    price_source=_rest_price_source if config.get('PAPER_REST_PRICES') == 1 else _stream_price_source,
+                    spot_balance=spot_balance,
+                )
+                _paper_exchanges[name] = exchange
+    return exchange
@@ -0,0 +1,115 @@
+import asyncio
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from gemini_strategy import get_trade_signal, get_batch_trade_signals, get_trade_signal_async, get_batch_trade_signals_async
+from binance_api import execute_trade, execute_trade_async
+from resilience import submit
+
+def rank_signals(signals):
+    """Actionable signals before HOLDs, then higher confidence first"""
+    signals = [s for s in signals if s and 'action' in s]
+    signals.sort(key=lambda s: (s['action'] == 'HOLD', -s.get('confidence', 0)))
+    return signals
+
+def evaluate_symbols(market_data, strategy, max_workers=8):
+    """Run strategy([coin]) for every coin on a bounded pool, return signals ranked best first"""
+    if not market_data:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(market_data)))) as pool:
+        futures = [submit(pool, strategy, [coin]) for coin in market_data]
+        return rank_signals([future.result() for future in futures])
+
+def select_trades(signals, max_trades, min_confidence=0):
+    """Pick up to max_trades actionable signals with at most one trade per symbol"""
+    selected = []
+    seen_symbols = set()
+    for signal in signals:
+        if len(selected) >= max_trades:
+            break
+        if signal['action'] not in ('BUY', 'SELL') or signal.get('confidence', 0) < min_confidence:
+            continue
+        # A spot BUY and a futures SELL on the same symbol would fight each other
+        if signal.get('symbol') in seen_symbols:
+            continue
+        seen_symbols.add(signal.get('symbol'))
+        selected.append(signal)
+    return selected
+
+def attach_signal_prices(signals, market_data, quote='USDT'):
+    """Copies of the signals carrying the snapshot price they were decided on as 'price',
+    the reference execution measures slippage (implementation shortfall) against"""
+    prices = {f"{coin['symbol'].upper()}{quote}": coin.get('price') for coin in market_data or [] if coin.get('symbol')}
+    return [dict(signal, price=prices[signal.get('symbol')]) if prices.get(signal.get('symbol')) else signal for signal in signals]
+
+def execute_signals(signals, config, max_workers=4):
+    """Send the selected signals through execute_trade concurrently, results in signal order"""
+    if not signals:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(signals)))) as pool:
+        futures = [submit(pool, execute_trade, signal, config) for signal in signals]
+        return [future.result() for future in futures]
+
+def run_pipeline(market_data, config, strategy=None):
+    """Evaluate every symbol in parallel and execute the best non-conflicting signals.
+
+    Returns (ranked_signals, trade_results).
+    """
+    concurrency = config.get('PIPELINE_CONCURRENCY', 8)
+    if strategy is None and config.get('BATCH_SIGNALS') == 1:
+        # One model round trip for the whole universe
+        signals = rank_signals(get_batch_trade_signals(market_data, config.get('GEMINI_API_KEY')))
+    else:
+        if strategy is None:
+            strategy = lambda coins: get_trade_signal(coins, config.get('GEMINI_API_KEY'))
+        signals = evaluate_symbols(market_data, strategy, concurrency)
+    selected = attach_signal_prices(select_trades(signals, config.get('MAX_TRADES_PER_TICK', 1), config.get('MIN_SIGNAL_CONFIDENCE', 0)), market_data)
+    return signals, execute_signals(selected, config, concurrency)
+
+async def _run_strategy(strategy, coins):
+    if asyncio.iscoroutinefunction(strategy):
+        return await strategy(coins)
+    # Synchronous strategies (signal cache, rules) may block, so they run off the loop
+    result = await asyncio.to_thread(strategy, coins)
+    return await result if inspect.isawaitable(result) else result
+
+async def evaluate_symbols_async(market_data, strategy, max_concurrency=8):
+    """evaluate_symbols() on the event loop: at most max_concurrency strategy calls in flight"""
+    if not market_data:
+        return []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def evaluate(coin):
+        async with semaphore:
+            return await _run_strategy(strategy, [coin])
+
+    return rank_signals(await asyncio.gather(*[evaluate(coin) for coin in market_data]))
+
+async def execute_signals_async(signals, config, max_concurrency=4, on_result=None):
+    """execute_signals() on the event loop; on_result(result) runs on a worker thread as each
+    trade finishes, so logging and alerting overlap the orders still in flight without
+    blocking the loop. Results come back in signal order."""
+    if not signals:
+        return []
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def execute(signal):
+        async with semaphore:
+            result = await execute_trade_async(signal, config)
+        if on_result is not None:
+            await asyncio.to_thread(on_result, result)
+        return result
+
+    return await asyncio.gather(*[execute(signal) for signal in signals])
+
+async def run_pipeline_async(market_data, config, strategy=None, on_result=None):
+    """run_pipeline() on the event loop, returns (ranked_signals, trade_results)"""
+    concurrency = config.get('PIPELINE_CONCURRENCY', 8)
+    if strategy is None and config.get('BATCH_SIGNALS') == 1:
+        signals = rank_signals(await get_batch_trade_signals_async(market_data, config.get('GEMINI_API_KEY')))
+    else:
+        if strategy is None:
+            async def strategy(coins):
+                return await get_trade_signal_async(coins, config.get('GEMINI_API_KEY'))
+        signals = await evaluate_symbols_async(market_data, strategy, concurrency)
+    selected = attach_signal_prices(select_trades(signals, config.get('MAX_TRADES_PER_TICK', 1), config.get('MIN_SIGNAL_CONFIDENCE', 0)), market_data)
+    return signals, await execute_signals_async(selected, config, concurrency, on_result)
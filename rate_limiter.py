@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+
+# Request weights as documented by Binance; anything not listed costs 1
+ENDPOINT_WEIGHTS = {
+    '/api/v3/account': 20,
+    '/fapi/v2/account': 5,
+    '/fapi/v1/income': 30,
+    '/api/v3/exchangeInfo': 20,
+    '/fapi/v1/exchangeInfo': 1,
+    '/fapi/v1/ticker/price': 1,
+    '/api/v3/ticker/price': 2,
+    '/fapi/v1/ticker/bookTicker': 2,
+    '/api/v3/ticker/bookTicker': 2,
+}
+
+ORDER_PATHS = {'/api/v3/order', '/fapi/v1/order'}
+
+# Balance and history reads are the first to wait or be dropped when weight runs low
+LOW_PRIORITY_PATHS = {'/api/v3/account', '/fapi/v2/account', '/fapi/v1/income', '/fapi/v1/openOrders'}
+
+# Binance's published limits: (request weight per minute, [(orders, window seconds), ...])
+DEFAULT_LIMITS = {
+    'FUTURES': (2400, [(1200, 60), (300, 10)]),
+    'SPOT': (6000, [(100, 10), (200000, 86400)]),
+}
+
+# Share of the weight budget each priority must leave untouched
+RESERVES = {'order': 0.0, 'normal': 0.1, 'low': 0.3}
+
+ORDER_COUNT_WINDOWS = {'10s': 10, '1m': 60, '1d': 86400}
+
+class RateLimitExceeded(Exception):
+    """A request was shed, or would wait past max_wait, to stay under Binance's limits"""
+
+class TokenBucket:
+    """capacity tokens refilled evenly over window seconds"""
+
+    def __init__(self, capacity, window):
+        self.capacity = float(capacity)
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, floor=0.0):
+        """Seconds until amount can be taken while leaving floor tokens (after refill)"""
+        missing = amount + floor - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def sync_used(self, used):
+        # The server's count wins when it has seen more than we accounted for
+        self.tokens = min(self.tokens, self.capacity - used)
+
+class OrderBudget:
+    """One API key's order-count buckets and the last X-MBX-ORDER-COUNT values"""
+
+    def __init__(self, limits):
+        self.buckets = {window: TokenBucket(count, window) for count, window in limits}
+        self.server_used = {}
+
+class RateLimiter:
+    """Client-side request-weight and order-count budget for one Binance market.
+
+    acquire() takes tokens before a request: order calls may use the whole
+    budget, normal calls leave 10% and low-priority calls (balance checks) 30%
+    untouched. When tokens run short, orders and normal calls wait up to
+    max_wait and low-priority calls are shed. update() re-syncs the buckets from
+    the X-MBX-USED-WEIGHT / X-MBX-ORDER-COUNT headers and honours Retry-After on
+    429/418 so a ban is never extended.
+
+    Binance counts weight per IP but orders per account, so the weight bucket is
+    shared by every client while each API key (key=) gets its own OrderBudget.
+    """
+
+    def __init__(self, market, weight_limit=None, order_limits=None, safety=0.9, max_wait=5.0):
+        default_weight, default_orders = DEFAULT_LIMITS[market]
+        self.market = market
+        self.safety = safety
+        self.max_wait = max_wait
+        self.weight = TokenBucket((weight_limit or default_weight) * safety, 60)
+        self.order_limits = [(count * safety, window) for count, window in (order_limits or default_orders)]
+        self.orders = {}
+        self.banned_until = 0.0
+        self.stats = {'requests': 0, 'weight': 0, 'orders': 0, 'waits': 0, 'wait_seconds': 0.0, 'shed': 0, 'throttled': 0}
+        self.server_used = {}
+        self._cond = threading.Condition()
+
+    def _budget(self, key):
+        """The key's order budget, created on first use (called with the lock held)"""
+        budget = self.orders.get(key)
+        if budget is None:
+            budget = self.orders[key] = OrderBudget(self.order_limits)
+        return budget
+
+    def _wait_time(self, now, weight, priority, order_buckets):
+        if self.banned_until > now:
+            return self.banned_until - now
+        for bucket in [self.weight] + order_buckets:
+            bucket.refill(now)
+        wait = self.weight.wait_time(weight, self.weight.capacity * RESERVES[priority])
+        return max([wait] + [bucket.wait_time(1) for bucket in order_buckets])
+
+    def _take(self, deadline, weight, priority, order, key):
+        """Take the tokens and return 0, or return the seconds to wait (called with the lock held)"""
+        now = time.monotonic()
+        order_buckets = list(self._budget(key).buckets.values()) if order else []
+        wait = self._wait_time(now, weight, priority, order_buckets)
+        if wait <= 0:
+            self.weight.tokens -= weight
+            if order:
+                for bucket in order_buckets:
+                    bucket.tokens -= 1
+                self.stats['orders'] += 1
+            self.stats['requests'] += 1
+            self.stats['weight'] += weight
+            return 0
+        if priority == 'low':
+            self.stats['shed'] += 1
+            raise RateLimitExceeded(f"{self.market} low-priority request shed, {wait:.1f}s until weight is available")
+        if now + wait > deadline:
+            self.stats['shed'] += 1
+            raise RateLimitExceeded(f"{self.market} request would wait {wait:.1f}s for the rate limit")
+        self.stats['waits'] += 1
+        self.stats['wait_seconds'] += wait
+        return wait
+
+    def acquire(self, weight=1, priority='normal', order=False, key=None):
+        """Block until the request fits the budget (orders: the key's); raises RateLimitExceeded if shed or out of time"""
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while True:
+                wait = self._take(deadline, weight, priority, order, key)
+                if not wait:
+                    return
+                self._cond.wait(wait)
+
+    async def acquire_async(self, weight=1, priority='normal', order=False, key=None):
+        """acquire() that sleeps on the event loop instead of blocking it"""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._cond:
+                wait = self._take(deadline, weight, priority, order, key)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def update(self, headers, status=200, key=None):
+        """Re-sync from a response's rate-limit headers (case-insensitive mapping); order counts are the key's"""
+        now = time.monotonic()
+        with self._cond:
+            for name, value in headers.items():
+                name = name.lower()
+                if name.startswith('x-mbx-used-weight-'):
+                    self.server_used['weight_' + name[len('x-mbx-used-weight-'):]] = int(value)
+                    if name.endswith('-1m'):
+                        self.weight.refill(now)
+                        self.weight.sync_used(int(value))
+                elif name.startswith('x-mbx-order-count-'):
+                    interval = name[len('x-mbx-order-count-'):]
+                    budget = self._budget(key)
+                    budget.server_used['orders_' + interval] = int(value)
+                    bucket = budget.buckets.get(ORDER_COUNT_WINDOWS.get(interval))
+                    if bucket is not None:
+                        bucket.refill(now)
+                        bucket.sync_used(int(value))
+            if status in (418, 429):
+                self.stats['throttled'] += 1
+                retry_after = headers.get('Retry-After')
+                self.banned_until = max(self.banned_until, now + (int(retry_after) if retry_after else 60))
+                print(f"Binance {self.market} rate limit hit ({status}), pausing requests for {self.banned_until - now:.0f}s")
+            self._cond.notify_all()
+
+    def usage(self):
+        """Current budget use: local token estimate, last server counts and counters.
+
+        orders_used holds each API key's order buckets, labelled by the key's last 4 characters.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.weight.refill(now)
+            orders_used = {}
+            for key, budget in self.orders.items():
+                used = {}
+                for window, bucket in budget.buckets.items():
+                    bucket.refill(now)
+                    used[window] = round(bucket.capacity - bucket.tokens, 1)
+                orders_used[(key or '')[-4:] or 'unsigned'] = {**used, **budget.server_used}
+            return {
+                'weight_used': round(self.weight.capacity - self.weight.tokens, 1),
+                'weight_capacity': self.weight.capacity,
+                'orders_used': orders_used,
+                'server_used': dict(self.server_used),
+                'banned_for': max(0.0, round(self.banned_until - now, 1)),
+                **self.stats,
+            }
+
+def request_cost(method, path):
+    """(weight, priority, is_order) for a REST call"""
+    # Cancels share the order priority but do not count towards the order limits
+    priority = 'order' if path in ORDER_PATHS else 'low' if path in LOW_PRIORITY_PATHS else 'normal'
+    return ENDPOINT_WEIGHTS.get(path, 1), priority, path in ORDER_PATHS and method == 'POST'
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_limiter_options = {}
+
+def configure_rate_limits(**options):
+    """Set RateLimiter options (safety, max_wait, weight_limit, ...) for limiters created from now on"""
+    _limiter_options.update(options)
+
+def get_rate_limiter(market):
+    """Return the process-wide limiter for a market (Binance counts weight per IP, so every client shares it;
+    order counts are kept per API key inside it)"""
+    limiter = _limiters.get(market)
+    if limiter is not None:
+        return limiter
+    with _limiters_lock:
+        limiter = _limiters.get(market)
+        if limiter is None:
+            limiter = RateLimiter(market, **_limiter_options)
+            _limiters[market] = limiter
+        return limiter
+
+def rate_limit_usage():
+    """usage() of every limiter in use, keyed by market"""
+    return {market: limiter.usage() for market, limiter in list(_limiters.items())}
@@ -0,0 +1,330 @@
+import asyncio
+import contextvars
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+import aiohttp
+import requests
+import urllib3
+
+# Defaults for every service; SERVICE_POLICIES overrides per service, configure_services() on top
+DEFAULT_POLICY = {
+    'attempts': 3,            # tries per call, including the first
+    'base_delay': 0.2,        # backoff before retry n is uniform(0, min(max_delay, base_delay * 2**n))
+    'max_delay': 2.0,
+    'timeout': 10,            # per attempt, capped by the stage budget
+    'hedge_after': 0,         # seconds before a duplicate idempotent GET is sent (0 = never)
+    'failure_threshold': 5,   # consecutive transient failures that open the circuit
+    'reset_timeout': 30,      # seconds an open circuit fails fast before letting one probe through
+}
+
+SERVICE_POLICIES = {
+    'coingecko': {},
+    'gemini': {'timeout': 15, 'attempts': 2},
+    'binance-spot': {},
+    'binance-futures': {},
+}
+
+class CircuitOpenError(Exception):
+    """The service failed repeatedly and calls to it fail fast until the reset timeout passes"""
+
+class DeadlineExceeded(Exception):
+    """The stage's latency budget ran out before the call could succeed"""
+
+class CircuitBreaker:
+    """Closed → open after failure_threshold consecutive failures; once reset_timeout
+    has passed a single probe call is let through (half-open) and its outcome
+    closes or re-opens the circuit."""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """The call ended without telling us anything about the service (e.g. shed locally)"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"{self.name} circuit opened after {self.failures} consecutive failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+# Errors meaning the service answered (requests and aiohttp flavours)
+HTTP_ERRORS = (requests.exceptions.HTTPError, aiohttp.ClientResponseError)
+
+# Errors raised while opening the connection (connect timeout, refused, DNS failure): nothing was sent
+CONNECT_ERRORS = (requests.exceptions.ConnectTimeout, aiohttp.ClientConnectorError, urllib3.exceptions.ConnectTimeoutError,
+                  ConnectionRefusedError, socket.gaierror)
+
+def never_sent(error):
+    """True if error, or an error it wraps, happened before the request could leave"""
+    seen = set()
+    while isinstance(error, BaseException) and id(error) not in seen:
+        if isinstance(error, CONNECT_ERRORS):
+            return True
+        seen.add(id(error))
+        # requests wraps urllib3's MaxRetryError, which keeps the connect error in .reason
+        reason = getattr(error, 'reason', None)
+        wrapped = [a for a in error.args if isinstance(a, BaseException)]
+        error = reason if isinstance(reason, BaseException) else error.__cause__ or error.__context__ or (wrapped[0] if wrapped else None)
+    return False
+
+def is_transient(error, idempotent=True):
+    """True if retrying could help; non-idempotent calls only retry when the request never left"""
+    if never_sent(error):
+        return True
+    if not idempotent:
+        return False
+    if isinstance(error, HTTP_ERRORS):
+        if isinstance(error, aiohttp.ClientResponseError):
+            status = error.status
+        else:
+            status = error.response.status_code if error.response is not None else 0
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+_deadline = contextvars.ContextVar('stage_deadline', default=None)
+
+@contextmanager
+def stage_budget(seconds):
+    """Bound every guarded call in the block (retries and backoff included) to seconds; 0/None = no budget.
+
+    Nested budgets only ever shorten the deadline. Work handed to a thread pool
+    keeps the budget when submitted through submit().
+    """
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+@contextmanager
+def no_budget():
+    """Run the block without a stage budget (e.g. protective orders for a position that is already open)"""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_time():
+    """Seconds left in the current stage budget, or None without one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def submit(executor, func, *args):
+    """executor.submit() that carries the caller's stage budget into the worker thread"""
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='hedge')
+
+class ServiceGuard:
+    """Retry, hedging and circuit-breaker policy for one external service"""
+
+    def __init__(self, name, **policy):
+        self.name = name
+        self.policy = dict(DEFAULT_POLICY, **policy)
+        self.breaker = CircuitBreaker(name, self.policy['failure_threshold'], self.policy['reset_timeout'])
+        self.stats = {'calls': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0, 'failures': 0, 'short_circuits': 0, 'deadline_exceeded': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        # Guards are shared by every thread calling the service
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _hedged(self, func, args, kwargs, timeout):
+        first = _hedge_executor.submit(func, *args, timeout=timeout, **kwargs)
+        done, _ = wait([first], self.policy['hedge_after'])
+        if done:
+            return first.result()
+        self._count('hedges')
+        second = _hedge_executor.submit(func, *args, timeout=max(timeout - self.policy['hedge_after'], 0.001), **kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _start_attempt(self, attempt, deadline, timeout, idempotent):
+        """Timeout for the next attempt; raises once the budget is spent or the circuit is open"""
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('deadline_exceeded')
+                raise DeadlineExceeded(f"{self.name}: stage budget exhausted after {attempt} attempt(s)")
+            if idempotent:
+                # An order cut off mid-flight has an unknown outcome, so the budget only gates starting it
+                timeout = min(timeout, remaining)
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            raise CircuitOpenError(f"{self.name} is unavailable, failing fast for up to {self.policy['reset_timeout']}s")
+        return timeout
+
+    def _retry_delay(self, error, attempt, deadline, idempotent):
+        """Backoff before the next attempt, or None when error should be raised"""
+        if not is_transient(error):
+            if isinstance(error, HTTP_ERRORS):
+                # The service answered, it just did not like the request
+                self.breaker.record_success()
+            else:
+                self.breaker.release()
+            return None
+        self.breaker.record_failure()
+        self._count('failures')
+        delay = random.uniform(0, min(self.policy['max_delay'], self.policy['base_delay'] * 2 ** attempt))
+        if attempt + 1 >= self.policy['attempts'] or not is_transient(error, idempotent) or (deadline is not None and time.monotonic() + delay >= deadline):
+            return None
+        self._count('retries')
+        return delay
+
+    def call(self, func, *args, idempotent=True, hedge=False, timeout=None, **kwargs):
+        """Run func(*args, timeout=..., **kwargs) under the policy and the current stage budget.
+
+        Raises the last error once retries or the budget run out, CircuitOpenError
+        while the circuit is open and DeadlineExceeded when no budget is left to try.
+        """
+        self._count('calls')
+        timeout = timeout or self.policy['timeout']
+        deadline = _deadline.get()
+        for attempt in range(self.policy['attempts']):
+            attempt_timeout = self._start_attempt(attempt, deadline, timeout, idempotent)
+            try:
+                if hedge and idempotent and 0 < self.policy['hedge_after'] < attempt_timeout:
+                    result = self._hedged(func, args, kwargs, attempt_timeout)
+                else:
+                    result = func(*args, timeout=attempt_timeout, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _hedged_async(self, func, args, kwargs, timeout):
+        first = asyncio.ensure_future(func(*args, timeout=timeout, **kwargs))
+        done, _ = await asyncio.wait([first], timeout=self.policy['hedge_after'])
+        if done:
+            return first.result()
+        self._count('hedges')
+        second = asyncio.ensure_future(func(*args, timeout=max(timeout - self.policy['hedge_after'], 0.001), **kwargs))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing request can actually be abandoned
+            for task in pending:
+                task.cancel()
+
+    async def call_async(self, func, *args, idempotent=True, hedge=False, timeout=None, **kwargs):
+        """call() for a coroutine function; hedges run as tasks and the loser is cancelled"""
+        self._count('calls')
+        timeout = timeout or self.policy['timeout']
+        deadline = _deadline.get()
+        for attempt in range(self.policy['attempts']):
+            attempt_timeout = self._start_attempt(attempt, deadline, timeout, idempotent)
+            try:
+                if hedge and idempotent and 0 < self.policy['hedge_after'] < attempt_timeout:
+                    result = await self._hedged_async(func, args, kwargs, attempt_timeout)
+                else:
+                    result = await func(*args, timeout=attempt_timeout, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def status(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return dict(stats, state=self.breaker.state)
+
+_guards = {}
+_guards_lock = threading.Lock()
+_guard_options = {}
+
+def configure_services(**policy):
+    """Set policy options (attempts, hedge_after, failure_threshold, ...) for every service guard created from now on"""
+    _guard_options.update(policy)
+
+def get_service(name):
+    """Return the process-wide guard for a service"""
+    guard = _guards.get(name)
+    if guard is not None:
+        return guard
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            guard = ServiceGuard(name, **dict(SERVICE_POLICIES.get(name, {}), **_guard_options))
+            _guards[name] = guard
+        return guard
+
+def call(service, func, *args, **kwargs):
+    """get_service(service).call(func, *args, **kwargs)"""
+    return get_service(service).call(func, *args, **kwargs)
+
+async def call_async(service, func, *args, **kwargs):
+    """get_service(service).call_async(func, *args, **kwargs)"""
+    return await get_service(service).call_async(func, *args, **kwargs)
+
+def service_status():
+    """Counters and circuit state of every guard in use, keyed by service"""
+    return {name: guard.status() for name, guard in list(_guards.items())}
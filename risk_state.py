@@ -0,0 +1,222 @@
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+DAILY_STATS_FILE = 'futures_daily_stats.json'
+
+def _today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+class RiskState:
+    """Daily futures trade count and realized PnL, held in memory.
+
+    Checks and reservations only take a thread lock. A background thread
+    persists changes at most every flush_interval seconds, and flush()/close()
+    write them at shutdown, with write-to-temp, fsync and rename so a crash
+    never leaves a torn file (and loses at most the last interval).
+
+    shared=True is for several bot processes trading off one file: every
+    mutation then also takes an flock on path + '.lock', picks up a newer file
+    written by another process, applies the change and writes it through.
+    """
+
+    def __init__(self, path=DAILY_STATS_FILE, shared=False, flush_interval=1.0):
+        self.path = path
+        self.shared = shared
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._version = None
+        self._stats = self._read() or self._fresh()
+        self._dirty = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        if not shared:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='risk-state')
+            self._thread.start()
+
+    def _stat_version(self):
+        # os.replace gives every write a new inode, so this changes even within one mtime tick
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    @staticmethod
+    def _fresh():
+        return {'date': _today(), 'trades': 0, 'realized_pnl': 0.0}
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                stats = json.load(f)
+            self._version = self._stat_version()
+            return {'date': stats['date'], 'trades': int(stats['trades']), 'realized_pnl': float(stats['realized_pnl'])}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Risk state read error: {e}")
+            return None
+
+    def _rollover(self):
+        if self._stats['date'] != _today():
+            self._stats = self._fresh()
+
+    def _write(self, stats):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(stats, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        self._version = self._stat_version()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+            # Batches a burst of reservations into one write
+            self._stopped.wait(self.flush_interval)
+
+    def flush(self):
+        """Write pending changes now (the background thread does this on its own)"""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                stats = dict(self._stats)
+                self._dirty = False
+            try:
+                self._write(stats)
+            except Exception as e:
+                print(f"Risk state save error: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def close(self):
+        """Stop the background writer and persist what is left"""
+        if self._thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _mutate(self, change):
+        """Apply change(stats) and return its result; persisted later, or at once when shared"""
+        if not self.shared:
+            with self._lock:
+                self._rollover()
+                result = change(self._stats)
+                self._dirty = True
+            if self._thread is None:
+                self.flush()  # closed: nothing left to write it later
+            else:
+                self._wake.set()
+            return result
+        with self._lock:
+            lock_file = open(self.path + '.lock', 'a') if fcntl else None
+            try:
+                if lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        if self._stat_version() != self._version:
+                            self._stats = self._read() or self._stats
+                    except FileNotFoundError:
+                        pass
+                self._rollover()
+                result = change(self._stats)
+                try:
+                    self._write(self._stats)
+                except Exception as e:
+                    print(f"Risk state save error: {e}")
+                return result
+            finally:
+                if lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    def snapshot(self):
+        """Today's {'date', 'trades', 'realized_pnl'}"""
+        with self._lock:
+            self._rollover()
+            return dict(self._stats)
+
+    def check(self, max_trades=0, max_loss=0):
+        """Reason the next trade is not allowed, or None (memory only)"""
+        with self._lock:
+            self._rollover()
+            return self._limit_reason(self._stats, max_trades, max_loss)
+
+    @staticmethod
+    def _limit_reason(stats, max_trades, max_loss):
+        if max_trades > 0 and stats['trades'] >= max_trades:
+            return f"Max trades per day ({max_trades}) reached."
+        if max_loss > 0 and stats['realized_pnl'] <= -abs(max_loss):
+            return f"Max daily loss (${max_loss}) reached."
+        return None
+
+    def try_reserve(self, max_trades=0, max_loss=0):
+        """Atomically check the limits and count one trade; returns a rejection reason or None.
+
+        Call release() if the reserved trade then fails, so concurrent executions
+        can never overshoot max_trades between the check and the fill.
+        """
+        def change(stats):
+            reason = self._limit_reason(stats, max_trades, max_loss)
+            if reason is None:
+                stats['trades'] += 1
+            return reason
+        if self.shared and self._limit_reason(self.snapshot(), max_trades, max_loss):
+            # Already over a limit in memory: no need to touch the file
+            return self.check(max_trades, max_loss)
+        return self._mutate(change)
+
+    def release(self):
+        """Give back a reservation whose order was never filled"""
+        def change(stats):
+            stats['trades'] = max(0, stats['trades'] - 1)
+        self._mutate(change)
+
+    def add_realized_pnl(self, amount):
+        """Add one fill's realized PnL"""
+        def change(stats):
+            stats['realized_pnl'] += amount
+        self._mutate(change)
+
+    def set_realized_pnl(self, total):
+        """Replace today's realized PnL with a reconciled total"""
+        def change(stats):
+            stats['realized_pnl'] = total
+        self._mutate(change)
+
+_states = {}
+_states_lock = threading.Lock()
+
+def get_risk_state(path=DAILY_STATS_FILE, shared=False):
+    """Return the process-wide risk state for a stats file (one per account)"""
+    state = _states.get(path)
+    if state is not None:
+        return state
+    with _states_lock:
+        state = _states.get(path)
+        if state is None:
+            state = RiskState(path, shared)
+            _states[path] = state
+        return state
+
+def close_risk_states():
+    """Persist every risk state and stop the writers (also runs at interpreter exit)"""
+    with _states_lock:
+        states = list(_states.values())
+    for state in states:
+        state.close()
+
+atexit.register(close_risk_states)
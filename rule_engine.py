@@ -0,0 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from binance_client import get_client
+from kline_store import get_kline_store
+
+_KLINE_PATHS = {'SPOT': '/api/v3/klines', 'FUTURES': '/fapi/v1/klines'}
+
+def klines_to_arrays(rows):
+    """Convert Binance kline rows into float64 column arrays"""
+    data = np.asarray([row[:6] for row in rows], dtype=np.float64).reshape(-1, 6)
+    return {
+        'open_time': data[:, 0].astype(np.int64),
+        'open': data[:, 1], 'high': data[:, 2], 'low': data[:, 3],
+        'close': data[:, 4], 'volume': data[:, 5],
+    }
+
+def fetch_klines(symbol, interval='5m', limit=100, market='FUTURES'):
+    """Recent klines for a symbol as column arrays (public endpoint, pooled session)"""
+    rows = get_client().get(market, _KLINE_PATHS[market], {'symbol': symbol, 'interval': interval, 'limit': limit})
+    return klines_to_arrays(rows)
+
+def compute_indicators(closes, volumes, lookback=20):
+    """Momentum, volatility and volume z-score for many symbols at once.
+
+    closes and volumes are (n_symbols, n_bars) arrays with the newest bar last;
+    every returned array has shape (n_symbols,). Momentum and volatility are in percent.
+    """
+    closes = np.asarray(closes, dtype=np.float64)[:, -(lookback + 1):]
+    volumes = np.asarray(volumes, dtype=np.float64)[:, -(lookback + 1):]
+    momentum = (closes[:, -1] / closes[:, 0] - 1) * 100
+    log_returns = np.diff(np.log(closes), axis=1)
+    volatility = log_returns.std(axis=1) * 100
+    history = volumes[:, :-1]
+    std = history.std(axis=1)
+    volume_z = np.divide(volumes[:, -1] - history.mean(axis=1), std, out=np.zeros_like(std), where=std > 0)
+    return {'momentum': momentum, 'volatility': volatility, 'volume_z': volume_z}
+
+class RuleEngine:
+    """Local pre-filter that decides which symbols deserve a model call, and a deterministic fallback"""
+
+    def __init__(self, momentum_threshold=1.0, volume_z_threshold=2.0, max_volatility=5.0, lookback=20):
+        self.momentum_threshold = momentum_threshold
+        self.volume_z_threshold = volume_z_threshold
+        self.max_volatility = max_volatility
+        self.lookback = lookback
+
+    def evaluate(self, symbols, closes, volumes):
+        """Return one dict per symbol with its indicators, whether it is interesting, and a rule signal"""
+        ind = compute_indicators(closes, volumes, self.lookback)
+        strong_move = np.abs(ind['momentum']) >= self.momentum_threshold
+        volume_spike = ind['volume_z'] >= self.volume_z_threshold
+        tradeable = ind['volatility'] <= self.max_volatility
+        interesting = (strong_move | volume_spike) & tradeable
+        confirmed = strong_move & volume_spike & tradeable
+        # Confidence grows with how far momentum and volume clear their thresholds
+        score = np.minimum(np.abs(ind['momentum']) / self.momentum_threshold, 3) + np.minimum(ind['volume_z'] / self.volume_z_threshold, 3)
+        confidence = np.clip(score / 6 * 100, 0, 100).astype(int)
+        results = []
+        for i, symbol in enumerate(symbols):
+            if confirmed[i]:
+                action = 'BUY' if ind['momentum'][i] > 0 else 'SELL'
+            else:
+                action = 'HOLD'
+            results.append({
+                'symbol': symbol,
+                'momentum': round(float(ind['momentum'][i]), 3),
+                'volatility': round(float(ind['volatility'][i]), 3),
+                'volume_z': round(float(ind['volume_z'][i]), 3),
+                'interesting': bool(interesting[i]),
+                'signal': {
+                    'action': action,
+                    'market': 'FUTURES',
+                    'symbol': symbol,
+                    'confidence': int(confidence[i]) if action != 'HOLD' else 0,
+                    'reason': f"[RULES] momentum {ind['momentum'][i]:+.2f}%, volume z {ind['volume_z'][i]:.1f}",
+                },
+            })
+        return results
+
+    def signal_series(self, closes, volumes):
+        """Per-bar rule signals over a whole history: +1 BUY, -1 SELL, 0 HOLD.
+
+        Bar i only uses bars up to and including i, matching what evaluate() would
+        have said at that bar's close.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        signals = np.zeros(len(closes), dtype=np.int8)
+        lb = self.lookback
+        if len(closes) <= lb:
+            return signals
+        momentum = (closes[lb:] / closes[:-lb] - 1) * 100
+        log_returns = np.diff(np.log(closes))
+        volatility = np.lib.stride_tricks.sliding_window_view(log_returns, lb).std(axis=1) * 100
+        history = np.lib.stride_tricks.sliding_window_view(volumes[:-1], lb)
+        mean, std = history.mean(axis=1), history.std(axis=1)
+        volume_z = np.divide(volumes[lb:] - mean, std, out=np.zeros_like(std), where=std > 0)
+        confirmed = (np.abs(momentum) >= self.momentum_threshold) & (volume_z >= self.volume_z_threshold) & (volatility <= self.max_volatility)
+        signals[lb:] = np.where(confirmed, np.sign(momentum), 0).astype(np.int8)
+        return signals
+
+def screen_market(market_data, config, quote='USDT'):
+    """Attach indicators to each coin and keep only the ones the rule engine finds interesting.
+
+    Returns (interesting_coins, rule_signals_by_symbol). Coins whose klines cannot be
+    fetched are passed through untouched so the model still sees them.
+    """
+    engine = RuleEngine(
+        config.get('RULE_MOMENTUM_PERCENT', 1.0),
+        config.get('RULE_VOLUME_Z', 2.0),
+        config.get('RULE_MAX_VOLATILITY', 5.0),
+        config.get('RULE_LOOKBACK', 20),
+    )
+    interval = config.get('RULE_KLINE_INTERVAL', '5m')
+    bars = engine.lookback + 1
+    store = get_kline_store(config['KLINE_STORE_DIR']) if config.get('KLINE_STORE_DIR') else None
+
+    def load(coin):
+        symbol = f"{coin['symbol'].upper()}{quote}"
+        try:
+            # Read straight from the memory-mapped store when it is up to date
+            if store is not None and store.is_fresh(symbol, interval):
+                recent = store.tail(symbol, interval, bars)
+                if len(recent['close']) == bars:
+                    return recent
+            return fetch_klines(symbol, interval, bars)
+        except Exception as e:
+            print(f"Kline fetch error ({coin['symbol']}): {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        klines = list(pool.map(load, market_data))
+
+    usable = [(coin, k) for coin, k in zip(market_data, klines) if k is not None and len(k['close']) == bars]
+    screened_out = set()
+    rule_signals = {}
+    if usable:
+        symbols = [f"{coin['symbol'].upper()}{quote}" for coin, _ in usable]
+        closes = np.vstack([k['close'] for _, k in usable])
+        volumes = np.vstack([k['volume'] for _, k in usable])
+        for (coin, _), result in zip(usable, engine.evaluate(symbols, closes, volumes)):
+            rule_signals[result['symbol']] = result['signal']
+            if result['interesting']:
+                coin.update(momentum_pct=result['momentum'], volatility_pct=result['volatility'], volume_z=result['volume_z'])
+            else:
+                screened_out.add(id(coin))
+    return [coin for coin in market_data if id(coin) not in screened_out], rule_signals
+
+def apply_rule_fallback(signal, rule_signals):
+    """Swap a failed model signal (marked 'error' by the Gemini failure paths) for the rule engine's call.
+
+    The rules are asked about the coins the model was sent: the signal's symbol, or for a
+    multi-coin call every one in 'symbols', taking the most confident actionable one. A
+    genuine model HOLD is kept, and so is the failure when the rules have nothing actionable.
+    """
+    if not signal.get('error'):
+        return signal
+    candidates = [rule_signals.get(symbol) for symbol in signal.get('symbols') or [signal.get('symbol')]]
+    candidates = [s for s in candidates if s and s['action'] != 'HOLD']
+    return dict(max(candidates, key=lambda s: s['confidence'])) if candidates else signal
+
+def rules_only_strategy(rule_signals, quote='USDT'):
+    """A get_trade_signal-compatible strategy that answers from rule signals without calling the model"""
+    def strategy(coins, gemini_api_key=None):
+        candidates = [rule_signals.get(f"{coin['symbol'].upper()}{quote}") for coin in coins]
+        candidates = [s for s in candidates if s]
+        if not candidates:
+            symbol = f"{coins[0]['symbol'].upper()}{quote}" if coins else 'BTCUSDT'
+            return {"action": "HOLD", "market": "SPOT", "symbol": symbol, "confidence": 0, "reason": "[RULES] No klines available"}
+        return dict(max(candidates, key=lambda s: s['confidence']))
+    return strategy
@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class StageMetrics:
+    """Per-stage latency counters in milliseconds"""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, elapsed_ms):
+        with self._lock:
+            stats = self.stages.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['last_ms'] = elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, round((time.perf_counter() - start) * 1000, 2))
+
+    def summary(self):
+        with self._lock:
+            return {
+                stage: dict(stats, avg_ms=round(stats['total_ms'] / stats['count'], 2))
+                for stage, stats in self.stages.items()
+            }
+
+class Scheduler:
+    """Runs a job on wall-clock aligned ticks and on market events, never overlapping itself.
+
+    The job is called as job(trigger) where trigger is 'tick' or an event description.
+    """
+
+    def __init__(self, job, interval, offset=0, event_cooldown=30, metrics=None):
+        self.job = job
+        self.interval = interval
+        self.offset = offset
+        self.event_cooldown = event_cooldown
+        self.metrics = metrics or StageMetrics()
+        self.counters = {'ticks': 0, 'events': 0, 'missed_ticks': 0, 'coalesced_events': 0, 'overlaps': 0, 'failures': 0}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._pending_event = None
+        self._stopping = False
+        self._last_run_at = 0.0
+
+    def next_tick(self, now=None):
+        """Next wall-clock boundary, e.g. the next candle close for interval=300"""
+        now = time.time() if now is None else now
+        return ((now - self.offset) // self.interval + 1) * self.interval + self.offset
+
+    def trigger(self, reason):
+        """Request an out-of-band run; safe to call from any thread (e.g. a feed listener)"""
+        with self._lock:
+            if self._pending_event is not None:
+                self.counters['coalesced_events'] += 1
+                return
+            self._pending_event = reason
+        self._wake.set()
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+
+    def _run_job(self, trigger):
+        # Never start a run while another one is still in flight
+        if not self._run_lock.acquire(blocking=False):
+            self.counters['overlaps'] += 1
+            return
+        self._last_run_at = time.time()
+        try:
+            with self.metrics.time('iteration'):
+                self.job(trigger)
+        except Exception as e:
+            self.counters['failures'] += 1
+            print(f"❌ Scheduled job failed ({trigger}): {e}")
+        finally:
+            self._run_lock.release()
+
+    def run_forever(self, run_immediately=True):
+        if run_immediately:
+            self._run_job('startup')
+        deadline = self.next_tick()
+        while not self._stopping:
+            now = time.time()
+            wait = deadline - now
+            if self._pending_event is not None:
+                wait = min(wait, self._last_run_at + self.event_cooldown - now)
+            self._wake.wait(max(0.0, wait))
+            self._wake.clear()
+            if self._stopping:
+                break
+            now = time.time()
+            if now >= deadline:
+                trigger = 'tick'
+                self.counters['ticks'] += 1
+                with self._lock:
+                    # The tick run covers any event that arrived meanwhile
+                    if self._pending_event is not None:
+                        self.counters['coalesced_events'] += 1
+                        self._pending_event = None
+            else:
+                with self._lock:
+                    trigger = self._pending_event
+                    if trigger is None or now < self._last_run_at + self.event_cooldown:
+                        continue
+                    self._pending_event = None
+                self.counters['events'] += 1
+            self._run_job(trigger)
+            # Ticks that elapsed while the job ran are counted, not replayed
+            now = time.time()
+            if now >= deadline + self.interval:
+                self.counters['missed_ticks'] += int((now - deadline) // self.interval)
+            if now >= deadline:
+                deadline = self.next_tick(now)
+
+class PriceMoveTrigger:
+    """Feed listener that fires the scheduler when a symbol moves more than threshold_percent"""
+
+    def __init__(self, scheduler, threshold_percent):
+        self.scheduler = scheduler
+        self.threshold_percent = threshold_percent
+        self.reference = {}
+
+    def __call__(self, symbol, price):
+        reference = self.reference.get(symbol)
+        if reference is None:
+            self.reference[symbol] = price
+            return
+        move = (price - reference) / reference * 100
+        if abs(move) >= self.threshold_percent:
+            self.reference[symbol] = price
+            self.scheduler.trigger(f"{symbol} moved {move:+.2f}%")
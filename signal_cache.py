@@ -0,0 +1,104 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from gemini_strategy import get_trade_signal
+
+def _quantize(value, significant_digits):
+    """Round a number to a few significant digits so tiny moves map to the same key"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value == 0:
+        return value
+    digits = significant_digits - int(math.floor(math.log10(abs(value)))) - 1
+    return round(value, digits)
+
+def market_fingerprint(market_data, significant_digits=3):
+    """Content hash of a market snapshot after quantizing every numeric field"""
+    quantized = [
+        {key: _quantize(value, significant_digits) for key, value in sorted(coin.items())}
+        for coin in market_data
+    ]
+    payload = json.dumps(quantized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SignalCache:
+    """TTL + LRU cache of strategy signals keyed on a quantized market fingerprint.
+
+    Concurrent callers for the same fingerprint share a single in-flight request.
+    """
+
+    def __init__(self, ttl=300, max_entries=256, significant_digits=3):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.significant_digits = significant_digits
+        self.stats = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, market_data, compute):
+        """Return the cached signal for market_data, calling compute() at most once per fingerprint"""
+        key = market_fingerprint(market_data, self.significant_digits)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return dict(entry[1])
+            waiter = self._in_flight.get(key)
+            if waiter is None:
+                waiter = self._in_flight[key] = {'event': threading.Event(), 'result': None}
+                owner = True
+                self.stats['misses'] += 1
+            else:
+                owner = False
+                self.stats['shared'] += 1
+        if not owner:
+            waiter['event'].wait()
+            return dict(waiter['result'])
+        try:
+            result = compute()
+            waiter['result'] = result
+        except Exception as e:
+            waiter['result'] = {
+                "action": "HOLD",
+                "market": "SPOT",
+                "symbol": "BTCUSDT",
+                "confidence": 0,
+                "reason": f"Strategy error: {e}",
+                "error": True
+            }
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            waiter['event'].set()
+        # Failed calls come back marked 'error'; caching them would pin the outage for a whole TTL
+        if not result.get('error'):
+            with self._lock:
+                self._entries[key] = (time.time(), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+        return dict(result)
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['shared']
+        return (self.stats['hits'] + self.stats['shared']) / lookups if lookups else 0.0
+
+_signal_cache = SignalCache()
+
+def configure_signal_cache(ttl=300, max_entries=256, significant_digits=3):
+    """Replace the process-wide cache used by get_cached_trade_signal()"""
+    global _signal_cache
+    _signal_cache = SignalCache(ttl, max_entries, significant_digits)
+    return _signal_cache
+
+def get_signal_cache():
+    return _signal_cache
+
+def get_cached_trade_signal(market_data, gemini_api_key):
+    """get_trade_signal() behind the process-wide signal cache"""
+    return _signal_cache.get_or_compute(market_data, lambda: get_trade_signal(market_data, gemini_api_key))
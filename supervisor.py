@@ -0,0 +1,112 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from resilience import submit
+from risk_state import DAILY_STATS_FILE
+from scheduler import StageMetrics
+
+# Process-wide settings: the feeds, pools, limiters, journal and schedule are shared by every account
+SHARED_KEYS = {
+    'MARKET_DATA_STREAM', 'MARKET_DATA_STREAM_URL', 'MARKET_DATA_SYMBOLS', 'KLINE_STORE_DIR',
+    'BINANCE_SPOT_BASE_URL', 'BINANCE_FUTURES_BASE_URL', 'RATE_LIMIT_SAFETY', 'RATE_LIMIT_MAX_WAIT',
+    'RETRY_ATTEMPTS', 'HEDGE_AFTER_MS', 'CIRCUIT_FAILURE_THRESHOLD', 'CIRCUIT_RESET_SECONDS', 'MARKET_DATA_BUDGET',
+    'SIGNAL_CACHE_TTL', 'SIGNAL_CACHE_SIZE', 'SIGNAL_CACHE_DIGITS',
+    'TELEGRAM_DIGEST_THRESHOLD', 'TELEGRAM_COALESCE_SECONDS', 'TELEGRAM_MIN_INTERVAL', 'TELEGRAM_MAX_ALERT_AGE',
+    'TRADE_LOG_FSYNC', 'TRADE_LOG_MAX_MB', 'TRADE_LOG_ROTATE_HOURS', 'TRADE_DB',
+    'SCHEDULE_INTERVAL', 'PRICE_MOVE_TRIGGER_PERCENT', 'EVENT_COOLDOWN', 'ACCOUNTS_FILE',
+}
+
+ACCOUNT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+def _resolve(key, value, default):
+    """'$VAR' reads the value from the environment (keeps secrets out of the file); strings follow the .env type"""
+    if isinstance(value, str) and value.startswith('$'):
+        variable = value[1:]
+        value = os.getenv(variable)
+        if value is None:
+            raise ValueError(f"{key}: environment variable {variable} is not set")
+    if isinstance(value, str) and isinstance(default, (int, float)) and not isinstance(default, bool):
+        return type(default)(value)
+    return value
+
+def load_accounts(path, base_config):
+    """Read the accounts file and return one config per account.
+
+    The file is a JSON list of objects, each with a "name" and any config keys
+    that differ from the .env (keys, strategy, risk limits, Telegram chat, ...).
+    Every account gets ACCOUNT_NAME and its own FUTURES_STATS_FILE, so daily
+    trade counts and loss limits never mix. Raises ValueError on a bad file.
+    """
+    with open(path, 'r') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} must contain a non-empty JSON list of accounts")
+    accounts = []
+    stats_files = {}
+    key_pairs = {}
+    for entry in entries:
+        name = str(entry.get('name', ''))
+        if not ACCOUNT_NAME_PATTERN.match(name):
+            raise ValueError(f"Account name {name!r} must be letters, digits, '-' or '_'")
+        if any(account['ACCOUNT_NAME'] == name for account in accounts):
+            raise ValueError(f"Account {name} is listed twice")
+        config = dict(base_config, ACCOUNT_NAME=name, FUTURES_STATS_FILE=f"futures_daily_stats.{name}.json")
+        for key, value in entry.items():
+            if key == 'name':
+                continue
+            if key not in base_config:
+                raise ValueError(f"Account {name}: unknown setting {key}")
+            if key in SHARED_KEYS:
+                print(f"⚠️  Account {name}: {key} is shared by all accounts, ignoring the override")
+                continue
+            config[key] = _resolve(key, value, base_config[key])
+        stats_file = config['FUTURES_STATS_FILE'] or DAILY_STATS_FILE
+        if stats_file in stats_files:
+            raise ValueError(f"Accounts {stats_files[stats_file]} and {name} share the risk state file {stats_file}")
+        stats_files[stats_file] = name
+        if config.get('PAPER_TRADING') != 1:
+            # One key pair has one balance, one set of streams and one set of limits
+            pair = (config.get('BINANCE_API_KEY'), config.get('BINANCE_API_SECRET'))
+            if pair in key_pairs:
+                raise ValueError(f"Accounts {key_pairs[pair]} and {name} use the same Binance API key")
+            key_pairs[pair] = name
+        accounts.append(config)
+    return accounts
+
+class AccountSupervisor:
+    """Runs one trading iteration per account side by side on a shared market snapshot.
+
+    run_account(config, metrics, iteration, trigger, market_data) is called for
+    every account on a worker thread with its own copy of the coins it asked
+    for (MARKET_DATA_LIMIT); one account failing never stops the others. Each
+    account keeps its own StageMetrics.
+    """
+
+    def __init__(self, accounts, run_account, max_workers=0):
+        self.accounts = accounts
+        self.run_account = run_account
+        self.metrics = {account['ACCOUNT_NAME']: StageMetrics() for account in accounts}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(accounts), thread_name_prefix='account')
+
+    def market_data_limit(self):
+        """Coins to fetch per tick so every account gets the universe it is configured for"""
+        return max(account.get('MARKET_DATA_LIMIT', 5) for account in self.accounts)
+
+    def _run_one(self, account, market_data, iteration, trigger):
+        name = account['ACCOUNT_NAME']
+        start = time.perf_counter()
+        try:
+            self.run_account(account, self.metrics[name], iteration, trigger, market_data)
+        except Exception as e:
+            print(f"❌ Account {name} iteration error: {e}")
+        return time.perf_counter() - start
+
+    def run_tick(self, market_data, iteration, trigger='tick'):
+        """Run every account on market_data and return {account name: seconds taken}"""
+        futures = {}
+        for account in self.accounts:
+            snapshot = [dict(coin) for coin in market_data[:account.get('MARKET_DATA_LIMIT', 5)]]
+            futures[account['ACCOUNT_NAME']] = submit(self._executor, self._run_one, account, snapshot, iteration, trigger)
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the stream-fed account state cache
+Checks that balances, positions, open orders and margin follow user-data events
+and that position sizing reads the cache instead of the REST account endpoint
+"""
+
+import sys
+import binance_api
+from account_state import AccountState, get_account_state, track_account
+from paper_exchange import PaperExchange
+from user_data_stream import UserDataStream
+
+class CountingClient:
+    """Wraps a client and counts every REST call"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+
+    def get(self, market, path, params=None, signed=False):
+        self.calls += 1
+        return self.client.get(market, path, params, signed)
+
+def _follow(exchange, client):
+    stream = UserDataStream(client).follow(exchange)
+    return stream, AccountState(client).attach(stream, ('SPOT', 'FUTURES'))
+
+def test_follows_events():
+    """Cached positions, orders, margin and spot balances match the exchange after trading"""
+    print("🧪 Testing event-driven account state...")
+    exchange = PaperExchange(balance=10000, fee_percent=0.04, spot_balance=5000)
+    exchange.on_tick('BTCUSDT', 60000, 60000)
+    client = CountingClient(exchange)
+    stream, account = _follow(exchange, client)
+    snapshot_calls = client.calls
+    exchange.post('FUTURES', '/fapi/v1/leverage', {'symbol': 'BTCUSDT', 'leverage': 5})
+    exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.1})
+    for order_type, stop in (('STOP_MARKET', 59000), ('TAKE_PROFIT_MARKET', 62000)):
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': order_type, 'stopPrice': stop, 'closePosition': 'true'})
+    exchange.on_tick('ETHUSDT', 3000, 3000)
+    exchange.post('SPOT', '/api/v3/order', {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 1})
+    expected = float(exchange.account('FUTURES')['assets'][0]['availableBalance'])
+    if abs(account.available_balance() - expected) > 1e-6:
+        print(f"❌ Cached available balance {account.available_balance()} != exchange {expected}")
+        return False
+    if account.get_positions()['BTCUSDT']['leverage'] != 5 or len(account.get_open_orders('BTCUSDT')) != 2:
+        print(f"❌ Unexpected positions {account.get_positions()} or orders {account.get_open_orders()}")
+        return False
+    if account.spot.get('ETH', {}).get('free') != exchange.spot['ETH'] or abs(account.spot['USDT']['free'] - exchange.spot['USDT']) > 1e-6:
+        print(f"❌ Spot balances not updated: {account.spot}")
+        return False
+    # The stop fires: position closed, take-profit cancelled, wallet realized
+    exchange.on_tick('BTCUSDT', 58900, 58900)
+    if account.get_positions() or account.get_open_orders():
+        print(f"❌ Stale state after the stop: {account.get_positions()} {account.get_open_orders()}")
+        return False
+    if abs(account.margin()['wallet_balance'] - exchange.wallet['USDT']) > 1e-6:
+        print(f"❌ Wallet {account.margin()['wallet_balance']} != {exchange.wallet['USDT']}")
+        return False
+    if client.calls != snapshot_calls:
+        print(f"❌ Expected no REST calls after the snapshot, saw {client.calls - snapshot_calls}")
+        return False
+    print(f"✅ {account.stats['events']} events, wallet {account.margin()['wallet_balance']:.2f} USDT, ETH {account.spot['ETH']['free']}")
+    return True
+
+def test_sizing_reads_cache():
+    """execute_trade's balance lookup is a cache read while the stream is connected"""
+    print("\n🧪 Testing cached position sizing...")
+    exchange = PaperExchange(balance=5000, fee_percent=0)
+    client = CountingClient(exchange)
+    stream = UserDataStream(client).follow(exchange)
+    track_account(client, stream)
+    calls = client.calls
+    balance = binance_api._get_futures_usdt_balance(client)
+    if balance != 5000 or client.calls != calls:
+        print(f"❌ Expected a cached 5000 USDT, got {balance} with {client.calls - calls} REST calls")
+        return False
+    stream.connected = False
+    if get_account_state(client) is not None or binance_api._get_futures_usdt_balance(client) != 5000 or client.calls != calls + 1:
+        print("❌ A disconnected stream should fall back to REST")
+        return False
+    print("✅ Sized from the cache, REST only while disconnected")
+    return True
+
+def main():
+    print("🏦 Account State Test")
+    print("=" * 50)
+    tests = [test_follows_events, test_sizing_reads_cache]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio pipeline
+Checks the shared event loop runner, that strategy calls and orders overlap on
+one loop against local stand-ins, and that the synchronous wrappers still work
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import binance_api
+import coingecko_api
+import exchange_info
+import gemini_strategy
+import main as bot
+import pipeline
+from async_runtime import run_sync
+from benchmark import StubServices
+from binance_client import BinanceClient
+from exchange_info import ExchangeInfoCache
+from mock_binance import MockBinanceServer, MOCK_API_KEY, MOCK_API_SECRET
+from pipeline import evaluate_symbols_async, execute_signals_async
+from resilience import remaining_time, stage_budget
+from scheduler import StageMetrics
+
+def test_run_sync():
+    """run_sync carries the caller's stage budget and refuses to block a running loop"""
+    print("🧪 Testing run_sync...")
+
+    async def budget_left():
+        return remaining_time()
+
+    with stage_budget(5):
+        left = run_sync(budget_left())
+    if left is None or not 4 < left <= 5:
+        print(f"❌ Stage budget not carried into the loop: {left}")
+        return False
+
+    async def nested():
+        try:
+            run_sync(budget_left())
+        except RuntimeError:
+            return True
+        return False
+
+    if not run_sync(nested()):
+        print("❌ run_sync inside the loop should raise instead of deadlocking")
+        return False
+    print(f"✅ Budget carried ({left:.2f}s left), nested call refused")
+    return True
+
+def test_strategy_calls_overlap():
+    """Five 200ms model calls finish in about one round trip, sync wrappers agree"""
+    print("\n🧪 Testing concurrent strategy calls...")
+    stubs = StubServices(llm_latency_ms=200).start()
+    urls = coingecko_api.COINGECKO_URL, gemini_strategy.GEMINI_URL
+    coingecko_api.COINGECKO_URL = f"{stubs.url}/coingecko"
+    gemini_strategy.GEMINI_URL = f"{stubs.url}/gemini/models/stand-in"
+    try:
+        market_data = coingecko_api.fetch_top_coins(5)
+
+        async def strategy(coins):
+            return await gemini_strategy.get_trade_signal_async(coins, 'stand-in')
+
+        start = time.perf_counter()
+        signals = run_sync(evaluate_symbols_async(market_data, strategy, 8))
+        elapsed = time.perf_counter() - start
+        sync_signal = gemini_strategy.get_trade_signal(market_data, 'stand-in')
+    finally:
+        coingecko_api.COINGECKO_URL, gemini_strategy.GEMINI_URL = urls
+        stubs.stop()
+    if len(market_data) != 5 or len(signals) != 5 or sync_signal['action'] not in ('BUY', 'SELL'):
+        print(f"❌ Unexpected results: {market_data} {signals} {sync_signal}")
+        return False
+    if elapsed > 0.6:
+        print(f"❌ Strategy calls did not overlap: {elapsed:.2f}s for 5 x 200ms")
+        return False
+    print(f"✅ 5 model calls in {elapsed * 1000:.0f}ms on one loop")
+    return True
+
+def test_orders_overlap():
+    """Three futures trades run concurrently and each is reported as soon as it finishes"""
+    print("\n🧪 Testing concurrent order placement...")
+    server = MockBinanceServer(latency_ms=30, tick_interval=0).start()
+    tmp = tempfile.mkdtemp()
+    original_cache, stats_file = exchange_info._cache, binance_api.DAILY_STATS_FILE
+    os.environ['BINANCE_SPOT_BASE_URL'] = os.environ['BINANCE_FUTURES_BASE_URL'] = server.base_url
+    client = BinanceClient(MOCK_API_KEY, MOCK_API_SECRET)
+    client.base_urls = {'SPOT': server.base_url, 'FUTURES': server.base_url}
+    exchange_info._cache = ExchangeInfoCache(os.path.join(tmp, 'exchange_info.json'), client=client)
+    binance_api.DAILY_STATS_FILE = os.path.join(tmp, 'stats.json')
+    reported = []
+    try:
+        config = {
+            'BINANCE_API_KEY': MOCK_API_KEY, 'BINANCE_API_SECRET': MOCK_API_SECRET,
+            'FUTURES_LEVERAGE': 5, 'FUTURES_USE_BALANCE_PERCENT': 1, 'FUTURES_CONCURRENT_ORDERS': 1,
+            'FUTURES_STOP_LOSS_PERCENT': 1, 'FUTURES_TAKE_PROFIT_PERCENT': 2,
+        }
+        signals = [{'action': 'BUY', 'market': 'FUTURES', 'symbol': symbol, 'confidence': 80, 'reason': 'test'} for symbol in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')]
+        # One warm-up trade so the exchange filters are cached before timing
+        binance_api.execute_trade(dict(signals[0], symbol='BNBUSDT'), config)
+        start = time.perf_counter()
+        results = run_sync(execute_signals_async(signals, config, 4, lambda result: reported.append((result['symbol'], time.perf_counter() - start))))
+        elapsed = time.perf_counter() - start
+    finally:
+        del os.environ['BINANCE_SPOT_BASE_URL'], os.environ['BINANCE_FUTURES_BASE_URL']
+        exchange_info._cache, binance_api.DAILY_STATS_FILE = original_cache, stats_file
+        server.stop()
+    if [r['status'] for r in results] != ['FILLED'] * 3 or [r['symbol'] for r in results] != ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']:
+        print(f"❌ Unexpected results: {[(r['symbol'], r['status'], r['reason']) for r in results]}")
+        return False
+    # Each trade is ~4 sequential 30ms round trips; run one after another they would take ~360ms
+    if len(reported) != 3 or elapsed > 0.3:
+        print(f"❌ Orders did not overlap: {elapsed:.2f}s, reported {reported}")
+        return False
+    print(f"✅ 3 trades with SL/TP in {elapsed * 1000:.0f}ms, reported at {', '.join(f'{t * 1000:.0f}ms' for _, t in reported)}")
+    return True
+
+def test_iteration_on_loop():
+    """ASYNC_PIPELINE=1 runs the whole iteration as one coroutine and reports off the loop thread"""
+    print("\n🧪 Testing the async iteration...")
+    stubs = StubServices().start()
+    urls = coingecko_api.COINGECKO_URL, gemini_strategy.GEMINI_URL
+    originals = bot.fetch_top_coins, bot.execute_trade_async, pipeline.execute_trade_async, bot.report_trade
+    coingecko_api.COINGECKO_URL = f"{stubs.url}/coingecko"
+    gemini_strategy.GEMINI_URL = f"{stubs.url}/gemini/models/stand-in"
+    executed, reported = [], []
+
+    def no_sync_fetch(limit):
+        raise AssertionError("synchronous fetch_top_coins used")
+
+    async def execute(signal, config):
+        executed.append((signal['symbol'], threading.current_thread().name == 'async-runtime'))
+        return {'symbol': signal['symbol'], 'status': 'FILLED'}
+
+    def report(result, config, metrics):
+        reported.append((result['symbol'], threading.current_thread().name == 'async-runtime'))
+
+    bot.fetch_top_coins = no_sync_fetch
+    bot.execute_trade_async = pipeline.execute_trade_async = execute
+    bot.report_trade = report
+    try:
+        for multi in (0, 1):
+            config = {'ASYNC_PIPELINE': 1, 'MULTI_SYMBOL_PIPELINE': multi, 'GEMINI_API_KEY': 'stand-in'}
+            bot.run_iteration(config, StageMetrics(), 1)
+    finally:
+        coingecko_api.COINGECKO_URL, gemini_strategy.GEMINI_URL = urls
+        bot.fetch_top_coins, bot.execute_trade_async, pipeline.execute_trade_async, bot.report_trade = originals
+        stubs.stop()
+    if len(executed) != 2 or not all(on_loop for _, on_loop in executed):
+        print(f"❌ Orders not placed on the loop: {executed}")
+        return False
+    if len(reported) != 2 or any(on_loop for _, on_loop in reported):
+        print(f"❌ Reports ran on the loop thread: {reported}")
+        return False
+    print("✅ Single and multi-symbol passes fetched, traded on the loop and reported on worker threads")
+    return True
+
+def main():
+    print("⚙️  Async Pipeline Test")
+    print("=" * 50)
+    tests = [test_run_sync, test_strategy_calls_overlap, test_orders_overlap, test_iteration_on_loop]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
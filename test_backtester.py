@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized backtester
+Uses small synthetic kline series so exits can be checked by hand
+"""
+
+import sys
+import numpy as np
+from backtester import simulate, recorded_signals_strategy
+
+def _bars(prices, spread=0.0):
+    close = np.asarray(prices, dtype=np.float64)
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    return {
+        'open_time': np.arange(len(close), dtype=np.int64) * 60000,
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + spread),
+        'low': np.minimum(open_, close) * (1 - spread),
+        'close': close,
+        'volume': np.ones(len(close)),
+    }
+
+def test_stop_loss_and_take_profit():
+    """A long hits take-profit, the following short hits its stop"""
+    print("🧪 Testing SL/TP exits...")
+    bars = _bars([100, 100, 101, 103, 106, 106, 106, 108, 112])
+    signals = np.zeros(9, dtype=np.int8)
+    signals[0] = 1    # enter long at bar 1 open (100), TP 5% -> 105 hit on bar 4
+    signals[5] = -1   # enter short at bar 6 open (106), SL 2% -> 108.12 hit on bar 8
+    result = simulate(bars, signals, stop_loss_percent=2, take_profit_percent=5, fee_percent=0)
+    reasons = list(result['reason'])
+    if reasons != ['TAKE_PROFIT', 'STOP_LOSS'] or list(result['exit_idx']) != [4, 8]:
+        print(f"❌ Unexpected exits: {reasons} at {list(result['exit_idx'])}")
+        return False
+    if not np.allclose(result['returns'], [0.05, -0.02]):
+        print(f"❌ Unexpected returns: {result['returns']}")
+        return False
+    print(f"✅ Exits and returns correct: {result['summary']}")
+    return True
+
+def test_no_overlap_fees_and_leverage():
+    """Signals during an open position are ignored; fees and leverage scale returns"""
+    print("\n🧪 Testing position overlap, fees and leverage...")
+    bars = _bars([100, 100, 100, 100, 110])
+    signals = np.array([1, 1, 1, 0, 0], dtype=np.int8)
+    result = simulate(bars, signals, take_profit_percent=10, leverage=3, fee_percent=0.1)
+    expected = 0.10 * 3 - 2 * 0.001 * 3
+    if result['summary']['trades'] != 1 or not np.isclose(result['returns'][0], expected):
+        print(f"❌ Expected one trade returning {expected}, got {result['returns']}")
+        return False
+    print("✅ One trade, leveraged return net of fees")
+    return True
+
+def test_recorded_signals():
+    """Recorded signals map to the first bar at or after their timestamp"""
+    print("\n🧪 Testing recorded signal replay...")
+    bars = _bars([100] * 5)
+    strategy = recorded_signals_strategy([
+        {'action': 'BUY', 'symbol': 'BTCUSDT', 'timestamp': 60000},
+        {'action': 'SELL', 'symbol': 'ETHUSDT', 'timestamp': 120000},
+        {'side': 'SELL', 'symbol': 'BTCUSDT', 'timestamp': '1970-01-01T00:02:30'},
+    ], symbol='BTCUSDT')
+    signals = strategy(bars)
+    if list(signals) != [0, 1, 0, -1, 0]:
+        print(f"❌ Unexpected signal series: {list(signals)}")
+        return False
+    print("✅ Recorded signals aligned to bars")
+    return True
+
+def main():
+    print("📊 Backtester Test")
+    print("=" * 50)
+    tests = [test_stop_loss_and_take_profit, test_no_overlap_fees_and_leverage, test_recorded_signals]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script for the exchange-info cache
+Checks quantity/price rounding directions, the MARKET_LOT_SIZE step choice,
+order rejections (min quantity, min notional, halted symbols), the on-disk
+snapshot TTL with fetch back-off, and the offline cache used for paper trading
+"""
+
+import os
+import sys
+import tempfile
+import time
+import exchange_info
+from exchange_info import ExchangeInfoCache
+
+def symbol_info(symbol, step='0.001', min_qty='0.001', tick='0.1', min_notional='5', market_step=None, status='TRADING', notional_filter='MIN_NOTIONAL'):
+    filters = [
+        {'filterType': 'LOT_SIZE', 'stepSize': step, 'minQty': min_qty},
+        {'filterType': 'PRICE_FILTER', 'tickSize': tick},
+        {'filterType': notional_filter, ('minNotional' if notional_filter == 'MIN_NOTIONAL' else 'notional'): min_notional},
+    ]
+    if market_step is not None:
+        filters.append({'filterType': 'MARKET_LOT_SIZE', 'stepSize': market_step})
+    return {'symbol': symbol, 'status': status, 'filters': filters}
+
+class FakeClient:
+    """Serves a fixed exchangeInfo payload (or raises) and counts the downloads"""
+
+    def __init__(self, symbols, fail=False):
+        self.payload = {'symbols': symbols}
+        self.fail = fail
+        self.calls = []
+
+    def get(self, market, path):
+        self.calls.append((market, path))
+        if self.fail:
+            raise ConnectionError("exchange unreachable")
+        return self.payload
+
+SYMBOLS = [
+    symbol_info('BTCUSDT'),
+    symbol_info('ETHUSDT', step='0.0001', market_step='0.01', tick='0.01', min_notional='10', notional_filter='NOTIONAL'),
+    symbol_info('SOLUSDT', step='0.1', market_step='0.01'),
+    symbol_info('LUNAUSDT', status='BREAK'),
+]
+
+def new_cache(tmp, client=None, **kwargs):
+    return ExchangeInfoCache(os.path.join(tmp, 'exchange_info.json'), client=client or FakeClient(SYMBOLS), **kwargs)
+
+def test_quantize():
+    """Quantities round down to the step, prices to the nearest tick; unknown symbols fall back"""
+    print("🧪 Testing quantization...")
+    cache = new_cache(tempfile.mkdtemp())
+    checks = [
+        (cache.quantize_quantity('FUTURES', 'BTCUSDT', 1.23456789), 1.234),
+        (cache.quantize_quantity('FUTURES', 'BTCUSDT', 0.0019999), 0.001),
+        (cache.quantize_quantity('FUTURES', 'BTCUSDT', 0.3), 0.3),  # exact, no float drift
+        (cache.quantize_price('FUTURES', 'BTCUSDT', 60000.05), 60000.1),
+        (cache.quantize_price('FUTURES', 'BTCUSDT', 60000.04), 60000.0),
+        (cache.quantize_quantity('FUTURES', 'XYZUSDT', 1.23456789), 1.234568),
+        (cache.quantize_price('FUTURES', 'XYZUSDT', 1.23456), 1.23),
+    ]
+    wrong = [(got, want) for got, want in checks if got != want]
+    if wrong:
+        print(f"❌ Got/expected: {wrong}")
+        return False
+    print("✅ 1.23456789 → 1.234, 0.0019999 → 0.001, 60000.05 → 60000.1, 60000.04 → 60000.0")
+    return True
+
+def test_market_lot_size():
+    """The coarser of LOT_SIZE and MARKET_LOT_SIZE steps is used; NOTIONAL counts as the minimum"""
+    print("\n🧪 Testing the MARKET_LOT_SIZE choice...")
+    cache = new_cache(tempfile.mkdtemp())
+    eth, sol = cache.get_symbol('SPOT', 'ETHUSDT'), cache.get_symbol('SPOT', 'SOLUSDT')
+    if eth['step_size'] != '0.01' or sol['step_size'] != '0.1':
+        print(f"❌ Wrong step sizes: ETH {eth['step_size']}, SOL {sol['step_size']}")
+        return False
+    if eth['min_notional'] != '10' or cache.quantize_quantity('SPOT', 'ETHUSDT', 1.23456) != 1.23:
+        print(f"❌ NOTIONAL filter or market step not applied: {eth}")
+        return False
+    print("✅ ETH uses its coarser market step 0.01, SOL keeps its 0.1 lot step")
+    return True
+
+def test_validate_order():
+    """Small, low-value and halted orders are rejected before they reach the exchange"""
+    print("\n🧪 Testing order validation...")
+    cache = new_cache(tempfile.mkdtemp())
+    below_notional = cache.validate_order('FUTURES', 'BTCUSDT', 0.001, 4000)
+    rejections = [
+        below_notional,
+        cache.validate_order('FUTURES', 'BTCUSDT', 0.0005, 60000),
+        cache.validate_order('FUTURES', 'BTCUSDT', 0, 60000),
+        cache.validate_order('FUTURES', 'LUNAUSDT', 1, 1),
+    ]
+    accepted = [
+        cache.validate_order('FUTURES', 'BTCUSDT', 0.001, 60000),
+        cache.validate_order('FUTURES', 'BTCUSDT', 0.001),  # no price, no notional check
+        cache.validate_order('FUTURES', 'XYZUSDT', 0.001, 1),  # unknown symbols are left to the exchange
+    ]
+    if not all(rejections) or any(accepted) or 'Notional below minimum 5' not in below_notional:
+        print(f"❌ Rejections {rejections}, accepted {accepted}")
+        return False
+    print(f"✅ {len(rejections)} rejected, e.g. {below_notional!r}")
+    return True
+
+def test_snapshot_ttl():
+    """A fresh snapshot on disk is reused, a stale one is refreshed, a failed fetch backs off"""
+    print("\n🧪 Testing the snapshot TTL...")
+    tmp = tempfile.mkdtemp()
+    first = FakeClient(SYMBOLS)
+    new_cache(tmp, first, ttl=0.3).get_symbol('FUTURES', 'BTCUSDT')
+    warm = FakeClient(SYMBOLS)
+    warm_cache = new_cache(tmp, warm, ttl=0.3)
+    warm_info = warm_cache.get_symbol('FUTURES', 'BTCUSDT')
+    if len(first.calls) != 1 or warm.calls or warm_info is None:
+        print(f"❌ Warm start downloaded again: {first.calls} {warm.calls}")
+        return False
+    time.sleep(0.35)
+    warm_cache.get_symbol('FUTURES', 'BTCUSDT')
+    if warm.calls != [('FUTURES', '/fapi/v1/exchangeInfo')]:
+        print(f"❌ Stale snapshot not refreshed: {warm.calls}")
+        return False
+
+    down = FakeClient(SYMBOLS, fail=True)
+    stale = new_cache(tmp, down, ttl=0)
+    served = [stale.get_symbol('FUTURES', 'BTCUSDT') for _ in range(3)]
+    if len(down.calls) != 1 or None in served:
+        print(f"❌ Expected one failed fetch and the stale snapshot served, got {len(down.calls)} fetches")
+        return False
+    print("✅ Warm start without a download, refreshed after the TTL, one failed fetch then the stale snapshot")
+    return True
+
+def test_offline_cache():
+    """Paper trading gets an offline cache over the snapshot that never downloads"""
+    print("\n🧪 Testing the offline paper cache...")
+    tmp = tempfile.mkdtemp()
+    new_cache(tmp).get_symbol('SPOT', 'BTCUSDT')
+    never = FakeClient(SYMBOLS, fail=True)
+    offline = new_cache(tmp, never, ttl=0, offline=True)
+    info = offline.get_symbol('SPOT', 'BTCUSDT')
+    missing = offline.get_symbol('FUTURES', 'BTCUSDT')
+    cwd, caches = os.getcwd(), (exchange_info._cache, exchange_info._paper_cache)
+    os.chdir(tmp)
+    exchange_info._cache = exchange_info._paper_cache = None
+    try:
+        paper = exchange_info.get_exchange_info({'PAPER_TRADING': 1})
+        live = exchange_info.get_exchange_info({})
+    finally:
+        os.chdir(cwd)
+        exchange_info._cache, exchange_info._paper_cache = caches
+    if never.calls or info is None or missing is not None:
+        print(f"❌ Offline cache downloaded or lost the snapshot: {never.calls} {info}")
+        return False
+    if not paper.offline or live.offline or paper is live:
+        print("❌ Paper trading did not get its own offline cache")
+        return False
+    print("✅ Snapshot served without downloads; paper and live caches are separate")
+    return True
+
+def main():
+    print("📏 Exchange Info Test")
+    print("=" * 50)
+    tests = [test_quantize, test_market_lot_size, test_validate_order, test_snapshot_ttl, test_offline_cache]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
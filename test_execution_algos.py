@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test script for the TWAP, iceberg and limit-chase execution algorithms
+Works parent orders against the paper exchange while a thread moves the book,
+and checks fills, re-pricing, the slippage stop, unconfirmed cancels, the book source
+and the shortfall report
+"""
+
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import binance_api
+import execution_algos
+from async_runtime import run_sync
+from execution_algos import ExecutionAlgo
+from market_data_stream import MarketDataStream
+from paper_exchange import PaperExchange
+
+class StepFilters:
+    """Stand-in for ExchangeInfo: 0.001 lots, 0.1 ticks, 5 USDT minimum notional"""
+
+    def get_symbol(self, market, symbol):
+        return None
+
+    def quantize_quantity(self, market, symbol, quantity):
+        return math.floor(round(quantity * 1000, 6)) / 1000
+
+    def quantize_price(self, market, symbol, price):
+        return round(price, 1)
+
+    def validate_order(self, market, symbol, quantity, price=None):
+        if quantity <= 0:
+            return "quantity is zero"
+        if price and quantity * price < 5:
+            return "notional below 5"
+        return None
+
+def move_book(exchange, steps, interval):
+    """Apply (bids, asks) books one after another from a background thread"""
+    def run():
+        for bids, asks in steps:
+            time.sleep(interval)
+            exchange.on_book('BTCUSDT', bids, asks)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def test_twap_slices():
+    """TWAP sends timed MARKET slices capped at the touch and the last one takes the rest"""
+    print("🧪 Testing TWAP slicing...")
+    exchange = PaperExchange(balance=10000, fee_percent=0)
+    exchange.on_book('BTCUSDT', [(99, 10)], [(100, 0.2), (101, 10)])
+    algo = ExecutionAlgo(exchange, 'FUTURES', 'BTCUSDT', 'BUY', 1.0, 'twap', decision_price=100, exchange_info=StepFilters(), duration=0.2, slices=4)
+    report = run_sync(algo.run())
+    # Three slices of 0.2 at the touch, the last 0.4 walks into 101
+    if report['children'] != 4 or abs(report['filled_qty'] - 1.0) > 1e-9 or abs(report['avg_price'] - 100.2) > 1e-9:
+        print(f"❌ Unexpected TWAP fills: {report}")
+        return False
+    if report['shortfall_bps'] != 20.0 or report['duration_ms'] < 150:
+        print(f"❌ Unexpected shortfall or pacing: {report['shortfall_bps']} bps in {report['duration_ms']}ms")
+        return False
+    print(f"✅ {report['children']} slices, avg {report['avg_price']:.2f}, shortfall {report['shortfall_bps']} bps in {report['duration_ms']:.0f}ms")
+    return True
+
+def test_iceberg_reprices_and_finishes():
+    """Iceberg clips rest at the bid, follow it when it moves and the rest goes at market at the deadline"""
+    print("\n🧪 Testing iceberg clips and re-pricing...")
+    exchange = PaperExchange(balance=10000, fee_percent=0)
+    exchange.on_book('BTCUSDT', [(99, 10)], [(100, 10)])
+    mover = move_book(exchange, [
+        ([(98.9, 10)], [(99, 10)]),      # the first clip at 99 fills
+        ([(99.5, 10)], [(100, 10)]),     # bid moves up: the resting clip is re-posted at 99.5
+        ([(99.2, 10)], [(99.3, 10)]),    # ask falls through it: filled at 99.5
+    ], 0.15)
+    algo = ExecutionAlgo(exchange, 'FUTURES', 'BTCUSDT', 'BUY', 1.0, 'iceberg', decision_price=99.5, exchange_info=StepFilters(),
+                         duration=0.8, poll_interval=0.02, visible_percent=25)
+    report = run_sync(algo.run())
+    mover.join()
+    if abs(report['filled_qty'] - 1.0) > 1e-9 or report['children'] < 5 or report['stopped']:
+        print(f"❌ Unexpected iceberg fills: {report}")
+        return False
+    if exchange.get('FUTURES', '/fapi/v1/openOrders', {'symbol': 'BTCUSDT'}):
+        print("❌ A limit child was left resting")
+        return False
+    if not 99 <= report['avg_price'] <= 99.5:
+        print(f"❌ Iceberg paid {report['avg_price']}, expected between the clip prices and the final touch")
+        return False
+    print(f"✅ {report['children']} children, avg {report['avg_price']:.3f}, shortfall {report['shortfall_bps']} bps")
+    return True
+
+def test_limit_chase_and_slippage_stop():
+    """limit_chase fills passively when the market comes to it; a runaway price stops slicing"""
+    print("\n🧪 Testing limit chase and the slippage stop...")
+    exchange = PaperExchange(balance=10000, fee_percent=0)
+    exchange.on_book('BTCUSDT', [(99, 10)], [(100, 10)])
+    mover = move_book(exchange, [([(100, 10)], [(100.5, 10)])], 0.1)
+    chase = run_sync(ExecutionAlgo(exchange, 'FUTURES', 'BTCUSDT', 'SELL', 0.5, 'limit_chase', decision_price=99.5, exchange_info=StepFilters(),
+                                   duration=2, poll_interval=0.02).run())
+    mover.join()
+    exchange.on_book('BTCUSDT', [(100, 10)], [(100.1, 10)])
+    mover = move_book(exchange, [([(99, 10)], [(99.1, 10)])], 0.05)
+    stopped = run_sync(ExecutionAlgo(exchange, 'FUTURES', 'BTCUSDT', 'SELL', 1.0, 'twap', decision_price=100, exchange_info=StepFilters(),
+                                     duration=0.5, slices=5, max_slippage_bps=50).run())
+    mover.join()
+    if chase['filled_qty'] != 0.5 or chase['avg_price'] != 100 or chase['children'] != 1 or chase['shortfall_bps'] >= 0:
+        print(f"❌ Chase should rest once at 100 and fill there: {chase}")
+        return False
+    if not stopped['stopped'] or not 0 < stopped['filled_qty'] < 1.0:
+        print(f"❌ TWAP kept selling into a 100 bps drop: {stopped}")
+        return False
+    print(f"✅ Chase filled at {chase['avg_price']} ({chase['shortfall_bps']} bps), TWAP stopped after {stopped['filled_qty']} ({stopped['stopped']})")
+    return True
+
+class StuckCancel(PaperExchange):
+    """Paper exchange whose cancels fail, after which order queries fail too"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queries_down = False
+
+    def delete(self, market, path, params=None, signed=False, priority=None):
+        self.queries_down = True
+        raise ConnectionError("cancel timed out")
+
+    def get(self, market, path, params=None, signed=False, priority=None):
+        if self.queries_down and path == '/fapi/v1/order':
+            raise ConnectionError("query timed out")
+        return super().get(market, path, params, signed, priority)
+
+def test_unconfirmed_cancel_stops():
+    """A child whose cancel cannot be confirmed may still fill, so the rest is not sent at market"""
+    print("\n🧪 Testing an unconfirmed cancel...")
+    exchange = StuckCancel(balance=10000, fee_percent=0)
+    exchange.on_book('BTCUSDT', [(99, 10)], [(100, 10)])
+    report = run_sync(ExecutionAlgo(exchange, 'FUTURES', 'BTCUSDT', 'BUY', 1.0, 'limit_chase', decision_price=99.5, exchange_info=StepFilters(),
+                                    duration=0.1, poll_interval=0.02).run())
+    resting = exchange.orders.get('BTCUSDT', {})
+    if report['filled_qty'] != 0 or report['children'] != 1 or not (report['stopped'] or '').startswith('could not confirm cancel'):
+        print(f"❌ Expected a stop without a market remainder: {report}")
+        return False
+    if len(resting) != 1 or exchange.positions.get('BTCUSDT'):
+        print(f"❌ Unexpected exchange state: {resting} {exchange.positions}")
+        return False
+    print(f"✅ Stopped with the child still resting: {report['stopped']}")
+    return True
+
+def test_book_source_matches_market():
+    """The streamed book is only used for the stream's own market; the other market asks bookTicker"""
+    print("\n🧪 Testing the book source per market...")
+    exchange = PaperExchange(balance=10000, fee_percent=0)
+    exchange.on_book('BTCUSDT', [(100, 1)], [(101, 1)])
+    stream = MarketDataStream(['BTCUSDT'])
+    stream.books['BTCUSDT'] = {'bid': 200, 'bid_qty': 1, 'ask': 201, 'ask_qty': 1, 'update_id': 1, 'received_at': time.time()}
+    original = execution_algos.get_active_stream
+    execution_algos.get_active_stream = lambda: stream
+    try:
+        futures = run_sync(execution_algos.get_book(exchange, 'FUTURES', 'BTCUSDT'))
+        spot = run_sync(execution_algos.get_book(exchange, 'SPOT', 'BTCUSDT'))
+    finally:
+        execution_algos.get_active_stream = original
+    if (futures['bid'], spot['bid']) != (200, 100):
+        print(f"❌ Expected the streamed futures book and the REST spot book, got {futures} / {spot}")
+        return False
+    print(f"✅ FUTURES bid {futures['bid']} from the stream, SPOT bid {spot['bid']} from bookTicker")
+    return True
+
+def test_execute_trade_with_algo():
+    """execute_trade slices large orders, places SL/TP after the first slice and reports shortfall against the signal price"""
+    print("\n🧪 Testing execute_trade with EXECUTION_ALGO=twap...")
+    exchange = PaperExchange(balance=10000, fee_percent=0.04, clock=time.time)
+    exchange.on_tick('BTCUSDT', 50000, 50010)
+    original = binance_api.get_paper_exchange, binance_api.get_exchange_info, binance_api.DAILY_STATS_FILE
+    binance_api.get_paper_exchange = lambda config: exchange
+    binance_api.get_exchange_info = lambda config=None: StepFilters()
+    binance_api.DAILY_STATS_FILE = os.path.join(tempfile.mkdtemp(), 'stats.json')
+    signal = {'action': 'BUY', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 80, 'price': 50000}
+    try:
+        config = {
+            'PAPER_TRADING': 1, 'FUTURES_LEVERAGE': 5, 'FUTURES_USE_BALANCE_PERCENT': 10,
+            'FUTURES_STOP_LOSS_PERCENT': 2, 'FUTURES_TAKE_PROFIT_PERCENT': 4,
+            'EXECUTION_ALGO': 'twap', 'EXECUTION_MIN_NOTIONAL': 100, 'EXECUTION_SLICES': 3, 'EXECUTION_DURATION': 0.1,
+        }
+        sliced = binance_api.execute_trade(signal, config)
+        small = binance_api.execute_trade(signal, dict(config, EXECUTION_MIN_NOTIONAL=1e9))
+    finally:
+        binance_api.get_paper_exchange, binance_api.get_exchange_info, binance_api.DAILY_STATS_FILE = original
+    execution = sliced.get('execution') or {}
+    if sliced['status'] != 'FILLED' or execution.get('algo') != 'twap' or execution.get('children') != 3:
+        print(f"❌ Trade was not sliced: {sliced['status']} {sliced['reason']} {execution}")
+        return False
+    if execution['shortfall_bps'] != 2.0 or small.get('execution', {}).get('algo') != 'market' or small['execution']['shortfall_bps'] != 2.0:
+        print(f"❌ Unexpected shortfall: {execution} / {small.get('execution')}")
+        return False
+    open_orders = exchange.get('FUTURES', '/fapi/v1/openOrders', {'symbol': 'BTCUSDT'})
+    protective = [o['type'] for o in open_orders]
+    if sorted(protective) != ['STOP_MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET', 'TAKE_PROFIT_MARKET']:
+        print(f"❌ Protective orders missing: {protective}")
+        return False
+    # The sliced position is protected after its first child, not once the last one is done
+    if min(o['orderId'] for o in open_orders) > execution['last_order_id']:
+        print(f"❌ SL/TP were only placed after the last slice: {sorted(o['orderId'] for o in open_orders)}")
+        return False
+    print(f"✅ {execution['filled_qty']} BTC in {execution['children']} slices, shortfall {execution['shortfall_bps']} bps "
+          f"({execution['shortfall_quote']:.2f} USDT), SL/TP placed")
+    return True
+
+def main():
+    print("🧊 Execution Algorithms Test")
+    print("=" * 50)
+    tests = [test_twap_slices, test_iceberg_reprices_and_finishes, test_limit_chase_and_slippage_stop, test_unconfirmed_cancel_stops, test_book_source_matches_market, test_execute_trade_with_algo]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
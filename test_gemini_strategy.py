@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched Gemini prompt and response handling, offline
+Checks the CSV market encoder, the incremental JSON array parser on arbitrary
+splits (escaped quotes, braces and brackets inside strings) and a streamed
+batch call whose SSE bytes arrive in small, unaligned pieces
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gemini_strategy
+from gemini_strategy import JsonArrayStreamParser, encode_market_data, get_batch_trade_signals
+
+DECISIONS = [
+    {'action': 'BUY', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 82, 'reason': 'Broke "range" {high}, see [1] \\ retest'},
+    {'action': 'SELL', 'market': 'SPOT', 'symbol': 'ETHUSDT', 'confidence': '64', 'reason': 'Volume fading… }]'},
+]
+
+def test_encoder():
+    """One header row with every key, compact numbers, blanks for missing values, no stray commas"""
+    print("🧪 Testing the CSV market encoder...")
+    market_data = [
+        {'symbol': 'BTC', 'price': 60123.456789, 'market_cap': 1.2e12, 'volume': 3.45e10},
+        {'symbol': 'PEPE', 'price': 0.0000123456, 'market_cap': None, 'volume': 1000, 'name': 'Pepe, the frog'},
+    ]
+    expected = '\n'.join([
+        'symbol,price,market_cap,volume,name',
+        'BTC,60123.5,1.2e+12,3.45e+10,',
+        'PEPE,1.23456e-05,,1000,Pepe  the frog',
+    ])
+    encoded = encode_market_data(market_data)
+    if encoded != expected or encode_market_data([]) != '':
+        print(f"❌ Unexpected CSV:\n{encoded}")
+        return False
+    print(f"✅ {len(encoded)} chars for 2 coins, e.g. {encoded.splitlines()[2]!r}")
+    return True
+
+def test_parser_splits():
+    """Every split of a fenced array yields the same objects, strings never end an object early"""
+    print("\n🧪 Testing the stream parser on split input...")
+    text = '```json\n[\n' + ',\n'.join(json.dumps(d) for d in DECISIONS) + '\n]\n```\nTrailing {note}'
+    for chunk_size in (1, 2, 3, 7, len(text)):
+        parser = JsonArrayStreamParser()
+        objects = []
+        for start in range(0, len(text), chunk_size):
+            objects += parser.feed(text[start:start + chunk_size])
+        if objects != DECISIONS or not parser.done:
+            print(f"❌ {chunk_size}-char chunks gave {objects} (done={parser.done})")
+            return False
+    # The first object is complete as soon as its closing brace arrives, before the array ends
+    parser = JsonArrayStreamParser()
+    first = json.dumps(DECISIONS[0])
+    if parser.feed('[' + first[:-1]) != [] or parser.feed(first[-1] + ',') != [DECISIONS[0]]:
+        print("❌ Object not emitted as soon as it closed")
+        return False
+    for bad in ('[{"action": "BUY",}]', '[{"a": 1} x]'):
+        try:
+            JsonArrayStreamParser().feed(bad)
+            print(f"❌ Malformed input accepted: {bad}")
+            return False
+        except ValueError:
+            pass
+    print("✅ Same 2 objects for 1/2/3/7-char and whole chunks, malformed input rejected")
+    return True
+
+class SlowSSEHandler(BaseHTTPRequestHandler):
+    """Streams the DECISIONS array as SSE events written a few bytes at a time"""
+    piece = 5
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        text = json.dumps(DECISIONS)
+        parts = [text[i:i + 16] for i in range(0, len(text), 16)]
+        body = ''.join(
+            'data: ' + json.dumps({'candidates': [{'content': {'parts': [{'text': part}]}}]}, ensure_ascii=False) + '\r\n\r\n'
+            for part in parts
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        # Byte pieces split lines and multi-byte characters at arbitrary points
+        for start in range(0, len(body), self.piece):
+            self.wfile.write(body[start:start + self.piece])
+            self.wfile.flush()
+            time.sleep(0.0005)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_streamed_batch():
+    """A batch call over byte-split SSE returns each coin's decision; a coin left out becomes HOLD"""
+    print("\n🧪 Testing a streamed batch call...")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowSSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = gemini_strategy.GEMINI_URL
+    gemini_strategy.GEMINI_URL = f"http://127.0.0.1:{server.server_address[1]}/models/stand-in"
+    try:
+        coins = [{'symbol': symbol, 'price': 1.0} for symbol in ('btc', 'eth', 'sol')]
+        signals = get_batch_trade_signals(coins, 'stand-in')
+    finally:
+        gemini_strategy.GEMINI_URL = url
+        server.shutdown()
+        server.server_close()
+    btc, eth, sol = signals
+    if btc['reason'] != DECISIONS[0]['reason'] or eth['reason'] != DECISIONS[1]['reason'] or eth['confidence'] != 64:
+        print(f"❌ Decisions mangled by the split stream: {signals}")
+        return False
+    if sol['action'] != 'HOLD' or not sol.get('error'):
+        print(f"❌ Missing coin not held: {sol}")
+        return False
+    print(f"✅ {btc['symbol']} {btc['action']}, {eth['symbol']} {eth['action']}, {sol['symbol']} {sol['action']} ({sol['reason']})")
+    return True
+
+def main():
+    print("🧠 Gemini Strategy Test")
+    print("=" * 50)
+    tests = [test_encoder, test_parser_splits, test_streamed_batch]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
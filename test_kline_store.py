@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar kline store
+Checks appends and read-only memory-mapped reads, dropping bars already stored,
+CSV import, repair of a file truncated mid-record, and time-range slicing
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+from kline_store import COLUMNS, KlineStore
+
+STEP = 60000  # 1m
+START = 1_700_000_000_000
+
+def make_bars(first, count):
+    """count consecutive 1m bars starting at index first, close = index + 0.5"""
+    index = np.arange(first, first + count)
+    close = index + 0.5
+    return {
+        'open_time': START + index * STEP,
+        'open': close - 0.25, 'high': close + 1, 'low': close - 1,
+        'close': close, 'volume': index * 10.0,
+    }
+
+def test_append_and_read():
+    """Appended bars come back as read-only memory maps; overlaps, CSV and stream bars append in order"""
+    print("🧪 Testing appends and memory-mapped reads...")
+    store = KlineStore(tempfile.mkdtemp())
+    written = store.append('btcusdt', '1m', make_bars(0, 100))
+    overlap = store.append('BTCUSDT', '1m', make_bars(50, 70))
+    stale = store.append('BTCUSDT', '1m', make_bars(10, 5))
+    columns = store.read('BTCUSDT', '1m')
+    if (written, overlap, stale) != (100, 20, 0) or len(columns['close']) != 120:
+        print(f"❌ Wrote {written}/{overlap}/{stale}, read {len(columns['close'])} bars")
+        return False
+    if not all(isinstance(values, np.memmap) and not values.flags.writeable for values in columns.values()):
+        print("❌ Reads are not read-only memory maps")
+        return False
+    if not np.array_equal(columns['close'], make_bars(0, 120)['close']) or columns['open_time'].dtype != np.int64:
+        print("❌ Stored values differ from the appended bars")
+        return False
+
+    csv_path = os.path.join(store.root, 'dump.csv')
+    csv_bars = make_bars(120, 3)
+    with open(csv_path, 'w') as f:
+        f.write('open_time,open,high,low,close,volume,close_time\n')
+        # Out of order on purpose: the import sorts by open_time
+        for i in (2, 0, 1):
+            f.write(','.join(str(csv_bars[column][i]) for column in COLUMNS) + ',0\n')
+    imported = store.import_csv('BTCUSDT', '1m', csv_path)
+
+    class Stream:
+        kline_interval = '1m'
+
+        def __init__(self):
+            self.listeners = []
+
+        def add_kline_listener(self, callback):
+            self.listeners.append(callback)
+
+    stream = Stream()
+    store.attach_stream(stream)
+    live = make_bars(123, 1)
+    stream.listeners[0]('BTCUSDT', {column: live[column][0] for column in COLUMNS})
+    times = store.read('BTCUSDT', '1m')['open_time']
+    if imported != 3 or len(times) != 124 or not np.all(np.diff(times) == STEP):
+        print(f"❌ CSV/stream appends out of order: imported {imported}, {len(times)} bars")
+        return False
+    print("✅ 100 + 20 new of 70 overlapping + 3 CSV + 1 streamed bar, read back as read-only memmaps")
+    return True
+
+def test_repair():
+    """A crash mid-append (one column longer, another cut mid-record) is trimmed back to whole rows"""
+    print("\n🧪 Testing repair of a torn append...")
+    store = KlineStore(tempfile.mkdtemp())
+    store.append('ETHUSDT', '1m', make_bars(0, 10))
+    # open_time got the next row, close only 3 of its 8 bytes, the other columns nothing
+    with open(store._path('ETHUSDT', '1m', 'open_time'), 'ab') as f:
+        f.write(np.int64(START + 10 * STEP).tobytes())
+    with open(store._path('ETHUSDT', '1m', 'close'), 'ab') as f:
+        f.write(np.float64(10.5).tobytes()[:3])
+    readable = len(store.read('ETHUSDT', '1m')['close'])
+    written = store.append('ETHUSDT', '1m', make_bars(10, 5))
+    columns = store.read('ETHUSDT', '1m')
+    sizes = {os.path.getsize(store._path('ETHUSDT', '1m', column)) for column in COLUMNS}
+    if readable != 10 or written != 5 or sizes != {15 * 8}:
+        print(f"❌ Expected 10 readable rows and 15 after repair, got {readable}, wrote {written}, sizes {sizes}")
+        return False
+    if not np.array_equal(columns['close'], make_bars(0, 15)['close']) or not np.array_equal(columns['open_time'], make_bars(0, 15)['open_time']):
+        print("❌ Columns misaligned after repair")
+        return False
+    print("✅ Torn row ignored on read, trimmed before the next append, columns aligned")
+    return True
+
+def test_slicing():
+    """slice() is start-inclusive, end-exclusive; tail, last_open_time and freshness follow the data"""
+    print("\n🧪 Testing range slicing...")
+    store = KlineStore(tempfile.mkdtemp())
+    store.append('SOLUSDT', '1m', make_bars(0, 50))
+    window = store.slice('SOLUSDT', '1m', START + 10 * STEP, START + 20 * STEP)
+    between = store.slice('SOLUSDT', '1m', START + 10 * STEP + 1, START + 20 * STEP + 1)
+    empty = store.slice('SOLUSDT', '1m', START + 100 * STEP)
+    tail = store.tail('SOLUSDT', '1m', 5)
+    last = store.last_open_time('SOLUSDT', '1m')
+    if list(window['close']) != [i + 0.5 for i in range(10, 20)] or between['close'][0] != 11.5 or len(between['close']) != 10:
+        print(f"❌ Wrong window: {list(window['close'])} / {list(between['close'])}")
+        return False
+    if len(empty['close']) or list(tail['close']) != [45.5, 46.5, 47.5, 48.5, 49.5] or last != START + 49 * STEP:
+        print(f"❌ Wrong empty/tail/last: {len(empty['close'])}, {list(tail['close'])}, {last}")
+        return False
+    if not store.is_fresh('SOLUSDT', '1m', last + STEP + 1) or store.is_fresh('SOLUSDT', '1m', last + 3 * STEP):
+        print("❌ Freshness does not follow the newest bar")
+        return False
+    if store.last_open_time('XRPUSDT', '1m') is not None or len(store.slice('XRPUSDT', '1m')['close']):
+        print("❌ Unknown symbol is not empty")
+        return False
+    print("✅ 10-bar windows on exact and in-between bounds, tail of 5, freshness and unknown symbols")
+    return True
+
+def main():
+    print("💾 Kline Store Test")
+    print("=" * 50)
+    tests = [test_append_and_read, test_repair, test_slicing]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming market data engine
+Runs the stream against a local fake Binance WebSocket server (no network needed)
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import websockets
+from market_data_stream import MarketDataStream
+
+def _kline(symbol, open_time, close, closed):
+    return {'stream': f"{symbol.lower()}@kline_1m", 'data': {
+        'e': 'kline', 'E': open_time + 60000, 's': symbol,
+        'k': {'t': open_time, 'T': open_time + 59999, 'o': '1', 'h': '2', 'l': '0.5', 'c': str(close), 'v': '10', 'x': closed}
+    }}
+
+class FakeBinanceServer:
+    """Local WebSocket server that plays scripted messages to each new connection"""
+
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+        self.paths = []
+        self.port = None
+        self._ready = threading.Event()
+
+    async def _handler(self, connection):
+        self.paths.append(connection.request.path)
+        messages = self.sessions.pop(0) if self.sessions else []
+        for message in messages:
+            await connection.send(json.dumps(message))
+        if not self.sessions:
+            await asyncio.sleep(3600)
+
+    async def _serve(self):
+        async with websockets.serve(self._handler, '127.0.0.1', 0) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await asyncio.Future()
+
+    def start(self):
+        threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True).start()
+        self._ready.wait(5)
+        return f"ws://127.0.0.1:{self.port}/stream"
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_price_table():
+    """Ticker, book and kline messages land in the in-memory tables"""
+    print("🧪 Testing streamed price table...")
+    server = FakeBinanceServer([[
+        {'stream': 'btcusdt@miniTicker', 'data': {'e': '24hrMiniTicker', 'E': 1, 's': 'BTCUSDT', 'c': '50000.5'}},
+        {'stream': 'btcusdt@bookTicker', 'data': {'e': 'bookTicker', 'u': 10, 's': 'BTCUSDT', 'b': '50000', 'B': '1', 'a': '50001', 'A': '2'}},
+        {'stream': 'btcusdt@bookTicker', 'data': {'e': 'bookTicker', 'u': 9, 's': 'BTCUSDT', 'b': '1', 'B': '1', 'a': '2', 'A': '2'}},
+        _kline('ETHUSDT', 0, 3000, True),
+        _kline('ETHUSDT', 180000, 3010, True),
+    ]])
+    stream = MarketDataStream(['BTCUSDT', 'ETHUSDT'], url=server.start()).start()
+    try:
+        if not _wait_for(lambda: stream.get_price('ETHUSDT') == 3010.0):
+            print(f"❌ Prices not received: {stream.prices}")
+            return False
+        if 'btcusdt@bookTicker' not in server.paths[0]:
+            print(f"❌ Unexpected subscription path: {server.paths[0]}")
+            return False
+        if stream.get_price('BTCUSDT') != 50000.5 or stream.get_book('BTCUSDT')['bid'] != 50000.0:
+            print(f"❌ Wrong price/book: {stream.prices} {stream.books}")
+            return False
+        if not any(g['reason'] == 'missing klines' and g['symbol'] == 'ETHUSDT' for g in stream.gaps):
+            print(f"❌ Kline gap not detected: {stream.gaps}")
+            return False
+        print("✅ Price table, stale book update and kline gap handled")
+        return True
+    finally:
+        stream.stop()
+
+def test_reconnect():
+    """A dropped connection is re-established and recorded as a gap"""
+    print("\n🧪 Testing reconnect and gap detection...")
+    server = FakeBinanceServer([
+        [{'data': {'e': '24hrMiniTicker', 'E': 1, 's': 'BTCUSDT', 'c': '100'}}],
+        [{'data': {'e': '24hrMiniTicker', 'E': 2, 's': 'BTCUSDT', 'c': '101'}}],
+    ])
+    stream = MarketDataStream(['BTCUSDT'], url=server.start()).start()
+    try:
+        if not _wait_for(lambda: stream.get_price('BTCUSDT') == 101.0):
+            print(f"❌ No data after reconnect: {stream.prices}")
+            return False
+        if stream.reconnects < 1 or not any(g['reason'] == 'reconnect' for g in stream.gaps):
+            print(f"❌ Reconnect not recorded: reconnects={stream.reconnects} gaps={stream.gaps}")
+            return False
+        print(f"✅ Reconnected ({stream.reconnects}x) and flagged {len(stream.gaps)} gap(s)")
+        return True
+    finally:
+        stream.stop()
+
+def main():
+    print("📡 Market Data Stream Test")
+    print("=" * 50)
+    tests = [test_price_table, test_reconnect]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
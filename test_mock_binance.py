@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the local Binance stand-in
+Runs the bot's REST client, execute_trade and the market data stream against it (no network needed)
+"""
+
+import os
+import sys
+import tempfile
+import time
+import requests
+import binance_api
+import exchange_info
+from binance_client import BinanceClient
+from exchange_info import ExchangeInfoCache
+from market_data_stream import MarketDataStream
+from mock_binance import MockBinanceServer, MOCK_API_KEY, MOCK_API_SECRET
+
+def _client(server, secret=MOCK_API_SECRET):
+    client = BinanceClient(MOCK_API_KEY, secret)
+    client.base_urls = {'SPOT': server.base_url, 'FUTURES': server.base_url}
+    return client
+
+def test_signature_and_rate_limits():
+    """Signed calls need the right secret; weight headers count up and 429 past the limit"""
+    print("🧪 Testing signatures and rate limits...")
+    server = MockBinanceServer(weight_limit=12, tick_interval=0).start()
+    try:
+        account = _client(server).get('FUTURES', '/fapi/v2/account', signed=True)
+        if account['assets'][0]['asset'] != 'USDT':
+            print(f"❌ Unexpected account payload: {account}")
+            return False
+        try:
+            _client(server, 'wrong-secret').get('FUTURES', '/fapi/v2/account', signed=True)
+            print("❌ Bad signature was accepted")
+            return False
+        except requests.exceptions.HTTPError as e:
+            if e.response.json()['code'] != -1022:
+                print(f"❌ Unexpected error: {e.response.text}")
+                return False
+        response = requests.get(server.base_url + '/fapi/v1/ticker/price', params={'symbol': 'BTCUSDT'})
+        if response.headers.get('X-MBX-USED-WEIGHT-1M') != '11':
+            print(f"❌ Unexpected weight header: {response.headers.get('X-MBX-USED-WEIGHT-1M')}")
+            return False
+        requests.get(server.base_url + '/fapi/v1/ticker/price', params={'symbol': 'BTCUSDT'})
+        response = requests.get(server.base_url + '/fapi/v1/ticker/price', params={'symbol': 'BTCUSDT'})
+        if response.status_code != 429 or 'Retry-After' not in response.headers:
+            print(f"❌ Expected 429 with Retry-After, got {response.status_code}")
+            return False
+    finally:
+        server.stop()
+    print(f"✅ Signature checked, weight tracked, limited: {server.rejected}")
+    return True
+
+def test_execute_trade_end_to_end():
+    """A live-mode futures trade with SL/TP goes through the stand-in"""
+    print("\n🧪 Testing execute_trade against the stand-in...")
+    server = MockBinanceServer(latency_ms=5, tick_interval=0).start()
+    tmp = tempfile.mkdtemp()
+    original_cache, stats_file = exchange_info._cache, binance_api.DAILY_STATS_FILE
+    os.environ['BINANCE_SPOT_BASE_URL'] = os.environ['BINANCE_FUTURES_BASE_URL'] = server.base_url
+    exchange_info._cache = ExchangeInfoCache(os.path.join(tmp, 'exchange_info.json'), client=_client(server))
+    binance_api.DAILY_STATS_FILE = os.path.join(tmp, 'stats.json')
+    try:
+        config = {
+            'BINANCE_API_KEY': MOCK_API_KEY, 'BINANCE_API_SECRET': MOCK_API_SECRET,
+            'FUTURES_LEVERAGE': 10, 'FUTURES_USE_BALANCE_PERCENT': 1, 'FUTURES_CONCURRENT_ORDERS': 1,
+            'FUTURES_STOP_LOSS_PERCENT': 1, 'FUTURES_TAKE_PROFIT_PERCENT': 2,
+        }
+        result = binance_api.execute_trade({'action': 'SELL', 'market': 'FUTURES', 'symbol': 'ETHUSDT', 'confidence': 90}, config)
+    finally:
+        del os.environ['BINANCE_SPOT_BASE_URL'], os.environ['BINANCE_FUTURES_BASE_URL']
+        exchange_info._cache, binance_api.DAILY_STATS_FILE = original_cache, stats_file
+        server.stop()
+    if result['status'] != 'FILLED':
+        print(f"❌ Trade failed: {result['reason']}")
+        return False
+    if len(server.exchange.get('FUTURES', '/fapi/v1/openOrders')) != 2:
+        print("❌ Expected stop-loss and take-profit resting on the stand-in")
+        return False
+    print(f"✅ Filled {result['response']['executedQty']} ETHUSDT, timings {result['timings']}")
+    return True
+
+def test_stream():
+    """The stand-in's WebSocket feed drives MarketDataStream"""
+    print("\n🧪 Testing streamed prices from the stand-in...")
+    server = MockBinanceServer(tick_interval=0.02).start()
+    stream = MarketDataStream(['BTCUSDT'], server.stream_url).start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and not (stream.get_price('BTCUSDT') and stream.get_book('BTCUSDT')):
+            time.sleep(0.02)
+        price, book = stream.get_price('BTCUSDT'), stream.get_book('BTCUSDT')
+    finally:
+        stream.stop()
+        server.stop()
+    if not price or not book or 'ETHUSDT' in stream.prices:
+        print(f"❌ Unexpected stream state: {stream.prices}")
+        return False
+    print(f"✅ Streamed BTCUSDT {price:.2f}, bid {book['bid']:.2f} / ask {book['ask']:.2f}")
+    return True
+
+def main():
+    print("🧪 Mock Binance Test")
+    print("=" * 50)
+    tests = [test_signature_and_rate_limits, test_execute_trade_end_to_end, test_stream]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test script for the non-blocking Telegram alert dispatcher
+Runs the dispatcher against a local stand-in for the Telegram API to check that
+alerts never block the caller, bursts become digests, 429s are retried after
+retry_after and a backed-up queue drops and summarizes old alerts
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+import notifier
+from notifier import AlertDispatcher
+
+class FakeTelegram:
+    """sendMessage stand-in: records texts, can be slow or answer 429 first"""
+
+    def __init__(self, latency=0.0, rate_limited=0):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.messages = []
+        self.times = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+                fake.gate.wait()
+                time.sleep(fake.latency)
+                if fake.rate_limited:
+                    fake.rate_limited -= 1
+                    status, payload = 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}
+                else:
+                    fake.messages.append(body['text'][0])
+                    fake.times.append(time.monotonic())
+                    status, payload = 200, {'ok': True}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.original_url = notifier.TELEGRAM_API_URL
+        notifier.TELEGRAM_API_URL = f"http://127.0.0.1:{self.server.server_address[1]}"
+        return self
+
+    def stop(self):
+        self.gate.set()
+        self.server.shutdown()
+        self.server.server_close()
+        notifier.TELEGRAM_API_URL = self.original_url
+
+def _trade(i, status='FILLED'):
+    return {'symbol': f"COIN{i}USDT", 'side': 'BUY', 'market': 'FUTURES', 'confidence': 80, 'reason': 'test', 'status': status}
+
+def test_does_not_block():
+    """Queuing an alert returns immediately even when Telegram takes a second"""
+    print("🧪 Testing non-blocking alerts...")
+    fake = FakeTelegram(latency=1.0).start()
+    dispatcher = AlertDispatcher('token', 1, coalesce_window=0, min_interval=0)
+    try:
+        start = time.perf_counter()
+        dispatcher.alert(_trade(1))
+        queued_ms = (time.perf_counter() - start) * 1000
+        delivered = dispatcher.flush(5)
+    finally:
+        dispatcher.close()
+        fake.stop()
+    if queued_ms > 50 or not delivered or len(fake.messages) != 1 or 'Symbol: COIN1USDT' not in fake.messages[0]:
+        print(f"❌ Queued in {queued_ms:.1f}ms, delivered {fake.messages}")
+        return False
+    print(f"✅ Queued in {queued_ms:.2f}ms, delivered in the background")
+    return True
+
+def test_burst_becomes_digest():
+    """Ten alerts fired at once go out as one digest message"""
+    print("\n🧪 Testing burst coalescing...")
+    fake = FakeTelegram().start()
+    dispatcher = AlertDispatcher('token', 1, coalesce_window=0.2, min_interval=0)
+    try:
+        for i in range(10):
+            dispatcher.alert(_trade(i))
+        dispatcher.flush(5)
+    finally:
+        dispatcher.close()
+        fake.stop()
+    if len(fake.messages) != 1 or not fake.messages[0].startswith('10 Trade Alerts') or dispatcher.stats['digests'] != 1:
+        print(f"❌ Expected one 10-alert digest, got {fake.messages}")
+        return False
+    print(f"✅ 10 alerts sent as {len(fake.messages)} digest")
+    return True
+
+def test_rate_limit_retry():
+    """A 429 is retried after retry_after and later messages stay min_interval apart"""
+    print("\n🧪 Testing 429 retry and per-chat spacing...")
+    fake = FakeTelegram(rate_limited=1).start()
+    dispatcher = AlertDispatcher('token', 1, coalesce_window=0, min_interval=0.3, max_retries=2)
+    try:
+        start = time.monotonic()
+        dispatcher.send('first')
+        dispatcher.flush(5)
+        dispatcher.send('second')
+        dispatcher.flush(5)
+    finally:
+        dispatcher.close()
+        fake.stop()
+    if fake.messages != ['first', 'second'] or dispatcher.stats['retries'] != 1 or fake.times[0] - start < 0.9:
+        print(f"❌ Expected a retried first message, got {fake.messages} {dispatcher.stats}")
+        return False
+    if fake.times[1] - fake.times[0] < 0.28:
+        print(f"❌ Messages only {fake.times[1] - fake.times[0]:.2f}s apart")
+        return False
+    print(f"✅ Retried after retry_after, spacing {fake.times[1] - fake.times[0]:.2f}s")
+    return True
+
+def test_backpressure():
+    """A stalled Telegram drops the oldest queued alerts and reports how many"""
+    print("\n🧪 Testing backpressure...")
+    fake = FakeTelegram().start()
+    fake.gate.clear()
+    dispatcher = AlertDispatcher('token', 1, max_queue=5, coalesce_window=0, min_interval=0)
+    try:
+        dispatcher.send('stuck')
+        time.sleep(0.1)
+        for i in range(20):
+            dispatcher.alert(_trade(i))
+        fake.gate.set()
+        dispatcher.flush(5)
+    finally:
+        dispatcher.close()
+        fake.stop()
+    digest = fake.messages[-1] if fake.messages else ''
+    if dispatcher.stats['dropped'] != 15 or 'COIN19USDT' not in digest or 'COIN0USDT' in digest or '15 alert(s) dropped' not in digest:
+        print(f"❌ Expected the newest 5 alerts plus a drop note, got {fake.messages} {dispatcher.stats}")
+        return False
+    print(f"✅ Dropped {dispatcher.stats['dropped']} oldest alerts, summarized in the next digest")
+    return True
+
+def test_stale_alerts_summarized():
+    """Alerts queued past max_age are counted instead of sent"""
+    print("\n🧪 Testing stale alerts...")
+    fake = FakeTelegram().start()
+    fake.gate.clear()
+    dispatcher = AlertDispatcher('token', 1, coalesce_window=0, min_interval=0, max_age=0.2)
+    try:
+        dispatcher.send('stuck')
+        time.sleep(0.1)
+        dispatcher.alert(_trade(1))
+        dispatcher.alert(_trade(2))
+        time.sleep(0.3)
+        fake.gate.set()
+        dispatcher.flush(5)
+    finally:
+        dispatcher.close()
+        fake.stop()
+    if len(fake.messages) != 2 or 'COIN1USDT' in fake.messages[1] or '2 alert(s) older than' not in fake.messages[1]:
+        print(f"❌ Expected stale alerts to be summarized, got {fake.messages}")
+        return False
+    print(f"✅ {dispatcher.stats['stale']} stale alerts summarized")
+    return True
+
+def main():
+    print("📱 Telegram Alert Dispatcher Test")
+    print("=" * 50)
+    tests = [test_does_not_block, test_burst_becomes_digest, test_rate_limit_retry, test_backpressure, test_stale_alerts_summarized]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for the simulated paper-trading exchange
+Drives execute_trade and the order endpoints with hand-made ticks
+"""
+
+import os
+import sys
+import tempfile
+import time
+import binance_api
+from paper_exchange import PaperExchange, PaperExchangeError
+
+def test_book_walk_and_margin():
+    """MARKET orders walk the book, pay fees and respect margin"""
+    print("🧪 Testing book matching, fees and margin...")
+    exchange = PaperExchange(balance=1000, fee_percent=0.1)
+    exchange.on_book('BTCUSDT', [(99, 1)], [(100, 0.5), (102, 10)])
+    exchange.post('FUTURES', '/fapi/v1/leverage', {'symbol': 'BTCUSDT', 'leverage': 10})
+    order = exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 1})
+    if abs(float(order['avgPrice']) - 101) > 1e-9:
+        print(f"❌ Expected avg price 101, got {order['avgPrice']}")
+        return False
+    wallet = float(exchange.get('FUTURES', '/fapi/v2/account')['assets'][0]['walletBalance'])
+    if abs(wallet - (1000 - 0.101)) > 1e-6:
+        print(f"❌ Fee not charged, wallet {wallet}")
+        return False
+    try:
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 200})
+        print("❌ Oversized order was accepted")
+        return False
+    except PaperExchangeError as e:
+        if e.code != -2019:
+            print(f"❌ Unexpected rejection: {e}")
+            return False
+    print("✅ Book walked, fee charged, oversized order rejected")
+    return True
+
+def test_protective_orders_replay():
+    """Stop-loss triggers on a replayed tick, realizes PnL and cancels the take-profit"""
+    print("\n🧪 Testing SL/TP triggers on replay...")
+    exchange = PaperExchange(balance=1000, fee_percent=0, clock=lambda: 0)
+    exchange.on_tick('ETHUSDT', 2000, 2000)
+    exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.1})
+    for order_type, stop in (('STOP_MARKET', 1960), ('TAKE_PROFIT_MARKET', 2100)):
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'SELL', 'type': order_type, 'stopPrice': stop, 'closePosition': 'true'})
+    ticks = [(1000 + i, 'ETHUSDT', 2000 - i * 0.01, 2000 - i * 0.01) for i in range(100000)]
+    start = time.perf_counter()
+    exchange.replay(ticks)
+    elapsed = time.perf_counter() - start
+    pnl = sum(float(i['income']) for i in exchange.get('FUTURES', '/fapi/v1/income', {'incomeType': 'REALIZED_PNL'}))
+    if exchange.positions or exchange.get('FUTURES', '/fapi/v1/openOrders'):
+        print("❌ Position or take-profit left open after the stop fired")
+        return False
+    if abs(pnl - (1960 - 2000) * 0.1) > 0.01:
+        print(f"❌ Unexpected realized PnL {pnl}")
+        return False
+    print(f"✅ Stop filled, PnL {pnl:.2f}, {len(ticks)} ticks in {elapsed:.2f}s")
+    return True
+
+def test_seeded_book_refreshes():
+    """Without a tick feed, books seeded from price_source (per the order's market) are re-priced once stale and SL/TP still fire"""
+    print("\n🧪 Testing re-seeded books without a stream...")
+    now = [0.0]
+    prices = {'SOLUSDT': 100.0}
+    asked = []
+    def price_source(symbol, market):
+        asked.append(market)
+        return prices.get(symbol)
+    exchange = PaperExchange(balance=1000, fee_percent=0, clock=lambda: now[0], price_source=price_source, price_max_age=5, spot_balance=1000)
+    exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'SOLUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 1})
+    exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'SOLUSDT', 'side': 'SELL', 'type': 'STOP_MARKET', 'stopPrice': 95, 'closePosition': 'true'})
+    prices['SOLUSDT'] = 94.0
+    now[0] = 3
+    exchange.refresh_prices()
+    if 'SOLUSDT' not in exchange.positions:
+        print("❌ A fresh seed was replaced before it went stale")
+        return False
+    now[0] = 10
+    exchange.refresh_prices()
+    if exchange.positions or exchange.get('FUTURES', '/fapi/v1/openOrders'):
+        print(f"❌ Stop did not fire on the re-seeded price: {exchange.positions}")
+        return False
+    prices['ETHUSDT'] = 50.0
+    exchange.post('SPOT', '/api/v3/order', {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 1})
+    if asked != ['FUTURES', 'FUTURES', 'SPOT']:
+        print(f"❌ Books were not seeded from the order's market: {asked}")
+        return False
+    print("✅ Stale seed re-priced at 94, stop filled")
+    return True
+
+def test_spot_wallet_and_locks():
+    """Spot and futures hold separate capital and a resting spot LIMIT locks its quote"""
+    print("\n🧪 Testing spot wallet and LIMIT locks...")
+    exchange = PaperExchange(balance=500, fee_percent=0, spot_balance=1000)
+    exchange.on_tick('ETHUSDT', 99, 101)
+    order = {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC', 'price': 100}
+    resting = exchange.post('SPOT', '/api/v3/order', dict(order, quantity=6))
+
+    def usdt():
+        balance = next(b for b in exchange.get('SPOT', '/api/v3/account')['balances'] if b['asset'] == 'USDT')
+        return float(balance['free']), float(balance['locked'])
+
+    locked = usdt()
+    try:
+        exchange.post('SPOT', '/api/v3/order', dict(order, quantity=5))
+        print("❌ Second LIMIT spent quote already locked by the first")
+        return False
+    except PaperExchangeError as e:
+        if e.code != -2010:
+            print(f"❌ Unexpected rejection: {e}")
+            return False
+    exchange.delete('SPOT', '/api/v3/order', {'symbol': 'ETHUSDT', 'orderId': resting['orderId']})
+    released = usdt()
+    exchange.post('SPOT', '/api/v3/order', dict(order, quantity=6))
+    exchange.on_tick('ETHUSDT', 98, 99)
+    filled = usdt()
+    futures_wallet = float(exchange.get('FUTURES', '/fapi/v2/account')['assets'][0]['walletBalance'])
+    if locked != (400, 600) or released != (1000, 0) or filled != (400, 0) or exchange.spot.get('ETH') != 6:
+        print(f"❌ Unexpected USDT (free, locked): {locked} -> {released} -> {filled}, ETH {exchange.spot.get('ETH')}")
+        return False
+    if futures_wallet != 500:
+        print(f"❌ Futures wallet {futures_wallet} shares spot capital")
+        return False
+    print(f"✅ Locked {locked}, released on cancel, filled {filled}, futures wallet untouched")
+    return True
+
+def test_execute_trade_paper():
+    """execute_trade in paper mode runs the full order flow without Binance keys"""
+    print("\n🧪 Testing execute_trade against the paper exchange...")
+    exchange = PaperExchange(balance=1000, fee_percent=0.04, clock=lambda: time.time())
+    exchange.on_tick('BTCUSDT', 50000, 50001)
+    original, stats_file = binance_api.get_paper_exchange, binance_api.DAILY_STATS_FILE
+    binance_api.get_paper_exchange = lambda config: exchange
+    binance_api.DAILY_STATS_FILE = os.path.join(tempfile.mkdtemp(), 'stats.json')
+    try:
+        config = {
+            'PAPER_TRADING': 1, 'FUTURES_LEVERAGE': 5, 'FUTURES_USE_BALANCE_PERCENT': 10,
+            'FUTURES_STOP_LOSS_PERCENT': 2, 'FUTURES_TAKE_PROFIT_PERCENT': 4,
+        }
+        result = binance_api.execute_trade({'action': 'BUY', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 80}, config)
+    finally:
+        binance_api.get_paper_exchange, binance_api.DAILY_STATS_FILE = original, stats_file
+    if result['status'] != 'FILLED' or not result['reason'].startswith('[PAPER]'):
+        print(f"❌ Unexpected result: {result['status']} {result['reason']}")
+        return False
+    open_orders = exchange.get('FUTURES', '/fapi/v1/openOrders')
+    if len(open_orders) != 2 or 'BTCUSDT' not in exchange.positions:
+        print(f"❌ Expected a position with SL and TP, got {open_orders}")
+        return False
+    print(f"✅ Paper fill at {result['response']['avgPrice']} with SL/TP resting")
+    return True
+
+def main():
+    print("📄 Paper Exchange Test")
+    print("=" * 50)
+    tests = [test_book_walk_and_margin, test_protective_orders_replay, test_seeded_book_refreshes, test_spot_wallet_and_locks, test_execute_trade_paper]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
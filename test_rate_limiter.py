@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the client-side Binance rate limiter
+Checks priority shedding, header re-sync, Retry-After handling, per-key order counts
+and that the client stays under the local stand-in's limits
+"""
+
+import sys
+import time
+import rate_limiter
+from binance_client import BinanceClient
+from mock_binance import MockBinanceServer, MOCK_API_KEY, MOCK_API_SECRET
+from rate_limiter import RateLimiter, RateLimitExceeded
+
+def _allowed(limiter, count, weight, priority, order=False, key=None):
+    allowed = 0
+    for _ in range(count):
+        try:
+            limiter.acquire(weight, priority, order, key)
+            allowed += 1
+        except RateLimitExceeded:
+            pass
+    return allowed
+
+def test_priority_shedding():
+    """Balance checks are shed while orders still get the reserved budget"""
+    print("🧪 Testing priority shedding...")
+    limiter = RateLimiter('FUTURES', weight_limit=100, safety=1.0, max_wait=0)
+    low = _allowed(limiter, 10, 20, 'low')
+    orders = _allowed(limiter, 50, 1, 'order', order=True)
+    if low != 3 or orders < 39 or limiter.stats['shed'] < 7:
+        print(f"❌ Expected 3 low-priority calls and ~40 orders, got {low} and {orders}")
+        return False
+    print(f"✅ {low} balance checks, {orders} orders, {limiter.stats['shed']} shed")
+    return True
+
+def test_header_sync_and_retry_after():
+    """Server weight headers shrink the budget and Retry-After pauses every caller"""
+    print("\n🧪 Testing header sync and Retry-After...")
+    limiter = RateLimiter('FUTURES', weight_limit=1000, safety=1.0, max_wait=2)
+    limiter.update({'x-mbx-used-weight-1m': '900', 'X-MBX-ORDER-COUNT-10S': '12'})
+    usage = limiter.usage()
+    if _allowed(limiter, 1, 5, 'low') != 0 or usage['server_used'] != {'weight_1m': 900} or usage['orders_used']['unsigned']['orders_10s'] != 12:
+        print(f"❌ Header counts not applied: {limiter.usage()}")
+        return False
+    limiter.update({'Retry-After': '1'}, status=429)
+    start = time.monotonic()
+    limiter.acquire(1, 'order', order=True)
+    waited = time.monotonic() - start
+    if not 0.8 < waited < 1.8 or limiter.stats['throttled'] != 1:
+        print(f"❌ Expected the order to wait out the 1s ban, waited {waited:.2f}s")
+        return False
+    print(f"✅ Synced to 900 used, order waited {waited:.2f}s after a 429")
+    return True
+
+def test_order_windows():
+    """Orders over the 10-second budget wait for refill instead of hitting the exchange"""
+    print("\n🧪 Testing order-count windows...")
+    limiter = RateLimiter('FUTURES', order_limits=[(10, 10)], safety=1.0, max_wait=2)
+    start = time.monotonic()
+    _allowed(limiter, 11, 1, 'order', order=True)
+    elapsed = time.monotonic() - start
+    if limiter.stats['orders'] != 11 or not 0.8 < elapsed < 1.8:
+        print(f"❌ Expected the 11th order to wait ~1s, took {elapsed:.2f}s")
+        return False
+    print(f"✅ 11th order waited {elapsed:.2f}s for the 10/10s window")
+    return True
+
+def test_order_counts_per_key():
+    """One account's order burst and order-count headers do not hold back another's; weight stays shared"""
+    print("\n🧪 Testing per-key order counts...")
+    limiter = RateLimiter('FUTURES', weight_limit=1000, order_limits=[(5, 10)], safety=1.0, max_wait=0)
+    first = _allowed(limiter, 10, 1, 'order', order=True, key='key-alpha')
+    limiter.update({'x-mbx-used-weight-1m': '400', 'x-mbx-order-count-10s': '5'}, key='key-alpha')
+    second = _allowed(limiter, 10, 1, 'order', order=True, key='key-beta')
+    usage = limiter.usage()
+    if (first, second) != (5, 5) or set(usage['orders_used']) != {'lpha', 'beta'}:
+        print(f"❌ Expected 5 orders per key, got {first} and {second}, usage {usage['orders_used']}")
+        return False
+    if usage['weight_used'] < 400 or usage['orders_used']['lpha']['orders_10s'] != 5:
+        print(f"❌ Shared weight or the first key's header count was lost: {usage}")
+        return False
+    print(f"✅ 5 orders each for two keys, shared weight {usage['weight_used']:.0f}")
+    return True
+
+def test_client_against_stand_in():
+    """BinanceClient sheds balance reads before the stand-in would answer 429"""
+    print("\n🧪 Testing the client against the stand-in...")
+    server = MockBinanceServer(weight_limit=50, tick_interval=0).start()
+    client = BinanceClient(MOCK_API_KEY, MOCK_API_SECRET)
+    client.base_urls = {'SPOT': server.base_url, 'FUTURES': server.base_url}
+    original = dict(rate_limiter._limiters)
+    rate_limiter._limiters['FUTURES'] = limiter = RateLimiter('FUTURES', weight_limit=50, safety=1.0, max_wait=0)
+    try:
+        balances = 0
+        for _ in range(20):
+            try:
+                client.get('FUTURES', '/fapi/v2/account', signed=True)
+                balances += 1
+            except RateLimitExceeded:
+                pass
+        server.set_price('BTCUSDT', 60000)
+        order = client.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.001}, signed=True)
+    finally:
+        rate_limiter._limiters.clear()
+        rate_limiter._limiters.update(original)
+        server.stop()
+    if server.rejected['rate_limit'] or order['status'] != 'FILLED' or balances != 7:
+        print(f"❌ Expected 7 balance reads, a fill and no 429s, got {balances}, {order['status']}, {server.rejected}")
+        return False
+    print(f"✅ {balances} balance reads, order filled, usage {limiter.usage()['server_used']}")
+    return True
+
+def main():
+    print("🚦 Rate Limiter Test")
+    print("=" * 50)
+    tests = [test_priority_shedding, test_header_sync_and_retry_after, test_order_windows, test_order_counts_per_key, test_client_against_stand_in]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
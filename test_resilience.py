@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for the retry, hedging and circuit-breaker layer
+Checks jittered retries, order-safe retry rules (refused and DNS failures count
+as unsent), thread-safe counters, fail-fast circuits, stage budgets, hedged GETs
+and that a failed balance read no longer sizes a trade
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import urllib3
+import binance_api
+import coingecko_api
+import resilience
+from mock_binance import MockBinanceServer
+from resilience import CircuitOpenError, DeadlineExceeded, ServiceGuard, is_transient, stage_budget
+from risk_state import get_risk_state
+
+class Flaky:
+    """Raises the given errors in turn, then returns 'ok'; records each attempt's timeout"""
+
+    def __init__(self, *errors, delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+def test_retries():
+    """Transient errors are retried; orders only retry a connection that never opened"""
+    print("🧪 Testing retries...")
+    guard = ServiceGuard('test', attempts=3, base_delay=0.01)
+    flaky = Flaky(requests.exceptions.ReadTimeout(), requests.exceptions.ConnectionError())
+    if guard.call(flaky) != 'ok' or guard.stats['retries'] != 2:
+        print(f"❌ Expected two retries then success, got {guard.stats}")
+        return False
+    order = Flaky(requests.exceptions.ReadTimeout())
+    try:
+        guard.call(order, idempotent=False)
+        print("❌ A timed-out order was sent twice")
+        return False
+    except requests.exceptions.ReadTimeout:
+        pass
+    if guard.call(Flaky(requests.exceptions.ConnectTimeout()), idempotent=False) != 'ok' or len(order.timeouts) != 1:
+        print("❌ An order that never connected should be retried")
+        return False
+    print(f"✅ Reads retried, timed-out order not repeated: {guard.stats}")
+    return True
+
+def test_unsent_orders_and_shared_stats():
+    """Refused and unresolvable connections are safe to retry for orders; counters survive concurrent calls"""
+    print("\n🧪 Testing unsent-order detection and shared counters...")
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    try:
+        requests.post(f"http://127.0.0.1:{port}/fapi/v1/order", timeout=2)
+        refused = None
+    except requests.exceptions.ConnectionError as e:
+        refused = e
+    dns = requests.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, '/fapi/v1/order', urllib3.exceptions.NameResolutionError('fapi.invalid', None, socket.gaierror(-2, 'Name or service not known'))))
+    read = requests.exceptions.ConnectionError(urllib3.exceptions.ProtocolError('Connection aborted.', ConnectionResetError()))
+    if refused is None or not is_transient(refused, idempotent=False) or not is_transient(dns, idempotent=False) or is_transient(read, idempotent=False):
+        print(f"❌ Wrong order retry decisions: refused={refused!r} dns={is_transient(dns, False)} reset={is_transient(read, False)}")
+        return False
+    guard = ServiceGuard('test', attempts=1)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: guard.call(lambda timeout: None), range(2000)))
+    if guard.status()['calls'] != 2000:
+        print(f"❌ Lost counter updates: {guard.status()}")
+        return False
+    print(f"✅ Refused/DNS orders retryable, reset order not, {guard.status()['calls']} calls counted")
+    return True
+
+def test_circuit_breaker():
+    """A failing service fails fast once open and recovers through one probe"""
+    print("\n🧪 Testing the circuit breaker...")
+    guard = ServiceGuard('test', attempts=1, failure_threshold=3, reset_timeout=0.2)
+    for _ in range(3):
+        try:
+            guard.call(Flaky(requests.exceptions.ConnectionError()))
+        except requests.exceptions.ConnectionError:
+            pass
+    slow = Flaky(delay=1.0)
+    start = time.perf_counter()
+    try:
+        guard.call(slow)
+        print("❌ Open circuit let a call through")
+        return False
+    except CircuitOpenError:
+        pass
+    if time.perf_counter() - start > 0.01 or slow.timeouts:
+        print("❌ Open circuit did not fail fast")
+        return False
+    time.sleep(0.25)
+    if guard.call(Flaky()) != 'ok' or guard.breaker.state != 'closed':
+        print(f"❌ Probe did not close the circuit: {guard.status()}")
+        return False
+    print(f"✅ Opened after 3 failures, failed fast, closed after a probe: {guard.status()}")
+    return True
+
+def test_stage_budget():
+    """Retries stop at the stage budget and each attempt's timeout is capped by what is left"""
+    print("\n🧪 Testing stage budgets...")
+    guard = ServiceGuard('test', attempts=20, base_delay=0.05, max_delay=0.05, failure_threshold=100)
+    flaky = Flaky(*[requests.exceptions.ReadTimeout()] * 20, delay=0.05)
+    start = time.perf_counter()
+    try:
+        with stage_budget(0.5):
+            guard.call(flaky)
+        print("❌ Expected the budget to run out")
+        return False
+    except (DeadlineExceeded, requests.exceptions.ReadTimeout):
+        pass
+    elapsed = time.perf_counter() - start
+    if elapsed > 0.65 or max(flaky.timeouts) > 0.5 or flaky.timeouts[-1] >= flaky.timeouts[0]:
+        print(f"❌ Took {elapsed:.2f}s with timeouts {flaky.timeouts}")
+        return False
+    print(f"✅ Gave up after {elapsed:.2f}s and {len(flaky.timeouts)} attempts instead of 20 x 10s")
+    return True
+
+def test_hedged_get():
+    """A slow first GET is overtaken by the hedge"""
+    print("\n🧪 Testing hedged requests...")
+    guard = ServiceGuard('test', hedge_after=0.05)
+    calls = []
+
+    def slow_first(timeout):
+        calls.append(timeout)
+        time.sleep(0.5 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    start = time.perf_counter()
+    result = guard.call(slow_first, hedge=True)
+    elapsed = time.perf_counter() - start
+    if result != 2 or elapsed > 0.3 or guard.stats['hedge_wins'] != 1:
+        print(f"❌ Expected the hedge to win quickly, got {result} after {elapsed:.2f}s")
+        return False
+    print(f"✅ Hedge answered in {elapsed * 1000:.0f}ms instead of 500ms")
+    return True
+
+def test_balance_failure_skips_trade():
+    """An unreadable balance fails the trade and frees its risk slot instead of sizing off 0"""
+    print("\n🧪 Testing balance failures...")
+    server = MockBinanceServer(error_rate=1.0, tick_interval=0).start()
+    tmp = tempfile.mkdtemp()
+    stats_file = binance_api.DAILY_STATS_FILE
+    original_guards = dict(resilience._guards)
+    resilience._guards.clear()
+    os.environ['BINANCE_SPOT_BASE_URL'] = os.environ['BINANCE_FUTURES_BASE_URL'] = server.base_url
+    binance_api.DAILY_STATS_FILE = os.path.join(tmp, 'stats.json')
+    try:
+        config = {
+            'BINANCE_API_KEY': 'key', 'BINANCE_API_SECRET': 'secret',
+            'FUTURES_LEVERAGE': 10, 'FUTURES_USE_BALANCE_PERCENT': 1, 'FUTURES_MAX_TRADES_PER_DAY': 5,
+        }
+        with stage_budget(5):
+            result = binance_api.execute_trade({'action': 'BUY', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 90}, config)
+        trades = get_risk_state(binance_api.DAILY_STATS_FILE).snapshot()['trades']
+    finally:
+        del os.environ['BINANCE_SPOT_BASE_URL'], os.environ['BINANCE_FUTURES_BASE_URL']
+        binance_api.DAILY_STATS_FILE = stats_file
+        resilience._guards.clear()
+        resilience._guards.update(original_guards)
+        server.stop()
+    if result['status'] != 'FAILED' or 'Balance unavailable' not in result['reason'] or trades != 0:
+        print(f"❌ Expected a failed, released trade, got {result['status']}: {result['reason']} ({trades} trades)")
+        return False
+    if 'order' in result['timings']:
+        print("❌ An order was sent without a known balance")
+        return False
+    print(f"✅ {result['reason'][:60]}...")
+    return True
+
+def test_market_data_guards_propagate():
+    """An open CoinGecko circuit or spent budget reaches the caller instead of looking like an empty market"""
+    print("\n🧪 Testing market data guard errors...")
+    url = coingecko_api.COINGECKO_URL
+    original_guards = dict(resilience._guards)
+    resilience._guards['coingecko'] = ServiceGuard('coingecko', attempts=1, failure_threshold=1, reset_timeout=60)
+    # Nothing listens on the discard port, so the first call fails and opens the circuit
+    coingecko_api.COINGECKO_URL = 'http://127.0.0.1:9'
+    raised = []
+    try:
+        unreachable = coingecko_api.fetch_top_coins(5)
+        try:
+            coingecko_api.fetch_top_coins(5)
+        except CircuitOpenError:
+            raised.append('circuit')
+        resilience._guards['coingecko'] = ServiceGuard('coingecko', attempts=1)
+        try:
+            with stage_budget(0.001):
+                time.sleep(0.01)
+                coingecko_api.fetch_top_coins(5)
+        except DeadlineExceeded:
+            raised.append('deadline')
+    finally:
+        coingecko_api.COINGECKO_URL = url
+        resilience._guards.clear()
+        resilience._guards.update(original_guards)
+    if unreachable != [] or raised != ['circuit', 'deadline']:
+        print(f"❌ Expected [] then both guard errors, got {unreachable} and {raised}")
+        return False
+    print("✅ Connection errors return no data, open circuits and spent budgets raise")
+    return True
+
+def main():
+    print("🛡️  Resilience Test")
+    print("=" * 50)
+    tests = [test_retries, test_unsent_orders_and_shared_stats, test_circuit_breaker, test_stage_budget, test_hedged_get, test_balance_failure_skips_trade, test_market_data_guards_propagate]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
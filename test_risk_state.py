@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory daily risk state
+Checks that concurrent reservations never overshoot the trade limit, that the file survives a reload
+and that reservations are written in the background instead of once each
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from risk_state import RiskState
+
+def test_concurrent_reservations():
+    """Many threads reserving at once get exactly max_trades slots"""
+    print("🧪 Testing concurrent reservations...")
+    state = RiskState(os.path.join(tempfile.mkdtemp(), 'stats.json'))
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: state.try_reserve(max_trades=10), range(200)))
+    granted = results.count(None)
+    if granted != 10 or state.snapshot()['trades'] != 10:
+        print(f"❌ Expected 10 reservations, granted {granted}, counted {state.snapshot()['trades']}")
+        return False
+    if results[-1] != "Max trades per day (10) reached.":
+        print(f"❌ Unexpected rejection reason: {results[-1]}")
+        return False
+    print(f"✅ {granted} of {len(results)} reservations granted")
+    return True
+
+def test_release_and_loss_limit():
+    """Released slots can be reused and the daily loss limit blocks new trades"""
+    print("\n🧪 Testing release and loss limit...")
+    state = RiskState(os.path.join(tempfile.mkdtemp(), 'stats.json'))
+    state.try_reserve(max_trades=1)
+    state.release()
+    if state.try_reserve(max_trades=1) is not None:
+        print("❌ Released slot was not reusable")
+        return False
+    state.add_realized_pnl(-30)
+    state.add_realized_pnl(-25)
+    reason = state.try_reserve(max_loss=50)
+    if reason != "Max daily loss ($50) reached.":
+        print(f"❌ Expected the loss limit to trigger, got {reason}")
+        return False
+    print(f"✅ {reason}")
+    return True
+
+def test_persistence():
+    """The file is written atomically and picked up by a fresh instance"""
+    print("\n🧪 Testing persistence and reload...")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'stats.json')
+    state = RiskState(path)
+    state.try_reserve()
+    state.set_realized_pnl(12.5)
+    state.close()
+    with open(path) as f:
+        stored = json.load(f)
+    leftovers = [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    reloaded = RiskState(path).snapshot()
+    if stored['trades'] != 1 or reloaded['realized_pnl'] != 12.5 or leftovers:
+        print(f"❌ Unexpected stored state {stored}, reloaded {reloaded}, temp files {leftovers}")
+        return False
+    # With a shared file, a second process's update is seen on the next mutation
+    state = RiskState(path, shared=True)
+    other = RiskState(path, shared=True)
+    other.try_reserve()
+    state.add_realized_pnl(1.0)
+    if state.snapshot() != {**reloaded, 'trades': 2, 'realized_pnl': 13.5}:
+        print(f"❌ Missed the other writer's update: {state.snapshot()}")
+        return False
+    print(f"✅ Reloaded {state.snapshot()}")
+    return True
+
+def test_background_persistence():
+    """Reservations stay in memory; one background write covers a burst of them"""
+    print("\n🧪 Testing background persistence...")
+    path = os.path.join(tempfile.mkdtemp(), 'stats.json')
+    state = RiskState(path, flush_interval=0.2)
+    writes = []
+    write = state._write
+    state._write = lambda stats: (writes.append(stats), write(stats))
+    for _ in range(50):
+        state.try_reserve()
+        state.release()
+    state.try_reserve()
+    time.sleep(0.5)
+    with open(path) as f:
+        stored = json.load(f)
+    state.close()
+    if stored['trades'] != 1 or not 1 <= len(writes) <= 3:
+        print(f"❌ Expected a few batched writes of 1 trade, got {len(writes)} writes, stored {stored}")
+        return False
+    print(f"✅ 101 updates persisted in {len(writes)} writes")
+    return True
+
+def main():
+    print("🛡️  Risk State Test")
+    print("=" * 50)
+    tests = [test_concurrent_reservations, test_release_and_loss_limit, test_persistence, test_background_persistence]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test script for the local rule engine's fallback
+Checks which rule signal replaces a failed Gemini call and that genuine model HOLDs are kept
+"""
+
+import sys
+from gemini_strategy import get_trade_signal
+from rule_engine import apply_rule_fallback
+
+COINS = [{'symbol': 'btc', 'price': 60000}, {'symbol': 'eth', 'price': 3000}, {'symbol': 'sol', 'price': 150}]
+
+RULE_SIGNALS = {
+    'BTCUSDT': {'action': 'HOLD', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 0, 'reason': '[RULES] quiet'},
+    'ETHUSDT': {'action': 'BUY', 'market': 'FUTURES', 'symbol': 'ETHUSDT', 'confidence': 60, 'reason': '[RULES] momentum'},
+    'SOLUSDT': {'action': 'SELL', 'market': 'FUTURES', 'symbol': 'SOLUSDT', 'confidence': 75, 'reason': '[RULES] volume spike'},
+    # Never sent to the model, so never a fallback
+    'XRPUSDT': {'action': 'BUY', 'market': 'FUTURES', 'symbol': 'XRPUSDT', 'confidence': 95, 'reason': '[RULES] breakout'},
+}
+
+def test_multi_coin_failure():
+    """A failed call about several coins falls back to the best actionable rule signal among them"""
+    print("🧪 Testing the fallback for a multi-coin call...")
+    failed = get_trade_signal(COINS, None)
+    signal = apply_rule_fallback(failed, RULE_SIGNALS)
+    if not failed.get('error') or failed.get('symbols') != ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']:
+        print(f"❌ Failure not marked with the coins asked about: {failed}")
+        return False
+    if signal['symbol'] != 'SOLUSDT' or signal['action'] != 'SELL':
+        print(f"❌ Expected the SOLUSDT rule signal, got {signal}")
+        return False
+    print(f"✅ Fell back to {signal['symbol']} {signal['action']} ({signal['confidence']})")
+    return True
+
+def test_single_coin_and_genuine_hold():
+    """One coin only uses its own rule signal; a model HOLD without the error marker is kept"""
+    print("\n🧪 Testing single-coin fallback and genuine HOLDs...")
+    own = apply_rule_fallback(get_trade_signal(COINS[1:2], None), RULE_SIGNALS)
+    quiet = apply_rule_fallback(get_trade_signal(COINS[:1], None), RULE_SIGNALS)
+    hold = {'action': 'HOLD', 'market': 'SPOT', 'symbol': 'SOLUSDT', 'confidence': 0, 'reason': 'Sideways'}
+    if own['symbol'] != 'ETHUSDT' or own['action'] != 'BUY':
+        print(f"❌ Expected the ETHUSDT rule signal, got {own}")
+        return False
+    if not quiet.get('error') or apply_rule_fallback(hold, RULE_SIGNALS) is not hold:
+        print(f"❌ A HOLD was replaced: {quiet}")
+        return False
+    print("✅ Own coin's rule used, quiet rules and model HOLDs left alone")
+    return True
+
+def main():
+    print("📐 Rule Engine Test")
+    print("=" * 50)
+    tests = [test_multi_coin_failure, test_single_coin_and_genuine_hold]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
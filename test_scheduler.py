@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the scheduler
+Checks wall-clock aligned ticks, counting (not replaying) ticks missed by a slow
+run, price-move events coalescing while one is pending, the event cooldown and
+failure counting, using a stub job on short intervals
+"""
+
+import sys
+import threading
+import time
+from scheduler import PriceMoveTrigger, Scheduler
+
+class StubJob:
+    """Records (trigger, start time) per run; sleeps on the runs listed in slow"""
+
+    def __init__(self, slow=None, fail=()):
+        self.runs = []
+        self.slow = slow or {}
+        self.fail = fail
+
+    def __call__(self, trigger):
+        self.runs.append((trigger, time.time()))
+        time.sleep(self.slow.get(len(self.runs), 0))
+        if len(self.runs) in self.fail:
+            raise RuntimeError("boom")
+
+def run_for(scheduler, seconds, run_immediately=True):
+    thread = threading.Thread(target=scheduler.run_forever, args=(run_immediately,), daemon=True)
+    thread.start()
+    time.sleep(seconds)
+    scheduler.stop()
+    thread.join(2)
+    return not thread.is_alive()
+
+def test_next_tick():
+    """Ticks land on interval boundaries (plus the offset), strictly after now"""
+    print("🧪 Testing aligned ticks...")
+    hourly = Scheduler(StubJob(), 3600)
+    shifted = Scheduler(StubJob(), 300, offset=10)
+    checks = [
+        (hourly.next_tick(7199.5), 7200),
+        (hourly.next_tick(7200), 10800),
+        (shifted.next_tick(1205), 1210),
+        (shifted.next_tick(1210), 1510),
+    ]
+    wrong = [(got, want) for got, want in checks if got != want]
+    if wrong or hourly.next_tick() % 3600 != 0:
+        print(f"❌ Got/expected: {wrong}")
+        return False
+    print("✅ 7199.5 → 7200, 7200 → 10800, offset 10: 1205 → 1210, 1210 → 1510")
+    return True
+
+def test_missed_ticks():
+    """A run that overruns several ticks counts them as missed and resumes on the next boundary"""
+    print("\n🧪 Testing missed ticks...")
+    job = StubJob(slow={1: 0.75}, fail=(2,))
+    scheduler = Scheduler(job, 0.2)
+    if not run_for(scheduler, 1.35, run_immediately=False):
+        print("❌ Scheduler did not stop")
+        return False
+    counters = scheduler.counters
+    if counters['missed_ticks'] < 3 or counters['failures'] != 1 or counters['ticks'] != len(job.runs):
+        print(f"❌ Unexpected counters after a 0.75s run on 0.2s ticks: {counters}")
+        return False
+    # Runs after the slow one start on fresh 0.2s boundaries instead of back to back
+    starts = [started for _, started in job.runs]
+    off_grid = [round(started % 0.2, 3) for started in starts if 0.02 < started % 0.2 < 0.18]
+    if len(job.runs) > 4 or off_grid or any(later - earlier < 0.15 for earlier, later in zip(starts, starts[1:])):
+        print(f"❌ Missed ticks were replayed: {len(job.runs)} runs, off-boundary starts {off_grid}")
+        return False
+    print(f"✅ {counters['missed_ticks']} ticks missed and skipped, {counters['ticks']} runs on boundaries, failure counted")
+    return True
+
+def test_events():
+    """Moves past the threshold fire one event; more while it waits for the cooldown are coalesced"""
+    print("\n🧪 Testing price-move events...")
+    job = StubJob()
+    scheduler = Scheduler(job, 60, event_cooldown=0.3)
+    trigger = PriceMoveTrigger(scheduler, 1.0)
+    thread = threading.Thread(target=scheduler.run_forever, daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    # 100 is the reference; +0.5% is ignored, +1.2% fires, then -2.2% from the new reference is coalesced
+    for price in (100, 100.5, 101.2, 101.5, 99):
+        trigger('BTCUSDT', price)
+    trigger('ETHUSDT', 3000)
+    time.sleep(0.45)
+    after_first = list(job.runs)
+    trigger('ETHUSDT', 3100)
+    time.sleep(0.5)
+    scheduler.stop()
+    thread.join(2)
+    triggers = [name for name, _ in job.runs]
+    if triggers != ['startup', 'BTCUSDT moved +1.20%', 'ETHUSDT moved +3.33%']:
+        print(f"❌ Unexpected runs: {triggers}")
+        return False
+    startup, first, second = [started for _, started in job.runs]
+    if first - startup < 0.29 or second - first < 0.29 or len(after_first) != 2:
+        print(f"❌ Cooldown not respected: {first - startup:.2f}s, {second - first:.2f}s")
+        return False
+    if scheduler.counters['events'] != 2 or scheduler.counters['coalesced_events'] != 1 or trigger.reference['BTCUSDT'] != 99:
+        print(f"❌ Unexpected counters: {scheduler.counters}, references {trigger.reference}")
+        return False
+    print(f"✅ 2 events {first - startup:.2f}s/{second - first:.2f}s apart, 1 coalesced: {scheduler.counters}")
+    return True
+
+def main():
+    print("⏰ Scheduler Test")
+    print("=" * 50)
+    tests = [test_next_tick, test_missed_ticks, test_events]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for the Gemini signal cache
+Checks fingerprint quantization, TTL and LRU eviction, single-flight dedup of
+concurrent identical requests, that failed calls are not cached, and that
+waiters get a HOLD when the call they share raises
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from signal_cache import SignalCache, market_fingerprint
+
+def coin(symbol, price, volume=1_000_000):
+    return {'symbol': symbol, 'price': price, 'volume': volume}
+
+def signal(symbol='BTCUSDT', **extra):
+    return dict({'action': 'BUY', 'market': 'SPOT', 'symbol': symbol, 'confidence': 80, 'reason': 'test'}, **extra)
+
+def test_fingerprint():
+    """Moves below the significant digits share a key, larger moves and other fields do not"""
+    print("🧪 Testing market fingerprints...")
+    base = market_fingerprint([coin('BTC', 60010.0)])
+    same = market_fingerprint([coin('BTC', 60040.0)])
+    moved = market_fingerprint([coin('BTC', 60100.0)])
+    finer = market_fingerprint([coin('BTC', 60040.0)], significant_digits=5)
+    other = market_fingerprint([coin('ETH', 60010.0)])
+    small = market_fingerprint([coin('BTC', 0.0012341)]) == market_fingerprint([coin('BTC', 0.0012339)])
+    if base != same or base in (moved, finer, other) or not small:
+        print("❌ Fingerprints did not follow the quantized prices")
+        return False
+    print("✅ 60010/60040 share a key at 3 digits; 60100, 5 digits and another symbol do not")
+    return True
+
+def test_ttl_and_lru():
+    """Entries expire after the TTL and the least recently used one is evicted first"""
+    print("\n🧪 Testing TTL and LRU eviction...")
+    calls = []
+
+    def compute(symbol):
+        calls.append(symbol)
+        return signal(symbol)
+
+    cache = SignalCache(ttl=0.2, max_entries=2)
+    a, b, c = [coin('A', 1.0)], [coin('B', 2.0)], [coin('C', 3.0)]
+    cache.get_or_compute(a, lambda: compute('A'))
+    cache.get_or_compute(b, lambda: compute('B'))
+    cache.get_or_compute(a, lambda: compute('A'))  # hit, A is now most recent
+    cache.get_or_compute(c, lambda: compute('C'))  # evicts B
+    cache.get_or_compute(a, lambda: compute('A'))  # still cached
+    cache.get_or_compute(b, lambda: compute('B'))  # recomputed
+    if calls != ['A', 'B', 'C', 'B'] or cache.stats['evictions'] != 2:
+        print(f"❌ Unexpected LRU behaviour: calls {calls}, stats {cache.stats}")
+        return False
+    time.sleep(0.25)
+    cache.get_or_compute(b, lambda: compute('B'))
+    if calls[-1:] != ['B'] or len(calls) != 5:
+        print(f"❌ Expired entry was served: calls {calls}")
+        return False
+    print(f"✅ B evicted before A, recomputed after the TTL: {cache.stats}")
+    return True
+
+def test_single_flight():
+    """Eight concurrent identical requests run one compute; a failed result is not cached"""
+    print("\n🧪 Testing single-flight dedup...")
+    cache = SignalCache(ttl=60)
+    market = [coin('BTC', 60000.0)]
+    calls = []
+    start = threading.Barrier(8)
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return signal()
+
+    def request():
+        start.wait()
+        return cache.get_or_compute(market, slow)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: request(), range(8)))
+    if len(calls) != 1 or any(result != signal() for result in results) or cache.stats['shared'] != 7:
+        print(f"❌ Expected one compute shared by 8 callers, got {len(calls)}: {cache.stats}")
+        return False
+    # Callers get copies, so one caller editing its signal does not change the cached one
+    results[0]['confidence'] = 0
+    if cache.get_or_compute(market, slow)['confidence'] != 80:
+        print("❌ Cached signal was changed through a returned copy")
+        return False
+
+    failing = [coin('ETH', 3000.0)]
+    errors = []
+
+    def error():
+        errors.append(1)
+        return signal('ETHUSDT', action='HOLD', confidence=0, error=True)
+
+    cache.get_or_compute(failing, error)
+    cache.get_or_compute(failing, error)
+    if len(errors) != 2:
+        print("❌ An error result was cached")
+        return False
+    print(f"✅ 1 compute for 8 callers, error results retried: {cache.stats}")
+    return True
+
+def test_owner_raises():
+    """When the caller doing the compute raises, it sees the error and waiters get a HOLD"""
+    print("\n🧪 Testing a failing shared compute...")
+    cache = SignalCache(ttl=60)
+    market = [coin('BTC', 60000.0)]
+    computing = threading.Event()
+
+    def boom():
+        computing.set()
+        time.sleep(0.2)
+        raise RuntimeError("model down")
+
+    def owner():
+        try:
+            cache.get_or_compute(market, boom)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        owned = pool.submit(owner)
+        computing.wait(1)
+        waiters = [pool.submit(cache.get_or_compute, market, boom) for _ in range(3)]
+        raised = owned.result()
+        held = [waiter.result() for waiter in waiters]
+    if raised != "model down":
+        print(f"❌ Owner did not see the error: {raised}")
+        return False
+    if any(result['action'] != 'HOLD' or not result.get('error') or 'model down' not in result['reason'] for result in held):
+        print(f"❌ Waiters did not get a HOLD: {held}")
+        return False
+    recomputed = cache.get_or_compute(market, signal)
+    if recomputed != signal():
+        print(f"❌ The failure was cached: {recomputed}")
+        return False
+    print(f"✅ Owner raised, {len(held)} waiters held, next call recomputed: {cache.stats}")
+    return True
+
+def main():
+    print("🗃️  Signal Cache Test")
+    print("=" * 50)
+    tests = [test_fingerprint, test_ttl_and_lru, test_single_flight, test_owner_raises]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for running several accounts in one process
+Checks the accounts file and that two paper accounts trade off one shared
+market snapshot while keeping separate balances and daily risk limits
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import gemini_strategy
+import main as bot
+import paper_exchange
+from benchmark import StubServices
+from paper_exchange import PaperExchange
+from risk_state import get_risk_state
+from supervisor import AccountSupervisor, load_accounts
+from utils import load_config
+
+def write_accounts(entries):
+    path = os.path.join(tempfile.mkdtemp(), 'accounts.json')
+    with open(path, 'w') as f:
+        json.dump(entries, f)
+    return path
+
+def test_load_accounts():
+    """Overrides are applied per account, secrets come from the environment and mistakes are refused"""
+    print("🧪 Testing the accounts file...")
+    base = load_config(env_file='does-not-exist.env')
+    os.environ['TEST_ALPHA_KEY'], os.environ['TEST_ALPHA_SECRET'] = 'alpha-key', 'alpha-secret'
+    try:
+        accounts = load_accounts(write_accounts([
+            {'name': 'alpha', 'BINANCE_API_KEY': '$TEST_ALPHA_KEY', 'BINANCE_API_SECRET': '$TEST_ALPHA_SECRET', 'FUTURES_LEVERAGE': '20'},
+            {'name': 'beta', 'PAPER_TRADING': 1, 'MIN_SIGNAL_CONFIDENCE': 80, 'SCHEDULE_INTERVAL': 5},
+        ]), base)
+        rejected = []
+        for entries in (
+            [{'name': 'a', 'PAPER_TRADING': 1}, {'name': 'a', 'PAPER_TRADING': 1}],
+            [{'name': 'a', 'PAPER_TRADING': 1, 'FUTURES_LEVRAGE': 5}],
+            [{'name': 'a', 'PAPER_TRADING': 1, 'FUTURES_STATS_FILE': 'x.json'}, {'name': 'b', 'PAPER_TRADING': 1, 'FUTURES_STATS_FILE': 'x.json'}],
+            [{'name': 'a', 'BINANCE_API_KEY': 'k', 'BINANCE_API_SECRET': 's'}, {'name': 'b', 'BINANCE_API_KEY': 'k', 'BINANCE_API_SECRET': 's'}],
+            [{'name': '../a'}],
+        ):
+            try:
+                load_accounts(write_accounts(entries), base)
+            except ValueError as e:
+                rejected.append(str(e))
+    finally:
+        del os.environ['TEST_ALPHA_KEY'], os.environ['TEST_ALPHA_SECRET']
+    alpha, beta = accounts
+    if alpha['BINANCE_API_KEY'] != 'alpha-key' or alpha['FUTURES_LEVERAGE'] != 20 or beta['MIN_SIGNAL_CONFIDENCE'] != 80:
+        print(f"❌ Overrides not applied: {alpha['BINANCE_API_KEY']} {alpha['FUTURES_LEVERAGE']!r} {beta['MIN_SIGNAL_CONFIDENCE']}")
+        return False
+    if alpha['FUTURES_STATS_FILE'] == beta['FUTURES_STATS_FILE'] or beta['SCHEDULE_INTERVAL'] != base['SCHEDULE_INTERVAL']:
+        print("❌ Accounts share a risk file or overrode a process-wide setting")
+        return False
+    if len(rejected) != 5:
+        print(f"❌ Expected 5 bad files to be refused, got {rejected}")
+        return False
+    print(f"✅ 2 accounts loaded, {len(rejected)} bad files refused (e.g. {rejected[3]})")
+    return True
+
+def test_accounts_trade_side_by_side():
+    """One snapshot, two paper accounts: separate balances, separate daily trade limits"""
+    print("\n🧪 Testing two accounts on one market snapshot...")
+    stubs = StubServices().start()
+    tmp = tempfile.mkdtemp()
+    gemini_url, log_trade = gemini_strategy.GEMINI_URL, bot.log_trade
+    gemini_strategy.GEMINI_URL = f"{stubs.url}/gemini/models/stand-in"
+    logged = []
+    bot.log_trade = logged.append
+    exchanges = {}
+    for name, balance in (('alpha', 1000), ('beta', 5000)):
+        exchanges[name] = PaperExchange(balance=balance, fee_percent=0.04, clock=time.time)
+        exchanges[name].on_tick('BTCUSDT', 50000, 50001)
+        paper_exchange._paper_exchanges[name] = exchanges[name]
+    try:
+        base = dict(
+            load_config(env_file='does-not-exist.env'),
+            GEMINI_API_KEY='stand-in', TELEGRAM_BOT_TOKEN=None, PAPER_TRADING=1,
+            FUTURES_LEVERAGE=5, FUTURES_USE_BALANCE_PERCENT=10, SIGNAL_CACHE_TTL=0, RULE_ENGINE=0, MULTI_SYMBOL_PIPELINE=0,
+        )
+        accounts = load_accounts(write_accounts([
+            {'name': 'alpha', 'FUTURES_MAX_TRADES_PER_DAY': 1, 'FUTURES_STATS_FILE': os.path.join(tmp, 'alpha.json')},
+            {'name': 'beta', 'FUTURES_MAX_TRADES_PER_DAY': 5, 'FUTURES_STATS_FILE': os.path.join(tmp, 'beta.json')},
+        ]), base)
+        supervisor = AccountSupervisor(accounts, bot.run_iteration)
+        market_data = [{'symbol': 'BTC', 'id': 'bitcoin', 'price': 50000.0, 'market_cap': 1e12, 'volume': 3e10}]
+        for iteration in (1, 2):
+            supervisor.run_tick(market_data, iteration)
+        trades = {name: get_risk_state(os.path.join(tmp, f"{name}.json")).snapshot()['trades'] for name in exchanges}
+        balances = {name: float(exchange.get('FUTURES', '/fapi/v2/account')['assets'][0]['walletBalance']) for name, exchange in exchanges.items()}
+    finally:
+        gemini_strategy.GEMINI_URL, bot.log_trade = gemini_url, log_trade
+        for name in exchanges:
+            paper_exchange._paper_exchanges.pop(name, None)
+        stubs.stop()
+    statuses = {}
+    for result in logged:
+        statuses.setdefault(result.get('account'), []).append(result['status'])
+    if statuses != {'alpha': ['FILLED', 'SKIPPED'], 'beta': ['FILLED', 'FILLED']}:
+        print(f"❌ Unexpected statuses per account: {statuses}")
+        return False
+    if trades != {'alpha': 1, 'beta': 2} or not balances['alpha'] < 1000 or not 1000 < balances['beta'] < 5000:
+        print(f"❌ Accounts leaked into each other: trades {trades}, balances {balances}")
+        return False
+    print(f"✅ {statuses}, trades {trades}, wallets {balances}")
+    return True
+
+def main():
+    print("👥 Account Supervisor Test")
+    print("=" * 50)
+    tests = [test_load_accounts, test_accounts_trade_side_by_side]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
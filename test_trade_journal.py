@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for the background trade journal
+Checks batching, non-blocking logging, rotation into gzip archives and the flush on close
+"""
+
+import glob
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from logger import TradeJournal
+
+def _trade(i):
+    return {'symbol': 'BTCUSDT', 'side': 'BUY', 'status': 'FILLED', 'confidence': i % 100, 'reason': f"trade {i}"}
+
+def test_batched_non_blocking():
+    """log() returns immediately and every record lands in order"""
+    print("🧪 Testing batched, non-blocking writes...")
+    path = os.path.join(tempfile.mkdtemp(), 'trade_log.jsonl')
+    journal = TradeJournal(path, fsync='never', max_queue=25000)
+    start = time.perf_counter()
+    for i in range(20000):
+        journal.log(_trade(i))
+    enqueue_us = (time.perf_counter() - start) / 20000 * 1e6
+    journal.close()
+    with open(path) as f:
+        reasons = [json.loads(line)['reason'] for line in f]
+    if reasons != [f"trade {i}" for i in range(20000)]:
+        print(f"❌ Expected 20000 ordered records, got {len(reasons)}")
+        return False
+    print(f"✅ 20000 records in {journal.stats['batches']} batches, {enqueue_us:.1f}µs per log() call")
+    return True
+
+def test_rotation():
+    """Size-based rotation leaves gzip archives plus a live file with nothing lost"""
+    print("\n🧪 Testing rotation and compression...")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'trade_log.jsonl')
+    journal = TradeJournal(path, fsync='always', batch_size=50, max_bytes=20000)
+    for i in range(2000):
+        journal.log(_trade(i))
+    journal.close()
+    archives = sorted(glob.glob(os.path.join(directory, 'trade_log.*.jsonl.gz')))
+    count = 0
+    for archive in archives:
+        with gzip.open(archive, 'rt') as f:
+            count += sum(1 for _ in f)
+    if os.path.exists(path):
+        with open(path) as f:
+            count += sum(1 for _ in f)
+    if not archives or count != 2000:
+        print(f"❌ Expected archives holding 2000 records, got {len(archives)} archives and {count} records")
+        return False
+    print(f"✅ {len(archives)} archives, {count} records, no loss")
+    return True
+
+def test_refuses_after_close():
+    """A closed journal drops new records instead of blocking"""
+    print("\n🧪 Testing log after close...")
+    journal = TradeJournal(os.path.join(tempfile.mkdtemp(), 'trade_log.jsonl'))
+    journal.close()
+    if journal.log(_trade(0)):
+        print("❌ Closed journal accepted a record")
+        return False
+    print("✅ Closed journal refused the record")
+    return True
+
+def main():
+    print("📝 Trade Journal Test")
+    print("=" * 50)
+    tests = [test_batched_non_blocking, test_rotation, test_refuses_after_close]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
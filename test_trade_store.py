@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite trade history
+Imports hand-made JSONL logs (twice, without duplicates) and checks the PnL, win-rate and per-symbol reports,
+then checks the same reports on what the bot itself logs for a paper trade
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import binance_api
+import main as bot
+import paper_exchange
+from logger import TradeJournal
+from paper_exchange import PaperExchange
+from trade_store import TradeStore
+from user_data_stream import stop_user_data_stream
+from utils import load_config
+
+TRADES = [
+    {'symbol': 'BTCUSDT', 'side': 'BUY', 'market': 'FUTURES', 'status': 'FILLED', 'confidence': 80, 'realized_pnl': 12.5,
+     'response': {'executedQty': '0.01', 'avgPrice': '60000'}, 'timestamp': '2024-03-01T10:00:00'},
+    {'symbol': 'BTCUSDT', 'side': 'SELL', 'market': 'FUTURES', 'status': 'FILLED', 'confidence': 70, 'realized_pnl': -4.0,
+     'response': {'executedQty': '0.01', 'avgPrice': '61000'}, 'timestamp': '2024-03-01T14:00:00'},
+    {'symbol': 'ETHUSDT', 'side': 'BUY', 'market': 'SPOT', 'status': 'FAILED', 'confidence': 60,
+     'response': None, 'timestamp': '2024-03-02T09:30:00'},
+    {'symbol': 'ETHUSDT', 'side': 'BUY', 'market': 'FUTURES', 'status': 'FILLED', 'confidence': 90, 'realized_pnl': 3.0,
+     'response': {'executedQty': '0.5', 'avgPrice': '3000'}, 'timestamp': '2024-03-02T11:00:00'},
+]
+
+def test_import_and_reports():
+    """Plain and gzipped JSONL imports feed the day, win-rate and symbol reports"""
+    print("🧪 Testing JSONL import and reports...")
+    directory = tempfile.mkdtemp()
+    plain = os.path.join(directory, 'trade_log.jsonl')
+    archive = os.path.join(directory, 'trade_log.20240301.jsonl.gz')
+    with gzip.open(archive, 'wt') as f:
+        f.writelines(json.dumps(t) + '\n' for t in TRADES[:2])
+    with open(plain, 'w') as f:
+        f.writelines(json.dumps(t) + '\n' for t in TRADES[2:])
+        f.write('{not json\n')
+    store = TradeStore(os.path.join(directory, 'trades.db'))
+    imported = store.import_jsonl(archive) + store.import_jsonl(plain)
+    # Importing the same logs again adds nothing and leaves the rollup alone
+    again = store.import_jsonl(archive) + store.import_jsonl(plain)
+    if imported != 4 or again != 0 or store.count() != 4:
+        print(f"❌ Expected 4 trades once, imported {imported} then {again}")
+        return False
+    if store.pnl_by_day() != [('2024-03-01', 2, 8.5), ('2024-03-02', 1, 3.0)]:
+        print(f"❌ Unexpected PnL by day: {store.pnl_by_day()}")
+        return False
+    if abs(store.win_rate() - 2 / 3) > 1e-9 or store.win_rate('BTCUSDT') != 0.5:
+        print(f"❌ Unexpected win rate: {store.win_rate()}")
+        return False
+    eth = store.symbol_stats()['ETHUSDT']
+    if (eth['trades'], eth['filled'], eth['failed'], eth['notional'], eth['avg_confidence']) != (2, 1, 1, 1500.0, 75.0):
+        print(f"❌ Unexpected ETHUSDT stats: {eth}")
+        return False
+    newest = store.trades(symbol='ETHUSDT', status='FILLED')
+    if len(newest) != 1 or newest[0]['confidence'] != 90:
+        print(f"❌ Unexpected filtered trades: {newest}")
+        return False
+    print(f"✅ Reports correct: {store.pnl_by_day()}")
+    return True
+
+def test_journal_sink():
+    """Trades logged through the journal land in the store once, whatever the timestamp's timezone"""
+    print("\n🧪 Testing journal-fed store...")
+    directory = tempfile.mkdtemp()
+    store = TradeStore(os.path.join(directory, 'trades.db'))
+    log_path = os.path.join(directory, 'trade_log.jsonl')
+    journal = TradeJournal(log_path, sinks=[store.insert_many])
+    # A timezone-aware stamp among naive ones is stored on its UTC day
+    aware = dict(TRADES[3], realized_pnl=1.0, timestamp='2024-03-03T01:30:00+02:00')
+    for trade in TRADES + [aware]:
+        journal.log(trade)
+    journal.close()
+    if store.count() != len(TRADES) + 1:
+        print(f"❌ Expected {len(TRADES) + 1} trades in the store, got {store.count()}")
+        return False
+    # The journal's own file is what an import would read: nothing new in it
+    if store.import_jsonl(log_path) != 0 or store.pnl_by_day() != [('2024-03-01', 2, 8.5), ('2024-03-02', 2, 4.0)]:
+        print(f"❌ Re-import duplicated trades: {store.count()} {store.pnl_by_day()}")
+        return False
+    print("✅ Journal batches mirrored into SQLite, re-import deduplicated")
+    return True
+
+def test_bot_records_realized_pnl():
+    """execute_trade's entry and the stop-loss fill journaled off the user-data stream give PnL and win rate"""
+    print("\n🧪 Testing PnL from the bot's own records...")
+    directory = tempfile.mkdtemp()
+    store = TradeStore(os.path.join(directory, 'trades.db'))
+    journal = TradeJournal(os.path.join(directory, 'trade_log.jsonl'), sinks=[store.insert_many])
+    exchange = PaperExchange(balance=1000, fee_percent=0, clock=time.time)
+    exchange.on_tick('BTCUSDT', 50000, 50000)
+    paper_exchange._paper_exchanges['store-test'] = exchange
+    log_trade = bot.log_trade
+    bot.log_trade = journal.log
+    config = dict(
+        load_config(env_file='does-not-exist.env'),
+        PAPER_TRADING=1, USER_DATA_STREAM=1, ACCOUNT_NAME='store-test', FUTURES_STATS_FILE=os.path.join(directory, 'stats.json'),
+        FUTURES_LEVERAGE=5, FUTURES_USE_BALANCE_PERCENT=10, FUTURES_STOP_LOSS_PERCENT=2, FUTURES_TAKE_PROFIT_PERCENT=4,
+    )
+    try:
+        bot.start_account(config)
+        result = binance_api.execute_trade({'action': 'BUY', 'market': 'FUTURES', 'symbol': 'BTCUSDT', 'confidence': 80}, config)
+        bot.log_trade(result)
+        # The stop fires and the user-data stream journals the realized loss
+        exchange.on_tick('BTCUSDT', 48500, 48500)
+    finally:
+        journal.close()
+        bot.log_trade = log_trade
+        stop_user_data_stream(client=exchange)
+        paper_exchange._paper_exchanges.pop('store-test', None)
+    days = store.pnl_by_day()
+    btc = store.symbol_stats()['BTCUSDT']
+    if result['status'] != 'FILLED' or len(days) != 1 or days[0][1] != 1 or not days[0][2] < 0:
+        print(f"❌ Expected one losing close, got {result['status']} {days}")
+        return False
+    if store.win_rate() != 0.0 or (btc['trades'], btc['filled']) != (1, 1):
+        print(f"❌ Unexpected win rate {store.win_rate()} or counts {btc}")
+        return False
+    print(f"✅ Entry and stop-loss recorded: {days}, win rate {store.win_rate()}")
+    return True
+
+def main():
+    print("🗄️  Trade Store Test")
+    print("=" * 50)
+    tests = [test_import_and_reports, test_journal_sink, test_bot_records_realized_pnl]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
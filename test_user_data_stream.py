@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for realized-PnL tracking from the futures user-data stream
+Checks incremental updates from fills, paginated income reconciliation and the
+listenKey websocket flow against the local Binance stand-in
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+from binance_client import BinanceClient
+from mock_binance import MockBinanceServer, MOCK_API_KEY, MOCK_API_SECRET
+from paper_exchange import PaperExchange
+from risk_state import RiskState
+from user_data_stream import UserDataStream, fetch_realized_pnl
+
+class CountingClient:
+    """Wraps a client and counts income history downloads"""
+
+    def __init__(self, client):
+        self.client = client
+        self.income_calls = 0
+
+    def get(self, market, path, params=None, signed=False):
+        if path == '/fapi/v1/income':
+            self.income_calls += 1
+        return self.client.get(market, path, params, signed)
+
+def _round_trip(client, symbol, quantity):
+    client.post('FUTURES', '/fapi/v1/order', {'symbol': symbol, 'side': 'BUY', 'type': 'MARKET', 'quantity': quantity}, signed=True)
+    client.post('FUTURES', '/fapi/v1/order', {'symbol': symbol, 'side': 'SELL', 'type': 'MARKET', 'quantity': quantity}, signed=True)
+
+def _income_total(exchange):
+    return sum(float(i['income']) for i in exchange.income if i['incomeType'] == 'REALIZED_PNL')
+
+def _risk_state():
+    return RiskState(os.path.join(tempfile.mkdtemp(), 'stats.json'))
+
+def test_incremental_pnl():
+    """Fills update realized PnL without any income history download after startup"""
+    print("🧪 Testing incremental realized PnL...")
+    exchange = PaperExchange(balance=10000, fee_percent=0)
+    exchange.on_tick('BTCUSDT', 60000, 60000)
+    counting = CountingClient(exchange)
+    risk = _risk_state()
+    stream = UserDataStream(counting, risk).follow(exchange)
+    for i in range(20):
+        exchange.on_tick('BTCUSDT', 60000, 60000)
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.01})
+        exchange.on_tick('BTCUSDT', 60000 + (i - 10) * 10, 60000 + (i - 10) * 10)
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'BTCUSDT', 'side': 'SELL', 'type': 'MARKET', 'quantity': 0.01})
+    expected = _income_total(exchange)
+    if abs(risk.snapshot()['realized_pnl'] - expected) > 1e-6:
+        print(f"❌ Expected realized PnL {expected}, got {risk.snapshot()['realized_pnl']}")
+        return False
+    if counting.income_calls != 1:
+        print(f"❌ Expected only the startup reconciliation, saw {counting.income_calls} income calls")
+        return False
+    print(f"✅ {stream.events} events tracked {expected:+.2f} USDT with {counting.income_calls} income download")
+    return True
+
+def test_paginated_reconcile():
+    """Reconciliation follows every income page and never double-counts streamed fills"""
+    print("\n🧪 Testing paginated reconciliation...")
+    calls = itertools.count()
+    start = time.time()
+    # The clock only moves every few reads, so records share milliseconds across page boundaries
+    exchange = PaperExchange(balance=100000, fee_percent=0, clock=lambda: start + next(calls) // 5 / 1000)
+    for i in range(25):
+        exchange.on_tick('ETHUSDT', 3000, 3000)
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 1})
+        exchange.on_tick('ETHUSDT', 3001, 3001)
+        exchange.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'SELL', 'type': 'MARKET', 'quantity': 1})
+    fills = fetch_realized_pnl(exchange, int(start * 1000), page_size=10)
+    if len(fills) != 25:
+        print(f"❌ Expected 25 fills across pages, got {len(fills)}")
+        return False
+    risk = _risk_state()
+    stream = UserDataStream(exchange, risk)
+    stream.handle_event({'e': 'ORDER_TRADE_UPDATE', 'o': {'s': 'ETHUSDT', 't': 2, 'x': 'TRADE', 'rp': '1.0'}})
+    stream.reconcile()
+    stream.handle_event({'e': 'ORDER_TRADE_UPDATE', 'o': {'s': 'ETHUSDT', 't': 4, 'x': 'TRADE', 'rp': '1.0'}})
+    if abs(risk.snapshot()['realized_pnl'] - 25.0) > 1e-6:
+        print(f"❌ Expected 25.00 after merging, got {risk.snapshot()['realized_pnl']}")
+        return False
+    print("✅ 25 fills over 3 pages, streamed duplicates collapsed")
+    return True
+
+def _wait(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_websocket_stream():
+    """listenKey + websocket against the stand-in, including an expired key"""
+    print("\n🧪 Testing user-data websocket...")
+    server = MockBinanceServer(tick_interval=0).start()
+    client = BinanceClient(MOCK_API_KEY, MOCK_API_SECRET)
+    client.base_urls = {'SPOT': server.base_url, 'FUTURES': server.base_url}
+    risk = _risk_state()
+    stream = UserDataStream(client, risk, server.user_stream_url).start()
+    try:
+        if not _wait(lambda: stream.connected and stream.reconciliations):
+            print("❌ User-data stream never connected")
+            return False
+        server.set_price('BTCUSDT', 60000)
+        _round_trip(client, 'BTCUSDT', 0.01)
+        server.set_price('BTCUSDT', 60000)
+        if not _wait(lambda: abs(risk.snapshot()['realized_pnl'] - _income_total(server.exchange)) < 1e-6 and stream.events >= 4):
+            print(f"❌ Streamed PnL {risk.snapshot()['realized_pnl']} never matched {_income_total(server.exchange)}")
+            return False
+        first_key = stream.listen_key
+        server.expire_listen_keys()
+        if not _wait(lambda: stream.connected and stream.listen_key != first_key and stream.reconciliations >= 2):
+            print("❌ Stream did not reconnect after the listenKey expired")
+            return False
+        server.set_price('ETHUSDT', 3000)
+        client.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'BUY', 'type': 'MARKET', 'quantity': 0.1}, signed=True)
+        server.set_price('ETHUSDT', 2990)
+        client.post('FUTURES', '/fapi/v1/order', {'symbol': 'ETHUSDT', 'side': 'SELL', 'type': 'MARKET', 'quantity': 0.1}, signed=True)
+        if not _wait(lambda: abs(risk.snapshot()['realized_pnl'] - _income_total(server.exchange)) < 1e-6):
+            print(f"❌ PnL after reconnect {risk.snapshot()['realized_pnl']} != {_income_total(server.exchange)}")
+            return False
+        print(f"✅ Tracked {risk.snapshot()['realized_pnl']:+.2f} USDT across {stream.reconnects} reconnect(s)")
+        return True
+    finally:
+        stream.stop()
+        server.stop()
+
+def main():
+    print("👤 User Data Stream Test")
+    print("=" * 50)
+    tests = [test_incremental_pnl, test_paginated_reconcile, test_websocket_stream]
+    passed = sum(1 for test in tests if test())
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{len(tests)} tests passed")
+    if passed != len(tests):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite trade history, fed from log_trade and importable from JSONL logs
+Usage:
+  python trade_store.py import trade_log.jsonl [trade_log.20240101-000000-000000.jsonl.gz ...]
+  python trade_store.py report [days]
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+TRADE_DB_FILE = 'trades.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    ts_ms INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    symbol TEXT,
+    side TEXT,
+    market TEXT,
+    status TEXT,
+    confidence INTEGER,
+    quantity REAL,
+    price REAL,
+    realized_pnl REAL,
+    reason TEXT,
+    record TEXT,
+    record_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades (ts_ms);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades (symbol, ts_ms);
+CREATE INDEX IF NOT EXISTS idx_trades_market ON trades (market, ts_ms);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status, ts_ms);
+-- Rolled up on insert so reports read a few rows per day instead of every trade
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    market TEXT NOT NULL,
+    trades INTEGER NOT NULL DEFAULT 0,
+    filled INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    notional REAL NOT NULL DEFAULT 0,
+    realized_pnl REAL NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    confidence_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, symbol, market)
+);
+"""
+
+_COLUMNS = ('ts_ms', 'day', 'symbol', 'side', 'market', 'status', 'confidence', 'quantity', 'price', 'realized_pnl', 'reason', 'record', 'record_key')
+_INSERT = f"INSERT OR IGNORE INTO trades ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+def record_key(entry):
+    """Content hash of a record: the same record from the journal sink and a JSONL import gets the same key"""
+    return hashlib.sha1(json.dumps(entry, sort_keys=True, default=str).encode()).hexdigest()
+
+def trade_row(entry):
+    """Flatten one log_trade record into a trades row"""
+    stamp = entry.get('timestamp') or datetime.utcnow().isoformat()
+    try:
+        moment = datetime.fromisoformat(str(stamp).rstrip('Z'))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    except (TypeError, ValueError):
+        moment = datetime.utcnow()
+    ts_ms = int((moment - datetime(1970, 1, 1)).total_seconds() * 1000)
+    response = entry.get('response') if isinstance(entry.get('response'), dict) else {}
+    quantity = _to_float(response.get('executedQty') or response.get('origQty') or response.get('quantity'))
+    price = _to_float(response.get('avgPrice'))
+    if not price and response.get('fills'):
+        price = _to_float(response['fills'][0].get('price'))
+    confidence = entry.get('confidence')
+    return (
+        ts_ms, moment.strftime('%Y-%m-%d'), entry.get('symbol'), entry.get('side'), entry.get('market'),
+        entry.get('status'), int(confidence) if isinstance(confidence, (int, float)) else None,
+        quantity, price or None, _to_float(entry.get('realized_pnl')), entry.get('reason'),
+        json.dumps(entry, default=str), record_key(entry),
+    )
+
+def _rollup(rows):
+    """daily_stats increments for trades rows, one per (day, symbol, market)"""
+    rollup = {}
+    for ts_ms, day, symbol, side, market, status, confidence, quantity, price, pnl, reason, record, _ in rows:
+        stats = rollup.setdefault((day, symbol or '', market or ''), [0, 0, 0, 0.0, 0.0, 0, 0, 0.0, 0])
+        # CLOSED rows are the exit fills of trades already counted, logged for their realized PnL
+        stats[0] += status != 'CLOSED'
+        stats[1] += status == 'FILLED'
+        stats[2] += status == 'FAILED'
+        stats[3] += (quantity or 0.0) * (price or 0.0)
+        if pnl is not None:
+            stats[4] += pnl
+            stats[5] += 1
+            stats[6] += pnl > 0
+        if confidence is not None:
+            stats[7] += confidence
+            stats[8] += 1
+    return [key + tuple(stats) for key, stats in rollup.items()]
+
+def _open_log(path):
+    return gzip.open(path, 'rt') if path.endswith('.gz') else open(path, 'r')
+
+class TradeStore:
+    """SQLite trade table indexed by time, symbol, market and status.
+
+    Every insert also updates a (day, symbol, market) rollup, so PnL, win-rate
+    and per-symbol reports stay constant-time as history grows. Records are
+    unique by record_key, so re-importing a log the journal already fed adds
+    nothing. One connection is shared across threads behind a lock; WAL mode
+    keeps readers off the writer.
+    """
+
+    def __init__(self, path=TRADE_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """Add and backfill record_key in stores created before it existed (existing duplicates keep NULL)"""
+        if 'record_key' not in [column[1] for column in self._conn.execute('PRAGMA table_info(trades)')]:
+            self._conn.execute('ALTER TABLE trades ADD COLUMN record_key TEXT')
+        self._conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_trades_key ON trades (record_key)')
+        missing = self._conn.execute('SELECT id, record FROM trades WHERE record_key IS NULL').fetchall()
+        self._conn.executemany('UPDATE OR IGNORE trades SET record_key = ? WHERE id = ?',
+                               [(record_key(json.loads(record)), row_id) for row_id, record in missing])
+
+    def insert_many(self, entries):
+        """Insert log_trade records not stored yet and roll them up in one transaction, return the number inserted"""
+        rows = [trade_row(entry) for entry in entries]
+        with self._lock:
+            with self._conn:
+                # Only rows that were new go into the rollup
+                inserted = [row for row in rows if self._conn.execute(_INSERT, row).rowcount]
+                self._conn.executemany(
+                    'INSERT INTO daily_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (day, symbol, market) DO UPDATE SET '
+                    'trades = trades + excluded.trades, filled = filled + excluded.filled, failed = failed + excluded.failed, '
+                    'notional = notional + excluded.notional, realized_pnl = realized_pnl + excluded.realized_pnl, '
+                    'closed = closed + excluded.closed, wins = wins + excluded.wins, '
+                    'confidence_sum = confidence_sum + excluded.confidence_sum, confidence_count = confidence_count + excluded.confidence_count',
+                    _rollup(inserted),
+                )
+        return len(inserted)
+
+    def import_jsonl(self, path, batch_size=5000):
+        """Import an existing trade_log.jsonl (or a rotated .jsonl.gz archive), return records imported"""
+        imported = 0
+        batch = []
+        with _open_log(path) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f"Skipping {path}:{line_number}: {e}")
+                    continue
+                if len(batch) >= batch_size:
+                    imported += self.insert_many(batch)
+                    batch = []
+        if batch:
+            imported += self.insert_many(batch)
+        return imported
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self):
+        return self._query('SELECT COUNT(*) FROM trades')[0][0]
+
+    def pnl_by_day(self, start_day=None, end_day=None, symbol=None):
+        """[(day, closed_trades, realized_pnl)] for days in [start_day, end_day], oldest first"""
+        sql = 'SELECT day, SUM(closed), SUM(realized_pnl) FROM daily_stats WHERE day >= ? AND day <= ?'
+        params = [start_day or '0000-00-00', end_day or '9999-99-99']
+        if symbol:
+            sql += ' AND symbol = ?'
+            params.append(symbol)
+        rows = self._query(sql + ' GROUP BY day ORDER BY day', params)
+        return [(day, closed, round(pnl, 8)) for day, closed, pnl in rows]
+
+    def win_rate(self, symbol=None, start_day=None):
+        """Share of trades with a recorded realized PnL that made money (None when there are none)"""
+        sql = 'SELECT SUM(closed), SUM(wins) FROM daily_stats WHERE day >= ?'
+        params = [start_day or '0000-00-00']
+        if symbol:
+            sql += ' AND symbol = ?'
+            params.append(symbol)
+        closed, wins = self._query(sql, params)[0]
+        return wins / closed if closed else None
+
+    def symbol_stats(self, start_day=None):
+        """Per-symbol trade counts, fill/fail counts, notional, PnL, win rate and average confidence"""
+        rows = self._query(
+            'SELECT symbol, SUM(trades), SUM(filled), SUM(failed), SUM(notional), SUM(realized_pnl), '
+            'SUM(closed), SUM(wins), SUM(confidence_sum), SUM(confidence_count) '
+            'FROM daily_stats WHERE day >= ? GROUP BY symbol ORDER BY SUM(trades) DESC',
+            (start_day or '0000-00-00',),
+        )
+        return {
+            symbol: {
+                'trades': trades, 'filled': filled, 'failed': failed,
+                'notional': round(notional, 2), 'realized_pnl': round(pnl, 8),
+                'win_rate': wins / closed if closed else None,
+                'avg_confidence': round(confidence_sum / confidence_count, 1) if confidence_count else None,
+            }
+            for symbol, trades, filled, failed, notional, pnl, closed, wins, confidence_sum, confidence_count in rows
+        }
+
+    def trades(self, symbol=None, market=None, status=None, start_ms=None, end_ms=None, limit=100):
+        """Newest matching records as dicts"""
+        clauses, params = [], []
+        for column, value in (('symbol', symbol), ('market', market), ('status', status)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if start_ms:
+            clauses.append('ts_ms >= ?')
+            params.append(start_ms)
+        if end_ms:
+            clauses.append('ts_ms < ?')
+            params.append(end_ms)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._query(f"SELECT record FROM trades {where} ORDER BY ts_ms DESC LIMIT ?", params + [limit])
+        return [json.loads(record) for (record,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_trade_store(path=TRADE_DB_FILE):
+    """Return the process-wide store"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = TradeStore(path)
+        return _store
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'report') or (sys.argv[1] == 'import' and len(sys.argv) < 3):
+        print(__doc__)
+        sys.exit(1)
+    store = get_trade_store(os.getenv('TRADE_DB') or TRADE_DB_FILE)
+    start = time.perf_counter()
+    if sys.argv[1] == 'import':
+        for path in sys.argv[2:]:
+            imported = store.import_jsonl(path)
+            print(f"✅ Imported {imported} trades from {path}")
+        print(f"📦 {store.count()} trades stored in {time.perf_counter() - start:.2f}s")
+        return
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    start_day = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+    print(f"📅 Realized PnL by day (last {days} days)")
+    for day, closed, pnl in store.pnl_by_day(start_day):
+        print(f"  {day}: {pnl:+.2f} USDT over {closed} closed trades")
+    win_rate = store.win_rate(start_day=start_day)
+    print(f"🏆 Win rate: {win_rate:.1%}" if win_rate is not None else "🏆 Win rate: no closed trades recorded")
+    print("📈 Per symbol")
+    for symbol, stats in store.symbol_stats(start_day).items():
+        print(f"  {symbol}: {json.dumps(stats)}")
+    print(f"⏱️  Report over {store.count()} trades in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import asyncio
+import calendar
+import json
+import threading
+import time
+from datetime import datetime
+import websockets
+
+FUTURES_USER_STREAM_URL = 'wss://fstream.binance.com/ws'
+SPOT_USER_STREAM_URL = 'wss://stream.binance.com:9443/ws'
+LISTEN_KEY_PATHS = {'FUTURES': '/fapi/v1/listenKey', 'SPOT': '/api/v3/userDataStream'}
+KEEPALIVE_INTERVAL = 30 * 60  # Binance expires a listenKey 60 minutes after the last keepalive
+INCOME_PAGE_SIZE = 1000
+
+def _day_start_ms():
+    """Start of the current UTC day in milliseconds"""
+    today = datetime.utcnow().strftime('%Y-%m-%d')
+    return calendar.timegm(time.strptime(today, '%Y-%m-%d')) * 1000
+
+def _income_key(item):
+    # One REALIZED_PNL record per trade, so (symbol, tradeId) matches the stream's (s, t)
+    if item.get('tradeId'):
+        return (item['symbol'], str(item['tradeId']))
+    return ('tran', str(item.get('tranId')))
+
+def fetch_realized_pnl(client, start_time, end_time=None, page_size=INCOME_PAGE_SIZE):
+    """{(symbol, trade_id): pnl} for every USDT REALIZED_PNL income record since start_time, across all pages"""
+    fills = {}
+    cursor = start_time
+    while True:
+        params = {'incomeType': 'REALIZED_PNL', 'startTime': cursor, 'limit': page_size}
+        if end_time:
+            params['endTime'] = end_time
+        page = client.get('FUTURES', '/fapi/v1/income', params, signed=True)
+        for item in page:
+            if item.get('asset') == 'USDT':
+                fills[_income_key(item)] = float(item['income'])
+        if len(page) < page_size:
+            return fills
+        # startTime is inclusive: re-read the last millisecond so records sharing it are not skipped
+        last = max(int(item['time']) for item in page)
+        cursor = last if last > cursor else cursor + 1
+
+def closed_trade_record(event):
+    """Trade-log record (status CLOSED) for a futures fill that realized PnL, e.g. a stop-loss, take-profit or
+    reducing order; None for any other event. This is where the trade store's PnL and win rate come from."""
+    if event.get('e') != 'ORDER_TRADE_UPDATE':
+        return None
+    order = event['o']
+    pnl = float(order.get('rp') or 0)
+    if order.get('x') != 'TRADE' or not pnl:
+        return None
+    return {
+        'symbol': order['s'],
+        'side': order['S'],
+        'market': 'FUTURES',
+        'confidence': None,
+        'reason': f"{order.get('o', 'Order')} fill realized {pnl:+.4f}",
+        'status': 'CLOSED',
+        'realized_pnl': pnl,
+        'response': {'orderId': order.get('i'), 'executedQty': order.get('l'), 'avgPrice': order.get('L')},
+        'timestamp': datetime.fromtimestamp(int(order.get('T') or event.get('E')) / 1000).isoformat(),
+    }
+
+class UserDataStream:
+    """Account events from a Binance user-data stream (futures by default).
+
+    On futures, each ORDER_TRADE_UPDATE fill adds its realized profit ('rp') to
+    the risk state, so execute_trade never has to download the day's income
+    history. The full, paginated REST history is only read on (re)connect to
+    cover fills missed while the socket was down. Every event is also handed to
+    listeners, and connect listeners run after each (re)connect to reload snapshots.
+    """
+
+    def __init__(self, client, risk_state=None, url=FUTURES_USER_STREAM_URL, market='FUTURES', keepalive_interval=KEEPALIVE_INTERVAL, max_reconnect_delay=30):
+        self.client = client
+        self.risk_state = risk_state
+        self.url = url
+        self.market = market
+        self.keepalive_interval = keepalive_interval
+        self.max_reconnect_delay = max_reconnect_delay
+        self.listen_key = None
+        self.connected = False
+        self.reconnects = 0
+        self.reconciliations = 0
+        self.events = 0
+        self.last_event_at = 0.0
+        self._fills = {}
+        self._day = None
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._connect_listeners = []
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._stopping = False
+        self._ws = None
+
+    def add_listener(self, callback):
+        """Register callback(event) to run on every user-data event (on the stream thread)"""
+        self._listeners.append(callback)
+
+    def add_connect_listener(self, callback):
+        """Register callback() to run after every (re)connect, once events are already flowing"""
+        self._connect_listeners.append(callback)
+
+    def _on_connect(self):
+        if self.risk_state is not None:
+            self.reconcile()
+        for callback in self._connect_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"User data connect listener error: {e}")
+
+    def _roll_day(self):
+        today = datetime.utcnow().strftime('%Y-%m-%d')
+        if self._day != today:
+            self._day = today
+            self._fills = {}
+
+    def _record_fill(self, key, pnl):
+        with self._lock:
+            self._roll_day()
+            if key in self._fills:
+                return
+            self._fills[key] = pnl
+            self.risk_state.add_realized_pnl(pnl)
+
+    def reconcile(self):
+        """Merge today's REST income history with the fills already streamed; return True on success"""
+        try:
+            fills = fetch_realized_pnl(self.client, _day_start_ms())
+        except Exception as e:
+            print(f"Realized PnL reconciliation error: {e}")
+            return False
+        with self._lock:
+            self._roll_day()
+            # Fills streamed after the REST snapshot are kept, duplicates collapse on the trade key
+            self._fills.update(fills)
+            self.risk_state.set_realized_pnl(sum(self._fills.values()))
+        self.reconciliations += 1
+        return True
+
+    def handle_event(self, event):
+        """Apply one user-data event"""
+        self.events += 1
+        self.last_event_at = time.time()
+        kind = event.get('e')
+        if kind == 'ORDER_TRADE_UPDATE':
+            order = event['o']
+            pnl = float(order.get('rp') or 0)
+            if order.get('x') == 'TRADE' and pnl and self.risk_state is not None:
+                self._record_fill((order['s'], str(order['t'])), pnl)
+        elif kind == 'listenKeyExpired' and self._ws is not None:
+            # Reconnecting fetches a new key and reconciles whatever was missed
+            asyncio.ensure_future(self._ws.close())
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"User data listener error: {e}")
+
+    def follow(self, exchange):
+        """Take events straight from a PaperExchange instead of a websocket"""
+        exchange.add_event_listener(self.handle_event)
+        self._on_connect()
+        self.connected = True
+        return self
+
+    async def _keepalive(self, ws):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await asyncio.to_thread(self.client.request, 'PUT', self.market, LISTEN_KEY_PATHS[self.market], {'listenKey': self.listen_key})
+            except Exception as e:
+                print(f"listenKey keepalive error: {e}")
+                await ws.close()
+                return
+
+    async def _run(self):
+        delay = 1
+        while not self._stopping:
+            try:
+                response = await asyncio.to_thread(self.client.post, self.market, LISTEN_KEY_PATHS[self.market])
+                self.listen_key = response['listenKey']
+                async with websockets.connect(f"{self.url}/{self.listen_key}", ping_interval=20, ping_timeout=20) as ws:
+                    self._ws = ws
+                    self.connected = True
+                    delay = 1
+                    # Subscribed first, so anything the REST snapshot misses arrives on the socket
+                    await asyncio.to_thread(self._on_connect)
+                    keepalive = asyncio.ensure_future(self._keepalive(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_event(json.loads(raw))
+                    finally:
+                        keepalive.cancel()
+            except Exception as e:
+                if not self._stopping:
+                    print(f"User data stream error: {e}")
+            finally:
+                self._ws = None
+                self.connected = False
+            if self._stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _thread_main(self):
+        self._task = self._loop.create_task(self._run())
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def start(self):
+        """Run the stream on a daemon thread and return self"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._thread_main, daemon=True, name=f"user-data-{self.market.lower()}")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        if self._task is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread:
+            self._thread.join(timeout)
+        if self.listen_key and self._thread:
+            try:
+                self.client.request('DELETE', self.market, LISTEN_KEY_PATHS[self.market], {'listenKey': self.listen_key})
+            except Exception as e:
+                print(f"listenKey close error: {e}")
+
+_active_streams = {}
+
+def start_user_data_stream(client, risk_state=None, url=None, market='FUTURES'):
+    """Start the user-data stream for a client's market (one per account); a paper exchange is followed directly"""
+    stop_user_data_stream(market, client)
+    default_url = FUTURES_USER_STREAM_URL if market == 'FUTURES' else SPOT_USER_STREAM_URL
+    stream = UserDataStream(client, risk_state, url or default_url, market)
+    _active_streams[(market, client)] = stream.follow(client) if hasattr(client, 'add_event_listener') else stream.start()
+    return stream
+
+def get_user_data_stream(market='FUTURES', client=None):
+    """The running stream for client's market, or for any account's when client is None"""
+    if client is not None:
+        return _active_streams.get((market, client))
+    return next((stream for (name, _), stream in list(_active_streams.items()) if name == market), None)
+
+def stop_user_data_stream(market=None, client=None):
+    """Stop the matching streams (all by default); execute_trade falls back to REST reconciliation"""
+    for key in list(_active_streams):
+        if (market is None or key[0] == market) and (client is None or key[1] is client):
+            stream = _active_streams.pop(key, None)
+            if stream is not None:
+                stream.stop()
@@ -13,6 +13,24 @@ def load_config(env_file='.env'):
         'BINANCE_API_SECRET': os.getenv('BINANCE_API_SECRET'),
         'TELEGRAM_BOT_TOKEN': os.getenv('TELEGRAM_BOT_TOKEN'),
         'TELEGRAM_CHAT_ID': os.getenv('TELEGRAM_CHAT_ID'),
+        'TELEGRAM_DIGEST_THRESHOLD': int(os.getenv('TELEGRAM_DIGEST_THRESHOLD', '3')),
+        'TELEGRAM_COALESCE_SECONDS': float(os.getenv('TELEGRAM_COALESCE_SECONDS', '1')),
+        'TELEGRAM_MIN_INTERVAL': float(os.getenv('TELEGRAM_MIN_INTERVAL', '1')),
+        'TELEGRAM_MAX_ALERT_AGE': float(os.getenv('TELEGRAM_MAX_ALERT_AGE', '300')),
+        # Endpoint overrides (empty = Binance production)
+        'BINANCE_SPOT_BASE_URL': os.getenv('BINANCE_SPOT_BASE_URL', ''),
+        'BINANCE_FUTURES_BASE_URL': os.getenv('BINANCE_FUTURES_BASE_URL', ''),
+        # Client-side Binance rate limiting
+        'RATE_LIMIT_SAFETY': float(os.getenv('RATE_LIMIT_SAFETY', '0.9')),
+        'RATE_LIMIT_MAX_WAIT': float(os.getenv('RATE_LIMIT_MAX_WAIT', '5')),
+        # Retries, hedging, circuit breakers and per-stage latency budgets
+        'RETRY_ATTEMPTS': int(os.getenv('RETRY_ATTEMPTS', '3')),
+        'HEDGE_AFTER_MS': float(os.getenv('HEDGE_AFTER_MS', '0')),
+        'CIRCUIT_FAILURE_THRESHOLD': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+        'CIRCUIT_RESET_SECONDS': float(os.getenv('CIRCUIT_RESET_SECONDS', '30')),
+        'MARKET_DATA_BUDGET': float(os.getenv('MARKET_DATA_BUDGET', '15')),
+        'STRATEGY_BUDGET': float(os.getenv('STRATEGY_BUDGET', '40')),
+        'EXECUTION_BUDGET': float(os.getenv('EXECUTION_BUDGET', '20')),
         'TRADE_QUANTITY': float(os.getenv('TRADE_QUANTITY', '0.001')),
         # Advanced futures risk management
         'FUTURES_LEVERAGE': int(os.getenv('FUTURES_LEVERAGE', '1')),
@@ -21,7 +39,61 @@ def load_config(env_file='.env'):
         'FUTURES_TAKE_PROFIT_PERCENT': float(os.getenv('FUTURES_TAKE_PROFIT_PERCENT', '0')),
         'FUTURES_USE_BALANCE_PERCENT': float(os.getenv('FUTURES_USE_BALANCE_PERCENT', '0')),
         'FUTURES_MAX_TRADES_PER_DAY': int(os.getenv('FUTURES_MAX_TRADES_PER_DAY', '0')),
+        'FUTURES_CONCURRENT_ORDERS': int(os.getenv('FUTURES_CONCURRENT_ORDERS', '0')),
+        'FUTURES_STATS_FILE': os.getenv('FUTURES_STATS_FILE', ''),
+        'RISK_STATE_SHARED': int(os.getenv('RISK_STATE_SHARED', '0')),
+        # Execution algorithms for large orders ('market' = one market order)
+        'EXECUTION_ALGO': os.getenv('EXECUTION_ALGO', 'market').strip().lower(),
+        'EXECUTION_MIN_NOTIONAL': float(os.getenv('EXECUTION_MIN_NOTIONAL', '1000')),
+        'EXECUTION_DURATION': float(os.getenv('EXECUTION_DURATION', '30')),
+        'EXECUTION_SLICES': int(os.getenv('EXECUTION_SLICES', '5')),
+        'EXECUTION_POLL_SECONDS': float(os.getenv('EXECUTION_POLL_SECONDS', '1')),
+        'ICEBERG_VISIBLE_PERCENT': float(os.getenv('ICEBERG_VISIBLE_PERCENT', '20')),
+        'EXECUTION_MAX_SLIPPAGE_BPS': float(os.getenv('EXECUTION_MAX_SLIPPAGE_BPS', '0')),
         'PAPER_TRADING': int(os.getenv('PAPER_TRADING', '0')),
+        'PAPER_BALANCE': float(os.getenv('PAPER_BALANCE', '10000')),
+        'PAPER_SPOT_PERCENT': float(os.getenv('PAPER_SPOT_PERCENT', '50')),
+        'PAPER_FEE_PERCENT': float(os.getenv('PAPER_FEE_PERCENT', '0.04')),
+        'PAPER_REST_PRICES': int(os.getenv('PAPER_REST_PRICES', '0')),
+        # Multi-symbol pipeline
+        'MARKET_DATA_LIMIT': int(os.getenv('MARKET_DATA_LIMIT', '5')),
+        'MULTI_SYMBOL_PIPELINE': int(os.getenv('MULTI_SYMBOL_PIPELINE', '0')),
+        'PIPELINE_CONCURRENCY': int(os.getenv('PIPELINE_CONCURRENCY', '8')),
+        'ASYNC_PIPELINE': int(os.getenv('ASYNC_PIPELINE', '0')),
+        'BATCH_SIGNALS': int(os.getenv('BATCH_SIGNALS', '0')),
+        'MAX_TRADES_PER_TICK': int(os.getenv('MAX_TRADES_PER_TICK', '1')),
+        'MIN_SIGNAL_CONFIDENCE': int(os.getenv('MIN_SIGNAL_CONFIDENCE', '0')),
+        # Gemini signal cache (0 = disabled)
+        'SIGNAL_CACHE_TTL': int(os.getenv('SIGNAL_CACHE_TTL', '0')),
+        'SIGNAL_CACHE_SIZE': int(os.getenv('SIGNAL_CACHE_SIZE', '256')),
+        'SIGNAL_CACHE_DIGITS': int(os.getenv('SIGNAL_CACHE_DIGITS', '3')),
+        # Local rule engine (0 = off, 1 = gate model calls + fallback, 2 = rules only)
+        'RULE_ENGINE': int(os.getenv('RULE_ENGINE', '0')),
+        'RULE_KLINE_INTERVAL': os.getenv('RULE_KLINE_INTERVAL', '5m'),
+        'RULE_LOOKBACK': int(os.getenv('RULE_LOOKBACK', '20')),
+        'RULE_MOMENTUM_PERCENT': float(os.getenv('RULE_MOMENTUM_PERCENT', '1.0')),
+        'RULE_VOLUME_Z': float(os.getenv('RULE_VOLUME_Z', '2.0')),
+        'RULE_MAX_VOLATILITY': float(os.getenv('RULE_MAX_VOLATILITY', '5.0')),
+        # Local kline store directory (empty = off); filled from the stream when enabled
+        'KLINE_STORE_DIR': os.getenv('KLINE_STORE_DIR', ''),
+        # Trade journal (background writer for trade_log.jsonl)
+        'TRADE_LOG_FSYNC': os.getenv('TRADE_LOG_FSYNC', 'interval'),
+        'TRADE_LOG_MAX_MB': float(os.getenv('TRADE_LOG_MAX_MB', '0')),
+        'TRADE_LOG_ROTATE_HOURS': float(os.getenv('TRADE_LOG_ROTATE_HOURS', '0')),
+        'TRADE_DB': os.getenv('TRADE_DB', ''),
+        # Scheduling
+        'SCHEDULE_INTERVAL': int(os.getenv('SCHEDULE_INTERVAL', '600')),
+        'PRICE_MOVE_TRIGGER_PERCENT': float(os.getenv('PRICE_MOVE_TRIGGER_PERCENT', '0')),
+        'EVENT_COOLDOWN': int(os.getenv('EVENT_COOLDOWN', '30')),
+        # Streaming market data
+        'MARKET_DATA_STREAM': int(os.getenv('MARKET_DATA_STREAM', '0')),
+        'MARKET_DATA_STREAM_URL': os.getenv('MARKET_DATA_STREAM_URL', ''),
+        'MARKET_DATA_SYMBOLS': [s.strip().upper() for s in os.getenv('MARKET_DATA_SYMBOLS', 'BTCUSDT,ETHUSDT').split(',') if s.strip()],
+        # User-data streams (fills, balances, positions)
+        'USER_DATA_STREAM': int(os.getenv('USER_DATA_STREAM', '0')),
+        'USER_DATA_STREAM_URL': os.getenv('USER_DATA_STREAM_URL', ''),
+        # Several accounts/strategies in one process (empty = just the account above)
+        'ACCOUNTS_FILE': os.getenv('ACCOUNTS_FILE', ''),
     }
     
     # Validate required config
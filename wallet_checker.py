@@ -1,13 +1,6 @@
-import requests
-import time
-import hmac
-import hashlib
-from urllib.parse import urlencode
 from utils import load_config
-
-def _get_binance_signature(query_string, secret):
-    """Generate Binance API signature"""
-    return hmac.new(secret.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+from binance_client import get_client
+from account_state import get_account_state
 
 def get_spot_balance(config):
     """Get spot wallet balance"""
@@ -18,20 +11,10 @@ def get_spot_balance(config):
         api_key = config['BINANCE_API_KEY']
         api_secret = config['BINANCE_API_SECRET']
         
-        # Get account info
-        url = "https://api.binance.com/api/v3/account"
-        params = {
-            'timestamp': int(time.time() * 1000)
-        }
-        
-        query_string = urlencode(params)
-        signature = _get_binance_signature(query_string, api_secret)
-        params['signature'] = signature
-        headers = {'X-MBX-APIKEY': api_key}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        account_info = response.json()
+        # Get account info (from the stream-fed cache when the bot keeps one in this process)
+        client = get_client(api_key, api_secret)
+        account = get_account_state(client, 'SPOT')
+        account_info = account.spot_account() if account else client.get('SPOT', '/api/v3/account', signed=True)
         
         # Filter balances with non-zero amounts
         balances = []
@@ -69,20 +52,10 @@ def get_futures_balance(config):
         api_key = config['BINANCE_API_KEY']
         api_secret = config['BINANCE_API_SECRET']
         
-        # Get futures account info
-        url = "https://fapi.binance.com/fapi/v2/account"
-        params = {
-            'timestamp': int(time.time() * 1000)
-        }
-        
-        query_string = urlencode(params)
-        signature = _get_binance_signature(query_string, api_secret)
-        params['signature'] = signature
-        headers = {'X-MBX-APIKEY': api_key}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
-        account_info = response.json()
+        # Get futures account info (from the stream-fed cache when the bot keeps one in this process)
+        client = get_client(api_key, api_secret)
+        account = get_account_state(client)
+        account_info = account.futures_account() if account else client.get('FUTURES', '/fapi/v2/account', signed=True)
         
         # Get asset balances
         balances = []